@@ -54,6 +54,8 @@ build_exe_options = {
         (str(Path("lib", "License.txt")), str(Path("lib", "License.txt"))),
         (str(Path("lib", "Citation.txt")), "Citation.txt"),
         (str(Path("lib", "Citation.txt")), str(Path("lib", "Citation.txt"))),
+        (str(Path("lib", "CIE1931_diagram.png")), str(Path("lib", "CIE1931_diagram.png"))),
+        (str(Path("lib", "CIE1931_locus.csv")), str(Path("lib", "CIE1931_locus.csv"))),
     ],
     "optimize": 1,
     "include_msvcr": True,
@@ -1,55 +1,235 @@
-import colour, re, gc, sys
+import colour, re, gc, sys, os, mmap, locale, hashlib, tempfile, weakref, json
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+from scipy.interpolate import BSpline
+from scipy.spatial import cKDTree
+from scipy.signal import savgol_filter
 import matplotlib.pyplot as plt
-from colour.plotting import *
+from matplotlib.collections import (EllipseCollection, LineCollection)
+from matplotlib import path as mpl_path
+from matplotlib.artist import Artist
+from matplotlib.text import Text
+from matplotlib.transforms import (Affine2D, IdentityTransform)
+from matplotlib.colors import to_rgba
+from matplotlib.patches import Polygon
 from tkinter.filedialog import askopenfilenames
 from pathlib import Path
+from io import StringIO
+from collections import OrderedDict
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
 
+# Folder of the program, where the "lib" folder is (when frozen by cx_Freeze, the folder of the executable)
+if getattr(sys, "frozen", False):
+    program_folder = Path(sys.executable).resolve().parent
+else:
+    program_folder = Path(__file__).resolve().parent
+"""NOTE
+The files of the program are found from this folder, instead of the working directory,
+since the program is not necessarily started from the folder where it is installed.
+"""
+
+# Folder for the files cached by the program, on the user's cache directory (see spectrum_cache)
+if sys.platform == "win32":
+    cache_folder = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local", "SpectraChroma", "cache")
+elif sys.platform == "darwin":
+    cache_folder = Path.home() / "Library" / "Caches" / "SpectraChroma"
+else:
+    cache_folder = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache", "SpectraChroma")
+"""NOTE
+The program folder might be read-only, so the cache is kept on the user's folder instead.
+"""
+
+#-----------------------------------------------------------------------------
+# Observers and illuminants that can be used on the calculations
+#-----------------------------------------------------------------------------
+class colorimetry_tables():
+    """Registry of the color matching functions (observers) and illuminants that can be used for calculating the color coordinates.
+
+    The tables are taken from colour's datasets only the first time they are requested, already trimmed and aligned
+    to the wavelengths used by colour.sd_to_XYZ() on spectra with 1 nm intervals (360 to 780 nm, ASTM E308 practice).
+    Then they are kept on the class, so switching between them does not process the datasets again:
+        cmfs = colorimetry_tables.get_cmfs("CIE 1964 10 Degree Standard Observer")
+        illuminant = colorimetry_tables.get_illuminant("D50")
+    
+    The available tables are listed on .observers and .illuminants (their names on colour's datasets, and a description).
+    """
+
+    # Color matching functions: {name on colour.MSDS_CMFS: description}
+    observers = {
+        "CIE 1931 2 Degree Standard Observer": "CIE 1931 2° Standard Observer",
+        "CIE 1964 10 Degree Standard Observer": "CIE 1964 10° Standard Observer",
+    }
+
+    # Illuminants: {name on colour.SDS_ILLUMINANTS: description}
+    illuminants = {
+        "D65": "D65 (noon daylight)",
+        "D50": "D50 (horizon daylight)",
+        "D55": "D55 (mid-morning daylight)",
+        "D75": "D75 (north sky daylight)",
+        "A": "A (incandescent light)",
+        "C": "C (average daylight)",
+        "E": "E (equal energy)",
+        **{f"FL{n}": f"FL{n} (fluorescent light)" for n in range(1, 13)},
+    }
+
+    # Tables already processed: {name: table}
+    cmfs_tables = {}
+    illuminant_tables = {}
+
+    @classmethod
+    def get_cmfs(cls, name):
+        """Returns the color matching functions (colour.MultiSpectralDistributions) with the given name.
+        """
+        if name not in cls.cmfs_tables:
+            cls.cmfs_tables[name] = colour.MSDS_CMFS[name].copy().trim(colour.colorimetry.SPECTRAL_SHAPE_ASTME308)
+        return cls.cmfs_tables[name]
+    
+    @classmethod
+    def get_illuminant(cls, name):
+        """Returns the illuminant (colour.SpectralDistribution) with the given name.
+        """
+        if name not in cls.illuminant_tables:
+            cls.illuminant_tables[name] = colour.SDS_ILLUMINANTS[name].copy().align(colour.colorimetry.SPECTRAL_SHAPE_ASTME308)
+        return cls.illuminant_tables[name]
+
 #-----------------------------------------------------------------------------
 # Calculation of color coordinates from spectrum file
 #-----------------------------------------------------------------------------
 class spectrum_to_cie:
     """Takes a text file with a luminescence emission spectrum,
     and returns an object with the coordinates of the perceived color in the color spaces: XYZ, CIE 1931, sRGB.
+    The spectrum can also be a NumPy array (.npy or .npz), or a raw binary file of floats (.raw with a .hdr header).
     """
 
     # Initialize class variables
 
     # Regular expression that extracts the spectrum points from a text file
     # It catches the X coordinate on Group 1, and the Y coordinate on Group 2
-    data_regex = re.compile(r"(?mi)^[\s;]*((?:\+|-)?\d+(?:\.|,)?\d*(?:e(?:\+|-)?\d+)?)[\s;]+((?:\+|-)?\d+(?:\.|,)?\d*(?:e(?:\+|-)?\d+)?)[\s;]*$")
+    # (the separators do not match line breaks, so the regex can be run over a whole block of lines at once)
+    data_regex = re.compile(r"(?mi)^(?:[^\S\n]|;)*((?:\+|-)?\d+(?:\.|,)?\d*(?:e(?:\+|-)?\d+)?)(?:[^\S\n]|;)+((?:\+|-)?\d+(?:\.|,)?\d*(?:e(?:\+|-)?\d+)?)(?:[^\S\n]|;)*$")
+
+    # Regular expression that matches the lines of a table with 2 or more columns of numbers
+    # (one column of wavelengths, and one or more columns of intensities)
+    table_regex = re.compile(r"(?mi)^(?:[^\S\n]|;)*(?:\+|-)?\d+(?:\.|,)?\d*(?:e(?:\+|-)?\d+)?(?:(?:[^\S\n]|;)+(?:\+|-)?\d+(?:\.|,)?\d*(?:e(?:\+|-)?\d+)?)+(?:[^\S\n]|;)*$")
+
+    # Files bigger than this size (in bytes) are read through a memory map, one chunk at a time
+    stream_threshold = 16 * 1024**2
+
+    # Size of each chunk of a memory mapped file (in bytes)
+    stream_chunk_size = 4 * 1024**2
+
+    # Loaders of the binary file formats (by file extension), files with other extensions are read as text
+    binary_loaders = {
+        ".npy": "load_npy_data",
+        ".npz": "load_npz_data",
+        ".raw": "load_raw_data",
+    }
+
+    # Extension of the header file that describes the contents of a raw binary file
+    raw_header_extension = ".hdr"
 
     # Color matching function
-    cmfs = colour.MSDS_CMFS['CIE 1931 2 Degree Standard Observer']
+    cmfs = colorimetry_tables.get_cmfs('CIE 1931 2 Degree Standard Observer')
 
     # Illuminant for ambient lighting correction
-    illuminant = colour.SDS_ILLUMINANTS['D65']
+    illuminant = colorimetry_tables.get_illuminant('D65')
 
     # Import the spectrum and create the sprectrum object
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache = None, color_data = None, file_name = None):
         
         # Instance variables
         self.file_path = file_path                  # Absolute file system path to the spectrum file
-        self.file_name = Path(file_path).stem       # Name of the file without the extension
+        self.file_name = file_name or Path(file_path).stem  # Name of the file without the extension
         self.success = False                        # If the file import has been successful  
-        self.XYZ = None                             # Coordinates on the XYZ color space
-        self.xy = None                              # Coordinates on the CIE xy color space
-        self.RGB = None                             # Coordinates on the sRGB color space
+        self._XYZ = None                            # Coordinates on the XYZ color space
+        self._xy = None                             # Coordinates on the CIE xy color space
+        self._RGB = None                            # Coordinates on the sRGB color space
+        self._spectrum_raw = None                   # Unmodified spectrum
+        self._spectrum_corrected = None             # Spectrum interpolated to 1 nm intervals
+        self.color_data = None                      # Arrays of the spectrum (see .get_color_data())
+        self._fingerprint = None                    # Hash of the arrays of the raw spectrum
+        self._metrics = None                        # CCT, Duv, dominant wavelength and purity (see color_metrics)
+        self.pipeline = None                        # Processing applied to the imported arrays (see .get_pipeline())
+        self.xy_mean = None                         # Mean of the xy coordinates of the noisy spectra (see .calculate_uncertainty())
+        self.xy_covariance = None                   # Covariance matrix of those xy coordinates
+        """NOTE
+        Only the arrays of the raw spectrum are stored when the file is imported. Everything else
+        (the spectral distributions and the color coordinates) is calculated the first time it is
+        accessed, then kept on the object. The spectral distributions can be freed again by calling
+        the .release() method, since they are the biggest part of the object.
+        """
+        
+        # Spectrum that was already calculated (by the multi_spectrum_to_cie class)
+        if color_data:
+            self.set_color_data(color_data)
+            return
+        
+        # Look for the results on the cache (if one was provided)
+        cache_key = None
+        if cache:
+            cache_key = cache.get_key(file_path, self.calculation_settings() + self.file_settings(file_path))
+            cached_data = cache.load(cache_key)
+            if cached_data:
+                self.set_color_data(cached_data)
+                return
         
         # Import spectrum from file
         imported_spectrum = self.get_spectrum_from_file(file_path)  # Function returns False if it could not import the spectrum
         
         if imported_spectrum:
+
+            # Unmodified spectrum
+            wavelengths, intensities = imported_spectrum
+            self.color_data = {"wavelengths": wavelengths, "intensities": intensities}
+
+            # Check if the spectrum can be interpolated (the interpolation is kept on the cache of interpolation_operator)
+            try:
+                interpolation_operator.get(wavelengths)
+            except ValueError:
+                print(f"Error: Not enough points to interpolate the spectrum - {file_path}")
+                return
             
             # The file has been parsed successfuly
             self.success = True
 
-            # Unmodified spectrum
-            self.spectrum_raw = colour.SpectralDistribution(imported_spectrum)
+            # Store the results on the cache, so the file does not need to be calculated again next time
+            if cache_key:
+                cache.store(cache_key, self.get_color_data())
+    
+    @property
+    def spectrum_raw(self):
+        """Unmodified spectrum (colour.SpectralDistribution)"""
+        if self._spectrum_raw is None:
+            self._spectrum_raw = colour.SpectralDistribution(
+                np.asarray(self.color_data["intensities"], dtype=np.float64), self.color_data["wavelengths"]
+            )
+        return self._spectrum_raw
+
+    @spectrum_raw.setter
+    def spectrum_raw(self, spectral_distribution):
+        self._spectrum_raw = spectral_distribution
+    
+    @property
+    def spectrum_corrected(self):
+        """Spectrum interpolated to 1 nm intervals (colour.SpectralDistribution)"""
+        if self._spectrum_corrected is None:
+            corrected_wavelengths = self.color_data.get("corrected_wavelengths")
+            corrected_intensities = self.color_data.get("corrected_intensities")
 
             # Interpolate the spectrum so the spacing between consecutive points is exactly 1 nm,
             # and slice the spectrum to the range of 380 to 780 nm (the visible region)
-            self.spectrum_corrected = (self.spectrum_raw.copy()).interpolate(colour.SpectralShape(interval=1))
+            # (same as self.spectrum_raw.copy().interpolate(colour.SpectralShape(interval=1)), but the
+            # interpolation is calculated only once for all spectra with the same wavelengths)
+            if corrected_intensities is None:
+                operator = interpolation_operator.get(self.color_data["wavelengths"])
+                corrected_wavelengths = operator.corrected_wavelengths
+                corrected_intensities = operator.apply(self.color_data["intensities"])
+                self.color_data["corrected_wavelengths"] = corrected_wavelengths
+                self.color_data["corrected_intensities"] = corrected_intensities
             """The model used to calculate the CIE color coordinates requires two things:
                 1. That all points are uniformly spaced
                 2. That the spacing between the points is EXACTLY 1, 5, 10 or 20 nm
@@ -62,23 +242,50 @@ class spectrum_to_cie:
                 - Sprague Interpolation, if the raw data is evenly spaced
                 - Cubic Spline Interpolation, if the raw data is NOT evenly spaced
             """
+            
+            self._spectrum_corrected = colour.SpectralDistribution(corrected_intensities, corrected_wavelengths)
+        return self._spectrum_corrected
+
+    @spectrum_corrected.setter
+    def spectrum_corrected(self, spectral_distribution):
+        self._spectrum_corrected = spectral_distribution
+    """NOTE
+    Creating the SpectralDistribution objects takes longer than reading the spectrum or calculating
+    its color coordinates. So they are only created the first time they are needed (for plotting or
+    saving the spectral distribution).
+    """
+    
+    @property
+    def XYZ(self):
+        """Coordinates on the XYZ color space - array(X, Y, Z)"""
+        if (self._XYZ is None) and self.success:
 
             # Convert spectrum to a point in the XYZ color space
-            # array(X, Y, Z)
-            self.XYZ = colour.sd_to_XYZ(self.spectrum_corrected, self.cmfs, self.illuminant)
+            # (same as colour.sd_to_XYZ(self.spectrum_corrected, self.cmfs, self.illuminant), but the interpolation
+            # and the color matching functions are combined on a single array of weights, calculated only once)
+            weights = interpolation_operator.get(self.color_data["wavelengths"]).get_color_weights(self.cmfs, self.illuminant)
+            self._XYZ = weights @ self.color_data["intensities"]
+        
+        return self._XYZ
+    
+    @property
+    def xy(self):
+        """Coordinates on the CIE xy color space - array(CIEx, CIEy)"""
+        if (self._xy is None) and self.success:
 
             # Convert a point on the XYZ color space to xy color coordinates on the CIE chromaticity diagram
-            # array(CIEx, CIEy)
-            self.xy = colour.XYZ_to_xy(self.XYZ)
-            self.x, self.y = self.xy    # For convenience, store the values on separate variables as floats
+            self._xy = colour.XYZ_to_xy(self.XYZ)
+        
+        return self._xy
+    
+    @property
+    def RGB(self):
+        """Coordinates on the sRGB color space - array(R, G, B)"""
+        if (self._RGB is None) and self.success:
 
             # Cobvert a point on the XYZ color space to the sRGB color space
-            # array(R, G, B)
-            self.RGB = colour.XYZ_to_sRGB(self.XYZ / self.XYZ[1])   # Normalisation of XYZ and conversion to sRGB
-
-            for n in range(3):
-                self.RGB[n] = max(min(self.RGB[n], 1.0), 0.0)       # Clamp each component to the [0.0, 1.0] range
-
+            RGB = colour.XYZ_to_sRGB(self.XYZ / self.XYZ[1])   # Normalisation of XYZ and conversion to sRGB
+            self._RGB = np.clip(RGB, 0.0, 1.0)                  # Clamp each component to the [0.0, 1.0] range
             """Normalisation: each component of the XYZ array was divided by Y. This way, normalised Y = 1.
             With the normalisation, we can display the color without it looking "darkened".
 
@@ -86,135 +293,2444 @@ class spectrum_to_cie:
             (Y = 1 is the maximum luminance on the sRGB color space)
             (Y = 0 would be no luminance: you would see no color)
             """
-            self.R, self.G, self.B = self.RGB   # For convenience, also store the values on separate variables as floats
+        
+        return self._RGB
+    
+    # For convenience, the values can also be accessed on separate variables as floats
+    x = property(lambda self: self.xy[0])
+    y = property(lambda self: self.xy[1])
+    R = property(lambda self: self.RGB[0])
+    G = property(lambda self: self.RGB[1])
+    B = property(lambda self: self.RGB[2])
+    
+    @property
+    def metrics(self):
+        """Quantities derived from the xy coordinates (dictionary of floats, see color_metrics):
+        {"CCT", "Duv", "dominant_wavelength", "complementary_wavelength", "purity"}
+        """
+        if (self._metrics is None) and self.success:
+            metrics = color_metrics.calculate(self.xy, self.cmfs, self.illuminant)
+            self._metrics = {name: float(values[0]) for name, values in metrics.items()}
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self._metrics = metrics
+    
+    # Each quantity as a float (NaN if the spectrum was not imported successfully, since it has no metrics)
+    CCT = property(lambda self: (self.metrics or {}).get("CCT", np.nan))
+    Duv = property(lambda self: (self.metrics or {}).get("Duv", np.nan))
+    dominant_wavelength = property(lambda self: (self.metrics or {}).get("dominant_wavelength", np.nan))
+    complementary_wavelength = property(lambda self: (self.metrics or {}).get("complementary_wavelength", np.nan))
+    purity = property(lambda self: (self.metrics or {}).get("purity", np.nan))
+    
+    @property
+    def fingerprint(self):
+        """Hash of the wavelengths and intensities of the raw spectrum (bytes).
+        Spectra with exactly the same values have the same fingerprint, even if they come from different files.
+        """
+        if (self._fingerprint is None) and self.success:
+            fingerprint = hashlib.blake2b(digest_size=20)
+            for field in ("wavelengths", "intensities"):
+                fingerprint.update(np.ascontiguousarray(self.color_data[field], dtype=np.float64).tobytes())
+            self._fingerprint = fingerprint.digest()
+        return self._fingerprint
+    
+    def release(self):
+        """Free the memory used by the spectral distributions (they are created again when needed).
+        The arrays of the raw spectrum and the color coordinates are kept.
+        """
+        self._spectrum_raw = None
+        self._spectrum_corrected = None
+        if self.color_data:
+            self.color_data.pop("corrected_wavelengths", None)
+            self.color_data.pop("corrected_intensities", None)
+    
+    def calculate_uncertainty(self, noise = "poisson", sigma = None, samples = 10000, seed = None):
+        """Estimate the uncertainty of the xy coordinates caused by the noise on the intensities, by Monte Carlo.
+        Returns a tuple of numpy arrays (mean, covariance) of the xy coordinates, which are also stored on
+        .xy_mean and .xy_covariance
+
+        noise: model of the noise on each point of the spectrum (see .noise_variance())
+            "poisson" - the intensities are counts
+            "gaussian" - standard deviation given by 'sigma' (a single value or one value per point)
+            "baseline" - standard deviation estimated from the baseline of the spectrum
+        samples: amount of noisy copies of the spectrum
+        seed: seed of the random number generator (for reproducible results)
+        """
+        weights = interpolation_operator.get(self.color_data["wavelengths"]).get_color_weights(self.cmfs, self.illuminant)
+        variance = self.noise_variance(self.color_data["intensities"], noise, sigma)
+        XYZ_covariance = (weights * variance) @ weights.T
+
+        xy_mean, xy_covariance = self.xy_monte_carlo(self.XYZ[np.newaxis], XYZ_covariance[np.newaxis], samples, seed)
+        self.xy_mean, self.xy_covariance = xy_mean[0], xy_covariance[0]
+        return self.xy_mean, self.xy_covariance
+    
+    @classmethod
+    def noise_variance(cls, intensities, noise = "poisson", sigma = None):
+        """Variance of the noise on each point of the spectra, according to the noise model.
+        'intensities' can be a single spectrum or a stack of spectra (one on each row).
+        (see .calculate_uncertainty() for the noise models)
+        """
+        intensities = np.asarray(intensities, dtype=np.float64)
+
+        if noise == "poisson":
+            return np.clip(intensities, 0.0, None)
+        elif noise == "gaussian":
+            if sigma is None:
+                raise ValueError("The standard deviation of the noise is needed for the 'gaussian' model.")
+            return np.broadcast_to(np.square(sigma, dtype=np.float64), intensities.shape)
+        elif noise == "baseline":
+            sigma = np.apply_along_axis(cls.estimate_noise, -1, intensities)
+            return np.broadcast_to(np.square(sigma)[..., np.newaxis], intensities.shape)
+        else:
+            raise ValueError(f"Unknown noise model: {noise}")
+    
+    @staticmethod
+    def estimate_noise(intensities):
+        """Estimate the standard deviation of the noise of a spectrum, from the points on its baseline.
+
+        The second differences between consecutive points cancel the (slow changing) signal, and leave
+        the noise with 6 times its variance. The points with the 25% lowest intensities are taken as the
+        baseline, and the median absolute deviation is used so spikes do not inflate the estimate.
+        """
+        second_difference = np.diff(intensities, 2)
+        baseline = intensities[1:-1] <= np.percentile(intensities, 25)
+        if np.count_nonzero(baseline) >= 3:
+            second_difference = second_difference[baseline]
+        
+        deviation = np.median(np.abs(second_difference - np.median(second_difference)))
+        return 1.4826 * deviation / np.sqrt(6.0)    # 1.4826: ratio between the standard and median absolute deviation
+    
+    # Maximum amount of noisy samples that are held in memory at once by .xy_monte_carlo()
+    monte_carlo_chunk_size = 2_000_000
+
+    @classmethod
+    def xy_monte_carlo(cls, XYZ, XYZ_covariance, samples = 10000, seed = None):
+        """Draw noisy samples around several points on the XYZ color space, and convert them to xy coordinates.
+        'XYZ' has the shape (spectra, 3) and 'XYZ_covariance' the shape (spectra, 3, 3).
+        Returns a tuple of numpy arrays (mean, covariance) of the xy coordinates, with the shapes (spectra, 2)
+        and (spectra, 2, 2).
+        """
+        """NOTE
+        The color weights are linear, so a spectrum with independent noise of variance v on each point
+        gives XYZ coordinates with covariance W·diag(v)·Wᵀ. The noisy copies of the spectra are drawn
+        directly as points on the XYZ color space (samples x 3 values, instead of samples x points),
+        then converted to xy. The conversion to xy is not linear, that is why it is sampled.
+        """
+        rng = np.random.default_rng(seed)
+        spectra = len(XYZ)
+        xy_mean = np.empty((spectra, 2))
+        xy_covariance = np.empty((spectra, 2, 2))
+
+        # Square root of the covariance matrices (eigendecomposition, so singular matrices also work)
+        eigenvalues, eigenvectors = np.linalg.eigh(XYZ_covariance)
+        deviation = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))[:, np.newaxis, :]
+
+        # Process as many spectra at once as fit on the chunk
+        step = max(1, cls.monte_carlo_chunk_size // (3 * samples))
+        for start in range(0, spectra, step):
+            stop = min(start + step, spectra)
+
+            # Noisy XYZ coordinates: (spectra, samples, 3)
+            noise = rng.standard_normal((stop - start, samples, 3))
+            XYZ_samples = XYZ[start:stop, np.newaxis, :] + noise @ deviation[start:stop].transpose(0, 2, 1)
+
+            # Convert to xy and get the statistics of the samples
+            xy_samples = XYZ_samples[..., :2] / XYZ_samples.sum(axis=-1, keepdims=True)
+            xy_mean[start:stop] = xy_samples.mean(axis=1)
+            centered = xy_samples - xy_mean[start:stop, np.newaxis, :]
+            xy_covariance[start:stop] = centered.transpose(0, 2, 1) @ centered / (samples - 1)
+        
+        return xy_mean, xy_covariance
+    
+    def get_pipeline(self):
+        """Returns the processing_pipeline of the spectrum. It is created the first time, keeping the arrays
+        of the spectrum as they are at that moment (see spectrum_container.process()).
+        """
+        if self.pipeline is None:
+            self.fingerprint    # The fingerprint stays the one of the imported arrays
+            self.pipeline = processing_pipeline(self.color_data["wavelengths"], self.color_data["intensities"])
+        return self.pipeline
+    
+    def compact(self, storage):
+        """Move the intensities of the spectrum to a spectrum_storage (float32 values on an array shared by many
+        spectra, which can be moved to the disk), and free the spectral distributions.
+        The color coordinates are calculated before, so they keep the precision of the imported values.
+        """
+        if isinstance(self.color_data["intensities"], stored_intensities):
+            return
+        
+        self.fingerprint    # The fingerprint and the coordinates are calculated from the original values
+        self.XYZ
+        self.release()
+        self.color_data = {
+            **self.color_data,
+            "wavelengths": storage.share_wavelengths(self.color_data["wavelengths"]),
+            "intensities": storage.store(self.color_data["intensities"]),
+        }
+    
+    def set_processed_data(self, wavelengths, intensities):
+        """Replace the arrays of the spectrum by the processed ones.
+        The color coordinates and the spectral distributions are calculated again when needed.
+        """
+        self.set_color_data({"wavelengths": wavelengths, "intensities": intensities})
+        self.release()
+    
+    @staticmethod
+    def set_colorimetry(observer = None, illuminant = None):
+        """Change the color matching functions and/or the illuminant used on the calculations of all spectra
+        (by their names on colorimetry_tables). The spectra that were already calculated are not changed,
+        they can be calculated again with spectrum_container.recalculate()
+        """
+        if observer:
+            spectrum_to_cie.cmfs = colorimetry_tables.get_cmfs(observer)
+        if illuminant:
+            spectrum_to_cie.illuminant = colorimetry_tables.get_illuminant(illuminant)
+    
+    @classmethod
+    def calculation_settings(cls):
+        """Text describing the settings used to calculate the color coordinates.
+        Results calculated with different settings are stored on the cache as different entries.
+        """
+        return f"{cls.cmfs.name}; {cls.illuminant.name}; 1 nm interval (CIE 167:2005); ASTM E308"
+    
+    def file_settings(self, file_path):
+        """Text of the settings of a file that are stored on another file (the header of a raw binary file),
+        so the cache entries of the file are not used anymore if those settings change.
+        """
+        if Path(file_path).suffix.lower() != ".raw":
+            return ""
+        try:
+            with open(Path(file_path).with_suffix(self.raw_header_extension)) as header_file:
+                return "; " + header_file.read()
+        except (OSError, UnicodeDecodeError):
+            return ""
+    
+    def get_color_data(self):
+        """Returns a dictionary with the arrays of the spectrum and its color coordinates.
+        (the interpolated spectrum is only included if it was already calculated)
+        """
+        color_data = dict(self.color_data)
+        color_data.update({
+            "XYZ": self.XYZ,
+            "xy": self.xy,
+            "RGB": self.RGB,
+        })
+        return color_data
+    
+    def set_color_data(self, color_data):
+        """Restore the spectrum and its color coordinates from the dictionary returned by .get_color_data()
+        """
+        self.color_data = color_data   # The spectral distributions are only created from it when needed
+        self._XYZ = color_data.get("XYZ")
+        self._xy = color_data.get("xy")
+        self._RGB = color_data.get("RGB")
+        self._metrics = None                # The metrics and the uncertainty were calculated with the previous coordinates
+        self.xy_mean = None
+        self.xy_covariance = None
+        self.success = True
     
     def get_spectrum_from_file(self, file_path):
         """Extracts the spectral coordinates (x,y) from a text file,
-        and returns the data as a dictionary {x1: y1, x2: y2, ...}.
+        and returns the data as a tuple of numpy arrays (wavelengths, intensities).
         It ignores the headers on the file and just get the data.
 
         It is considered as valid data a line in which there are exactly 2 real numbers
         separated by a space, tabulation or semicolon. And nothing else besides that.
+
+        Binary files (.npy, .npz and .raw) are read directly as arrays, instead of as text.
+        (see .load_binary_data())
         """
 
+        spectrum_data = self.read_spectrum_data(file_path, columns=2)
+        if spectrum_data is False:
+            return False
+        
+        return self.sort_spectrum(spectrum_data[:, 0], spectrum_data[:, 1])
+    
+    def get_table_from_file(self, file_path):
+        """Extracts a table of spectra from a text file, with the wavelengths on the first column
+        and the intensities of each spectrum on the other columns.
+        Returns a tuple of numpy arrays: (wavelengths, intensities), with the intensities having
+        the shape (spectra, wavelengths).
+
+        The amount of columns is the one that most lines of the file have. A file with only
+        2 columns gives the same points as .get_spectrum_from_file()
+        """
+
+        spectrum_data = self.read_spectrum_data(file_path, columns=None)
+        if spectrum_data is False:
+            return False
+        
+        return self.sort_spectrum(spectrum_data[:, 0], spectrum_data[:, 1:].T)
+    
+    def read_spectrum_data(self, file_path, columns=2):
+        """Read the numeric block of a file into an array of shape (points, columns).
+        Returns False if the file could not be read or has no data.
+        (see .parse_spectrum_data() for the meaning of 'columns')
+        """
+
+        # Binary files
+        loader = self.binary_loaders.get(Path(file_path).suffix.lower())
+        if loader:
+            return self.load_binary_data(file_path, getattr(self, loader), columns)
+
+        # Text files
         try:
-            spectrum_file = open(file_path)
+            if os.path.getsize(file_path) > self.stream_threshold:
+                spectrum_data = self.stream_spectrum_data(file_path, columns)
+            else:
+                with open(file_path) as spectrum_file:
+                    spectrum_data = self.parse_spectrum_data(spectrum_file.read(), columns)
         except FileNotFoundError:
             print(f"Error: File not found - {file_path}")
             return False
+        except UnicodeDecodeError:
+            print(f"Error: File could not be opened as a plain text document - {file_path}")
+            return False
+
+        if len(spectrum_data) == 0:
+            return False
         
-        # Dictionary for the spectral coordinates
-        spectrum_data = {}
+        return spectrum_data
+    
+    def load_binary_data(self, file_path, loader, columns=2):
+        """Read a binary file with the given loader method, and return its array of shape (points, columns)
+        (the wavelengths on the first column and the intensities on the others).
+        Returns False if the file could not be read or has no data.
+
+        The arrays are memory mapped whenever the format allows it, so the file is not copied to memory
+        (only the points that are actually used are read from the disk). The array on the file can have
+        either the shape (points, columns) or (columns, points): the smaller dimension is taken as the columns.
+        """
 
-        # Loop through the file line by line and extracts the data
         try:
-            line_number = 0
-            for line in spectrum_file:
-                line_number += 1
-
-                # Perform the regular expression search (x-axis gets to Group 1, and y-axis to Group 2)
-                coordinate_data = self.data_regex.search(line)
-
-                if coordinate_data:
-                    try:
-                        # Get the spectrum coordinate (as string)
-                        wavelenght = coordinate_data.group(1)
-                        intensity = coordinate_data.group(2)
-
-                        # If the decimal separator is a comma, replace it by a dot
-                        if "," in wavelenght:
-                            wavelenght = wavelenght.replace(",", ".", 1)
-                        if "," in intensity:
-                            intensity = intensity.replace(",", ".", 1)
-                        
-                        # Convert the coordinate from string to float
-                        wavelenght = float(wavelenght)
-                        intensity = float(intensity)
-
-                        # Store the coordinates on the dictionary
-                        spectrum_data.update({wavelenght: intensity})
-                    except ValueError:
-                        # Fail-safe for the case there's some edge case that the regex couldn't handle properly
-                        # This exception should never happen if the regex was crafted correctly
-                        print(f"Error: Not a valid floating point number - Line {line_number} of {file_path}")
+            spectrum_data = loader(file_path)
+        except FileNotFoundError as error:
+            print(f"Error: File not found - {error.filename or file_path}")
+            return False
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Error: File could not be opened as a binary array ({error}) - {file_path}")
+            return False
+        
+        # Put the points on the rows (this is just a view of the array, not a copy)
+        if spectrum_data.ndim != 2:
+            print(f"Error: The array on the file must have 2 dimensions, not {spectrum_data.ndim} - {file_path}")
+            return False
+        if spectrum_data.shape[0] < spectrum_data.shape[1]:
+            spectrum_data = spectrum_data.T
+        
+        if (spectrum_data.shape[1] < 2) or (columns and spectrum_data.shape[1] != columns):
+            print(f"Error: The array on the file has {spectrum_data.shape[1]} columns - {file_path}")
+            return False
+        
+        # Remove the points with values that are not numbers
+        if not np.issubdtype(spectrum_data.dtype, np.floating):
+            spectrum_data = spectrum_data.astype(np.float64)
+        finite_points = np.isfinite(spectrum_data).all(axis=1)
+        if not finite_points.all():
+            spectrum_data = spectrum_data[finite_points]
+
+        if len(spectrum_data) == 0:
+            return False
+        
+        return spectrum_data
+    
+    @staticmethod
+    def load_npy_data(file_path):
+        """Memory map the array of a NumPy .npy file.
+        """
+        return np.load(file_path, mmap_mode="r", allow_pickle=False)
+    
+    @staticmethod
+    def load_npz_data(file_path):
+        """Read the array of a NumPy .npz archive.
+
+        If the archive has the arrays "wavelengths" and "intensities", they are put together on a table.
+        Otherwise its first array is used as the table.
+        """
+
+        with np.load(file_path, allow_pickle=False) as archive:
+            if ("wavelengths" in archive) and ("intensities" in archive):
+                return np.vstack((archive["wavelengths"], archive["intensities"]))
+            return archive[archive.files[0]]
+        """NOTE
+        The arrays inside a .npz archive cannot be memory mapped (numpy ignores the 'mmap_mode'
+        argument for archives, because their arrays might be compressed). So they are read to memory.
+        """
+    
+    def load_raw_data(self, file_path):
+        """Memory map a file of raw little-endian floats, described by a header file with the same name
+        but with the extension .hdr (for example: "spectrum.raw" and "spectrum.hdr").
+
+        The header has one setting per line (as 'name = value'):
+            dtype = float32         The type of the values: float32 or float64 (default)
+            columns = 2             Amount of columns: the wavelengths, then the intensities of each spectrum
+            layout = points         How the values are ordered on the file:
+                                        'points'  - one point after another (wavelength, intensity, ...) (default)
+                                        'columns' - all wavelengths, then all intensities, ...
+        Empty lines and lines starting with # are ignored.
+        """
+
+        # Read the settings of the header
+        header = {"dtype": "float64", "columns": "2", "layout": "points"}
+        with open(Path(file_path).with_suffix(self.raw_header_extension)) as header_file:
+            for line in header_file:
+                line = line.strip()
+                if (not line) or line.startswith("#"):
+                    continue
+                name, value = line.split("=", maxsplit=1)
+                header[name.strip().lower()] = value.strip().lower()
+        
+        if header["dtype"] not in ("float32", "float64"):
+            raise ValueError(f"dtype must be float32 or float64, not '{header['dtype']}'")
+        if header["layout"] not in ("points", "columns"):
+            raise ValueError(f"layout must be 'points' or 'columns', not '{header['layout']}'")
+        columns = int(header["columns"])
+        
+        # Map the values of the file as an array
+        spectrum_data = np.memmap(file_path, dtype=np.dtype(header["dtype"]).newbyteorder("<"), mode="r")
+        if header["layout"] == "points":
+            return spectrum_data.reshape(-1, columns)
+        else:
+            return spectrum_data.reshape(columns, -1).T
+    
+    def parse_spectrum_data(self, text, columns=2):
+        """Takes the contents of a spectrum file (as a string) and returns its data points
+        as a numpy array of shape (points, columns), with the wavelengths on the first column
+        and the intensities on the others.
+
+        The header and footer are skipped by looking for the first and last lines that
+        match the data regular expression, then the whole block between them is converted
+        to floats in one go. Only if that block has some malformed line (text in the middle
+        of the data, a line with a different amount of numbers, etc) the regex is used to pick
+        the valid lines from the block.
+
+        The 'columns' argument is the amount of numbers that a valid line has:
+            2       Exactly one wavelength and one intensity
+            None    The amount of numbers that most lines of the block have (at least 2)
+            n       Exactly n numbers
+        """
+
+        line_regex = self.data_regex if (columns == 2) else self.table_regex
+
+        # Find the first data line (that is where the header ends)
+        first_match = line_regex.search(text)
+        if not first_match:
+            return np.empty((0, columns or 2))
+        block_start = first_match.start()
+
+        # Find the last data line (that is where the footer begins)
+        block_end = len(text)
+        while block_end > block_start:
+            line_start = max(text.rfind("\n", block_start, block_end) + 1, block_start)
+            if line_regex.match(text, line_start, block_end):
+                break
+            block_end = line_start - 1
+        """NOTE
+        The footer is usually non-existent or just a few lines long, so the loop above
+        only runs a couple of times. It walks backwards one line at a time, so the data
+        block itself is never split into lines on the Python side.
+        """
+
+        data_block = text[block_start:block_end]
+
+        # Use dot as the decimal separator, and whitespace as the column separator
+        if "," in data_block:
+            data_block = data_block.replace(",", ".")
+        if ";" in data_block:
+            data_block = data_block.replace(";", " ")
+        
+        # Convert the whole block at once
+        if not self.has_loose_decimals(data_block):
+            try:
+                spectrum_data = np.loadtxt(StringIO(data_block), dtype=np.float64, comments=None, ndmin=2)
+                if (spectrum_data.shape[1] == (columns or max(spectrum_data.shape[1], 2))) \
+                and np.isfinite(spectrum_data).all():
+                    return spectrum_data
+            except ValueError:
+                pass
+        
+        # Fallback: the block has malformed lines, so only keep the lines matched by the regex
+        if columns == 2:
+            coordinate_data = self.data_regex.findall(data_block)
+            spectrum_data = np.array(coordinate_data, dtype=np.float64).reshape(-1, 2)
+            """NOTE
+            The regex scans the whole block on a single call, and numpy converts the matched
+            strings to float. So even on this path there is no loop over the lines in Python.
+            The commas were already replaced by dots above, so the matches are valid floats.
+            """
+        
+        else:
+            # Split the matched lines into their numbers, and keep the lines with the right amount of numbers
+            table_lines = [line.split() for line in self.table_regex.findall(data_block)]
+            if len(table_lines) == 0:
+                return np.empty((0, columns or 2))
+            line_sizes = np.array([len(line) for line in table_lines])
+            if columns is None:
+                columns = np.bincount(line_sizes).argmax()
+            
+            table_lines = [line for line, size in zip(table_lines, line_sizes) if size == columns]
+            spectrum_data = np.array(table_lines, dtype=np.float64).reshape(-1, columns)
+
+        return spectrum_data
+    
+    def stream_spectrum_data(self, file_path, columns=2):
+        """Parse a big spectrum file without loading all of its text to memory.
+        Returns the same (points, columns) array as .parse_spectrum_data()
+
+        The file is memory mapped and split in chunks of about .stream_chunk_size bytes
+        (always ending on a line break). Each chunk is parsed on its own, and its points
+        are copied to a float64 buffer that was allocated beforehand for the whole file.
+
+        When the amount of columns is not given, it is the one of the first chunk with data.
+        """
+
+        # Same text encoding that open() uses by default, so the result is the same as reading the whole file
+        encoding = locale.getpreferredencoding(False)
+
+        with open(file_path, "rb") as spectrum_file, \
+             mmap.mmap(spectrum_file.fileno(), 0, access=mmap.ACCESS_READ) as file_map:
+            
+            file_size = len(file_map)
+            file_bytes = np.frombuffer(file_map, dtype=np.uint8)    # View of the file (no copy is made)
+
+            # Count the lines of the file, in order to allocate the buffer
+            # (there can not be more data points than lines)
+            line_count = 1
+            for position in range(0, file_size, self.stream_chunk_size):
+                line_count += np.count_nonzero(file_bytes[position : position + self.stream_chunk_size] == ord("\n"))
+            del file_bytes  # The view needs to be released before the memory map can be closed
+
+            spectrum_data = None
+            point_count = 0
+
+            # Parse the file one chunk at a time
+            chunk_start = 0
+            while chunk_start < file_size:
+
+                # The chunk always end after a line break, so no line gets split between two chunks
+                chunk_end = file_map.find(b"\n", chunk_start + self.stream_chunk_size)
+                chunk_end = file_size if (chunk_end == -1) else (chunk_end + 1)
+
+                # Decode the chunk, and convert its line breaks the same way open() does
+                chunk_text = file_map[chunk_start:chunk_end].decode(encoding)
+                if "\r" in chunk_text:
+                    chunk_text = chunk_text.replace("\r\n", "\n").replace("\r", "\n")
+                
+                # Store the chunk's points on the buffer
+                chunk_data = self.parse_spectrum_data(chunk_text, columns)
+                if spectrum_data is None:
+                    if len(chunk_data) == 0:
+                        chunk_start = chunk_end
                         continue
+                    columns = chunk_data.shape[1]
+                    spectrum_data = np.empty((line_count, columns), dtype=np.float64)
+                spectrum_data[point_count : point_count + len(chunk_data)] = chunk_data
+                point_count += len(chunk_data)
 
-        except UnicodeDecodeError:
-            print(f"Error: File could not be opened as a plain text document - {file_path}")
-            spectrum_file.close()
+                chunk_start = chunk_end
+        
+        if spectrum_data is None:
+            return np.empty((0, columns or 2))
+        return spectrum_data[:point_count]
+    
+    @staticmethod
+    def has_loose_decimals(data_block):
+        """Check if there is a decimal separator without a digit before it (like ".5") on the data.
+        Numpy accepts those numbers, but the data regex does not.
+        """
+        block_bytes = np.frombuffer(data_block.encode(), dtype=np.uint8)
+        dots = np.flatnonzero(block_bytes == ord("."))
+        
+        if len(dots) == 0:
             return False
+        if dots[0] == 0:
+            return True
         
-        # Close the file and return the dictionary
-        spectrum_file.close()
-        return spectrum_data
+        # Character before each dot
+        previous = block_bytes[dots - 1]
+        return not ((previous >= ord("0")) & (previous <= ord("9"))).all()
+    
+    @staticmethod
+    def sort_spectrum(wavelengths, intensities):
+        """Sort the spectrum points by wavelength, and remove the repeated wavelengths
+        (the last value read for a repeated wavelength is the one that is kept).
+        Returns a tuple of contiguous numpy arrays (wavelengths, intensities).
+
+        The intensities can also be an array of several spectra, of shape (spectra, wavelengths).
+        """
+
+        # Most files are already sorted with no repetition, so nothing needs to be done
+        if (len(wavelengths) < 2) or (np.diff(wavelengths) > 0).all():
+            return np.ascontiguousarray(wavelengths), np.ascontiguousarray(intensities)
+
+        # Stable sort, so repeated wavelengths keep the order in which they were read
+        order = np.argsort(wavelengths, kind="stable")
+        wavelengths = wavelengths[order]
+        intensities = intensities[..., order]
+
+        # Keep only the last point of each repeated wavelength
+        keep = np.append(wavelengths[1:] != wavelengths[:-1], True)
+        return wavelengths[keep], np.ascontiguousarray(intensities[..., keep])
     
 #-----------------------------------------------------------------------------
-# Container to store the results from the spectrum_to_cie() class
+# Files with several spectra (one column of wavelengths and many columns of intensities)
 #-----------------------------------------------------------------------------
-class spectrum_container():
-    """Store spectra and their color coordinates.
+class multi_spectrum_to_cie(spectrum_to_cie):
+    """Import a file that has one column of wavelengths and one or more columns of intensities,
+    and calculate the color coordinates of all of its spectra at once.
 
-    Instantiating the container:
-        spectrum = spectrum_container()
-    Optionally, the container can be bound to a specific Tk window, so it can generate events for that window:
-        spectrum = spectrum_container(tk_window = window)
-    
-    New spectra can be added by calling the method .import_files:
-        spectrum.import_files()     # Opens a file dialog to the user (multiple files can be selected at once)
-    The spectra's color coordinates are calculated and stored on the container (sequentially).
+    The spectra of the file are stored on the attribute .spectra as a list of spectrum_to_cie()
+    objects (one for each column of intensities). A file with only 2 columns gives a single spectrum,
+    with the same results as spectrum_to_cie().
 
-    Then the container can have each spectrum accessed by index (like a list):
-        [ spectrum[0], spectrum[1], spectrum[2], ...]
+    Since all the spectra of a file share the same wavelengths, the interpolation and the
+    integration with the color matching functions are made with numpy over the whole table,
+    instead of creating one SpectralDistribution for each spectrum.
+
+    The arrays of the file can also be given directly as 'table_data' (a dictionary like the one
+    on the attribute .table_data), then the file is not read again.
+    """
+
+    def __init__(self, file_path, cache = None, table_data = None):
+        
+        # Instance variables
+        self.file_path = file_path                  # Absolute file system path to the spectrum file
+        self.file_name = Path(file_path).stem       # Name of the file without the extension
+        self.success = False                        # If the file import has been successful
+        self.spectra = []                           # spectrum_to_cie() objects of each column of the file
+        self.table_data = None                      # Arrays of all spectra of the file, and their color coordinates
+        
+        # Spectra that were already calculated (by another process)
+        if table_data:
+            self.set_table_data(table_data)
+            return
+        
+        # Look for the results on the cache (if one was provided)
+        cache_key = None
+        if cache:
+            cache_key = cache.get_key(file_path, self.calculation_settings() + self.file_settings(file_path) + "; all columns")
+            cached_data = cache.load(cache_key)
+            if cached_data:
+                self.set_table_data(cached_data)
+                return
+        
+        # Import the spectra from the file
+        imported_table = self.get_table_from_file(file_path)    # Function returns False if it could not import the table
+        if not imported_table:
+            return
+        wavelengths, intensities = imported_table
+        
+        # Calculate the color coordinates of all spectra at once
+        # (the spectra interpolated to 1 nm intervals are only created when needed, see spectrum_to_cie.spectrum_corrected)
+        try:
+            XYZ, xy, RGB = self.table_to_color(wavelengths, intensities)
+        except ValueError:
+            print(f"Error: Not enough points to interpolate the spectrum - {file_path}")
+            return
+        
+        table_data = {
+            "wavelengths": wavelengths,
+            "intensities": intensities,
+            "XYZ": XYZ,
+            "xy": xy,
+            "RGB": RGB,
+        }
+        self.set_table_data(table_data)
+        
+        # Store the results on the cache
+        if cache_key:
+            cache.store(cache_key, table_data)
     
-    Each spectrum[n] can have their color coordinates accessed by the attributes .xy or .RGB:
-        spectrum[n].xy      # A numpy array with its (x, y) CIE 1931 color coordiates
-        spectrum[n].RGB     # A numpy array with the approximate RGB values (R, G, B) - on the scale from 0 to 1
-    Those values can also be accessed individually (as floats):
-        spectrum[n].x , spectrum[n].y , spectrum[n].R , spectrum[n].G , spectrum[n].B
+    @staticmethod
+    def calculate_file(file_path, cache = None, colorimetry = None):
+        """Parse a file and calculate its color coordinates.
+        Returns only the dictionary of arrays of the file (the attribute .table_data), or None if the file could not be imported.
+
+        This is what the processes of the parallel import run (see spectrum_container.read_files),
+        so they send back just the arrays instead of the whole objects.
+        The processes do not share the settings of the main process, so the names of the observer
+        and the illuminant are also passed as the tuple 'colorimetry'.
+        """
+        if colorimetry:
+            spectrum_to_cie.set_colorimetry(*colorimetry)
+        obj_file = multi_spectrum_to_cie(file_path, cache)
+        return obj_file.table_data if obj_file.success else None
     
-    Other attributes:
-        spectrum[n].XYZ         # Coordinates on the XYZ color space - array(X, Y, Z)
-        spectrum[n].file_path   # Absolute file system path to the spectrum file
-        spectrum[n].file_name   # Name of the file without the extension
-        spectrum[n].success     # If the file import has been successful  
+    def set_table_data(self, table_data):
+        """Create the spectrum_to_cie() objects of each column, from a dictionary with the same keys
+        as spectrum_to_cie.get_color_data() (but with one row of values for each spectrum).
+        """
+
+        self.table_data = table_data
+
+        # The arrays come flattened from the cache, so restore their shape
+        spectra_count = len(table_data["XYZ"]) // 3 if (np.ndim(table_data["XYZ"]) == 1) else len(table_data["XYZ"])
+        XYZ = np.reshape(table_data["XYZ"], (spectra_count, 3))
+        xy = np.reshape(table_data["xy"], (spectra_count, 2))
+        RGB = np.reshape(table_data["RGB"], (spectra_count, 3))
+        intensities = np.reshape(table_data["intensities"], (spectra_count, -1))
+        if "corrected_intensities" in table_data:
+            corrected_intensities = np.reshape(table_data["corrected_intensities"], (spectra_count, -1))
+
+        for n in range(spectra_count):
+            color_data = {
+                "wavelengths": table_data["wavelengths"],
+                "intensities": intensities[n],
+                "XYZ": XYZ[n],
+                "xy": xy[n],
+                "RGB": RGB[n],
+            }
+            if "corrected_intensities" in table_data:
+                color_data["corrected_wavelengths"] = table_data["corrected_wavelengths"]
+                color_data["corrected_intensities"] = corrected_intensities[n]
+
+            file_name = f"{self.file_name} ({n+1})" if (spectra_count > 1) else self.file_name
+            self.spectra.append(spectrum_to_cie(self.file_path, color_data=color_data, file_name=file_name))
+        
+        self.success = spectra_count > 0
     
-    The container can also be iterated on a for loop, like as:
-        for item in spectrum:
-            print(item.xy)  # Each individual item can have its attributes acessed, as listed above
+    @classmethod
+    def table_to_color(cls, wavelengths, intensities):
+        """Calculate the color coordinates of several spectra (that share the same wavelengths).
+        Returns a tuple of numpy arrays (XYZ, xy, RGB), with one row for each spectrum.
+
+        The same as interpolating each spectrum to 1 nm intervals, then using colour.sd_to_XYZ()
+        (ASTM E308 practice). But the interpolation and the color matching functions are combined
+        on a single matrix, so all spectra are converted with one matrix product.
+        (see interpolation_operator and tristimulus_weights)
+        """
+
+        # Convert the spectra to points in the XYZ color space
+        weights = interpolation_operator.get(wavelengths).get_color_weights(cls.cmfs, cls.illuminant)
+        XYZ = intensities @ weights.T
+
+        # Convert to xy color coordinates on the CIE chromaticity diagram
+        xy = colour.XYZ_to_xy(XYZ)
+
+        # Convert to the sRGB color space (normalised to Y = 1), and clamp each component to the [0.0, 1.0] range
+        RGB = np.clip(colour.XYZ_to_sRGB(XYZ / XYZ[:, 1:2]), 0.0, 1.0)
+
+        return XYZ, xy, RGB
+
+#-----------------------------------------------------------------------------
+# Interpolation of many spectra at once to 1 nm intervals
+#-----------------------------------------------------------------------------
+class interpolation_operator():
+    """Interpolate spectra to 1 nm intervals, as a sparse matrix applied to the values of the spectra.
+
+    Both interpolations recommended by CIE 167:2005 (Sprague and cubic spline) are linear on the values
+    of the spectrum. So for a given list of wavelengths, the interpolation can be calculated once as a
+    matrix, and then applied to any amount of spectra with those wavelengths:
+        corrected_intensities = operator.apply(intensities)     # intensities of shape (spectra, wavelengths)
+
+    The operators are kept on a cache by their wavelengths (instruments usually always scan the same wavelengths),
+    so they are only calculated for the first spectrum with those wavelengths:
+        operator = interpolation_operator.get(wavelengths)
     
-    The amount of spectra on the container can be obtained with the len() function:
-        for n in range(len(spectrum)):
-            spectrum[n] ... # Do something with each spectrum
+    The results are the same as of SpectralDistribution.interpolate(SpectralShape(interval=1)):
+        - Sprague Interpolation, if the raw data is evenly spaced
+        - Cubic Spline Interpolation, if the raw data is NOT evenly spaced
+    The new wavelengths (attribute .corrected_wavelengths) are the integers from the first to the last wavelength.
     """
 
-    def __init__(self, tk_window = None):
-        # List of spectrum objects
-        self.id = []
-        # Optionally, bind the container to a Tk window
-        self.window = tk_window
+    # Operators already calculated: {(amount of wavelengths, hash of the wavelengths): operator}
+    cache = OrderedDict()
+
+    # Maximum amount of operators kept on the cache (the least recently used are removed first)
+    max_cache = 32
+
+    # Coefficients of the Sprague polynomial (Sprague, 1880):
+    # the rows are the coefficients of X**0 to X**5, and the columns multiply the values from i-2 to i+3
+    sprague_polynomial = np.array([
+        [  0,   0,   0,    0,   0,   0],
+        [  2, -16,   0,   16,  -2,   0],
+        [ -1,  16, -30,   16,  -1,   0],
+        [ -9,  39, -70,   66, -33,   7],
+        [ 13, -64, 126, -124,  61, -12],
+        [ -5,  25, -50,   50, -25,   5],
+    ]) / 24
+    sprague_polynomial[0, 2] = 1
+
+    def __init__(self, wavelengths):
+        
+        if (len(wavelengths) < 2) or (np.floor(wavelengths[-1]) <= np.ceil(wavelengths[0])):
+            raise ValueError("The wavelengths do not span enough to be interpolated to 1 nm intervals.")
+        
+        self.wavelengths = wavelengths  # Wavelengths of the spectra that the operator takes
+        self.corrected_wavelengths = colour.SpectralShape(np.ceil(wavelengths[0]), np.floor(wavelengths[-1]), 1).range()
+        self.color_weights = {}         # Weights for calculating the XYZ coordinates directly from the spectra (see .get_color_weights())
+
+        if colour.utilities.is_uniform(wavelengths):
+            self.evaluation = self.sprague_matrix(wavelengths, self.corrected_wavelengths)
+            self.solver = None
+        else:
+            self.evaluation, self.solver = self.spline_matrices(wavelengths, self.corrected_wavelengths)
+        """NOTE
+        The interpolated values are:
+            corrected_intensities = evaluation @ intensities                (Sprague)
+            corrected_intensities = evaluation @ solve(intensities)         (cubic spline)
+        The Sprague interpolation only uses the 6 nearest points, so its matrix is very sparse.
+        The cubic spline depends on all points, but it is a sparse system of equations (the
+        spline coefficients) followed by a sparse matrix (the spline evaluation). So instead of
+        storing the full matrix of the spline (that would not be sparse), the system is factored
+        once and solved again for each batch of spectra.
+        """
     
-    def __getitem__(self, index):
-        return self.id[index]
+    @classmethod
+    def get(cls, wavelengths):
+        """Returns the operator for the given wavelengths (from the cache, if it was already calculated).
+        Raises ValueError if there are not enough points to interpolate.
+        """
+
+        key = cls.get_key(wavelengths)
+        if key in cls.cache:
+            cls.cache.move_to_end(key)
+            return cls.cache[key]
+        
+        operator = interpolation_operator(wavelengths)
+        cls.cache[key] = operator
+        while len(cls.cache) > cls.max_cache:
+            cls.cache.popitem(last=False)
+        return operator
     
-    def __len__(self):
-        return len(self.id)
+    @staticmethod
+    def get_key(wavelengths):
+        """Key of the operator of the given wavelengths on the cache.
+        """
+        return (len(wavelengths), hashlib.blake2b(np.ascontiguousarray(wavelengths, dtype=np.float64).tobytes(), digest_size=20).digest())
+    
+    def apply(self, intensities):
+        """Interpolate the spectra to 1 nm intervals.
+        The intensities can be a single spectrum, or an array of shape (spectra, wavelengths).
+        """
+        values = np.asarray(intensities, dtype=np.float64).T
+        if self.solver is not None:
+            values = self.solver.solve(np.asfortranarray(values, dtype=np.float64))
+        return np.asarray(self.evaluation @ values).T
+    
+    def get_color_weights(self, cmfs, illuminant):
+        """Weights for calculating the XYZ coordinates directly from the spectra (before the interpolation).
+        Returns an array of shape (3, wavelengths), so:
+            XYZ = intensities @ weights.T
+        is the same as interpolating the spectra and then using tristimulus_weights.XYZ()
+        """
+
+        key = (cmfs.name, illuminant.name)
+        if key not in self.color_weights:
+            weights = tristimulus_weights.get_grid_weights(self.corrected_wavelengths, cmfs, illuminant)
+            weights = np.asarray(self.evaluation.T @ weights.T)
+            if self.solver is not None:
+                weights = self.solver.solve(np.asfortranarray(weights), trans="T")
+            self.color_weights[key] = np.ascontiguousarray(weights.T)
+        
+        return self.color_weights[key]
+    
+    @classmethod
+    def sprague_matrix(cls, wavelengths, corrected_wavelengths):
+        """Sparse matrix of the Sprague interpolation (same as colour.SpragueInterpolator).
+        """
+
+        points = len(wavelengths)
+        if points < 6:
+            raise ValueError("The Sprague interpolation requires at least 6 points")
+        
+        # The values are padded with 2 extra points on each end, extrapolated from the first and last 6 values
+        interval = wavelengths[1] - wavelengths[0]
+        padded_wavelengths = np.concatenate((
+            [wavelengths[0] - interval * 2, wavelengths[0] - interval],
+            wavelengths,
+            [wavelengths[-1] + interval, wavelengths[-1] + interval * 2]
+        ))
+        coefficients = colour.SpragueInterpolator.SPRAGUE_C_COEFFICIENTS / 209
+        padding = sparse.lil_matrix((points + 4, points))
+        padding[0:2, 0:6] = coefficients[0:2]
+        padding[2:-2, :] = sparse.identity(points)
+        padding[-2:, -6:] = coefficients[2:4]
+
+        # The polynomial is evaluated on each new wavelength, from the 6 padded values around it
+        i = np.searchsorted(padded_wavelengths, corrected_wavelengths) - 1
+        X = (corrected_wavelengths - padded_wavelengths[i]) / (padded_wavelengths[i + 1] - padded_wavelengths[i])
+        values = np.vander(X, 6, increasing=True) @ cls.sprague_polynomial
+        rows = np.repeat(np.arange(len(corrected_wavelengths)), 6)
+        columns = (i[:, None] + np.arange(-2, 4)).ravel() % (points + 4)   # Negative indices wrap around, like on colour.SpragueInterpolator
+        polynomial = sparse.csr_matrix((values.ravel(), (rows, columns)), shape=(len(corrected_wavelengths), points + 4))
+
+        return (polynomial @ padding.tocsr()).tocsr()
+    
+    @staticmethod
+    def spline_matrices(wavelengths, corrected_wavelengths):
+        """Sparse matrices of the cubic spline (same as colour.CubicSplineInterpolator, that is scipy's
+        not-a-knot cubic spline). Returns a tuple (evaluation matrix, factored system of the spline coefficients).
+        """
+
+        if len(wavelengths) < 4:
+            raise ValueError("The cubic spline interpolation requires at least 4 points")
+        
+        knots = np.concatenate(([wavelengths[0]] * 4, wavelengths[2:-2], [wavelengths[-1]] * 4))
+        collocation = BSpline.design_matrix(wavelengths, knots, 3)
+        evaluation = BSpline.design_matrix(corrected_wavelengths, knots, 3)
+
+        return sparse.csr_matrix(evaluation), splu(sparse.csc_matrix(collocation))
+
+#-----------------------------------------------------------------------------
+# Weights for converting many spectra at once to the XYZ color space
+#-----------------------------------------------------------------------------
+class tristimulus_weights():
+    """Calculate the XYZ coordinates of many spectra (with 1 nm intervals) with a single matrix product.
+
+    The integration of colour.sd_to_XYZ() (ASTM E308 practice, on 1 nm intervals) is a weighted sum
+    of the spectrum values, with the weights given by the color matching functions and the illuminant:
+        XYZ = k * sum(spectrum * cmfs * illuminant)     (with k = 100 / sum(y_bar * illuminant))
+    So the weights only need to be calculated once, and then the XYZ coordinates of a stack of
+    spectra (shape: spectra × wavelengths) are just:
+        XYZ = spectra @ weights.T
+
+    Usage:
+        XYZ = tristimulus_weights.XYZ(wavelengths, intensities, cmfs, illuminant)
+    
+    The wavelengths must be integers with 1 nm intervals (as the output of SpectralDistribution.interpolate).
+    The spectra are taken as constant beyond their edges, like colour.sd_to_XYZ() does.
+    """
+
+    # Weights already calculated: {(cmfs name, illuminant name, first wavelength, amount of wavelengths): weights}
+    cache = OrderedDict()
+
+    # Maximum amount of weight matrices kept on the cache (the least recently used are removed first)
+    max_cache = 64
+
+    @classmethod
+    def get_weights(cls, cmfs, illuminant):
+        """Returns a tuple (wavelengths, weights) with the weights on the wavelengths of the ASTM E308 practice
+        (360 to 780 nm, 1 nm intervals). The weights array has the shape (3, wavelengths): one row for each of X, Y and Z.
+        """
+
+        key = (cmfs.name, illuminant.name)
+        if key in cls.cache:
+            cls.cache.move_to_end(key)
+            return cls.cache[key]
+        
+        # Same alignment that colour.sd_to_XYZ() makes before the integration
+        cmfs = cmfs.copy().trim(colour.colorimetry.SPECTRAL_SHAPE_ASTME308)
+        illuminant = illuminant.copy().align(cmfs.shape)
+
+        illuminant_cmfs = cmfs.values.T * illuminant.values
+        k = 100 / np.sum(illuminant_cmfs[1])
+        weights = (cmfs.wavelengths, k * illuminant_cmfs)
+
+        cls.store(key, weights)
+        return weights
+    
+    @classmethod
+    def get_grid_weights(cls, wavelengths, cmfs, illuminant):
+        """Returns the weights for spectra on the given wavelengths (integers with 1 nm intervals),
+        as an array of shape (3, wavelengths).
+
+        The weights of the wavelengths that the spectra do not reach are added to the first or
+        last wavelength of the spectra (because the spectra are taken as constant beyond their edges),
+        and the wavelengths beyond 360 to 780 nm get zero.
+        """
+
+        key = (cmfs.name, illuminant.name, wavelengths[0], len(wavelengths))
+        if key in cls.cache:
+            cls.cache.move_to_end(key)
+            return cls.cache[key]
+        
+        base_wavelengths, base_weights = cls.get_weights(cmfs, illuminant)
+        index = np.clip(base_wavelengths - wavelengths[0], 0, len(wavelengths) - 1).astype(int)
+        grid_weights = np.zeros((len(wavelengths), 3))
+        np.add.at(grid_weights, index, base_weights.T)
+        grid_weights = np.ascontiguousarray(grid_weights.T)
+
+        cls.store(key, grid_weights)
+        return grid_weights
+    
+    @classmethod
+    def store(cls, key, weights):
+        """Add the weights to the cache, and remove the least recently used ones if the cache is full.
+        """
+        cls.cache[key] = weights
+        while len(cls.cache) > cls.max_cache:
+            cls.cache.popitem(last=False)
+    
+    @classmethod
+    def XYZ(cls, wavelengths, intensities, cmfs, illuminant):
+        """Convert spectra to points in the XYZ color space.
+        The intensities can be a single spectrum, or an array of shape (spectra, wavelengths).
+        Returns an array with the same shape as the intensities, but with the wavelengths replaced by (X, Y, Z).
+        """
+        return intensities @ cls.get_grid_weights(wavelengths, cmfs, illuminant).T
+
+#-----------------------------------------------------------------------------
+# Quantities derived from the color coordinates of many spectra at once
+#-----------------------------------------------------------------------------
+class color_metrics():
+    """Calculate, for many xy coordinates at once, the correlated color temperature (CCT), the distance
+    from the Planckian locus (Duv), the dominant and complementary wavelengths, and the excitation purity.
+
+    The same as colour.uv_to_CCT_Ohno2013(), colour.dominant_wavelength(), colour.complementary_wavelength()
+    and colour.excitation_purity(), but all points are processed with array operations. The Planckian locus
+    and the spectral locus are only calculated once for each color matching function, then kept on the class.
+
+    Usage:
+        metrics = color_metrics.calculate(xy, cmfs, illuminant)
+    Returns a dictionary of arrays: {"CCT", "Duv", "dominant_wavelength", "complementary_wavelength", "purity"}
+
+    The wavelengths are interpolated between the points of the spectral locus (1 nm intervals), and, like
+    on colour, a negative dominant wavelength means a purple color (the value is its complementary wavelength).
+    The white point is the color of the illuminant.
+    """
+
+    # Temperatures on the table of the Planckian locus (Kelvin), on a geometric progression
+    planck_start = 1000.0
+    planck_end = 100000.0
+    planck_step = 1.0025    # Ratio between consecutive temperatures
+
+    # Second radiation constant of Planck's law (m·K), as on colour.planck_law()
+    planck_c2 = 1.4388e-2
+
+    # The CCT is not given for colors farther than this from the Planckian locus (CIE 015:2018)
+    max_Duv = 0.05
+
+    # Loci already calculated: {cmfs name: (temperatures, u, v, tree)} and {cmfs name: (wavelengths, xy)}
+    planckian_loci = {}
+    spectral_loci = {}
+
+    @classmethod
+    def calculate(cls, xy, cmfs, illuminant):
+        """Returns a dictionary with the metrics of the given xy coordinates (array of shape (points, 2)).
+        """
+        xy = np.reshape(xy, (-1, 2))
+        CCT, Duv = cls.xy_to_CCT(xy, cmfs)
+        dominant, complementary, purity = cls.dominant_wavelength(xy, cls.white_point(cmfs, illuminant), cmfs)
+        return {
+            "CCT": CCT,
+            "Duv": Duv,
+            "dominant_wavelength": dominant,
+            "complementary_wavelength": complementary,
+            "purity": purity,
+        }
+    
+    @staticmethod
+    def xy_to_uv(xy):
+        """Convert xy coordinates to the CIE 1960 UCS uv coordinates.
+        """
+        x, y = xy[..., 0], xy[..., 1]
+        denominator = -2.0 * x + 12.0 * y + 3.0
+        return np.stack((4.0 * x / denominator, 6.0 * y / denominator), axis=-1)
+    
+    @classmethod
+    def white_point(cls, cmfs, illuminant):
+        """xy coordinates of the illuminant (the color of a perfect white reflector under it).
+        """
+        white_XYZ = tristimulus_weights.get_weights(cmfs, illuminant)[1].sum(axis=1)
+        return white_XYZ[:2] / white_XYZ.sum()
+    
+    @classmethod
+    def get_planckian_locus(cls, cmfs):
+        """Returns a tuple (temperatures, u, v, tree) with the Planckian locus for the color matching functions,
+        and a k-d tree of its uv coordinates (for finding the closest points on the locus).
+        """
+        if cmfs.name in cls.planckian_loci:
+            return cls.planckian_loci[cmfs.name]
+        
+        count = int(np.ceil(np.log(cls.planck_end / cls.planck_start) / np.log(cls.planck_step))) + 1
+        temperatures = cls.planck_start * cls.planck_step ** np.arange(count)
+        
+        # Spectral radiance of the blackbodies (the constant factors cancel on the chromaticity)
+        cmfs = cmfs.copy().trim(colour.colorimetry.SPECTRAL_SHAPE_ASTME308)
+        wavelengths = cmfs.wavelengths * 1e-9
+        radiance = wavelengths ** -5 / np.expm1(cls.planck_c2 / np.outer(temperatures, wavelengths))
+        
+        XYZ = radiance @ cmfs.values
+        u, v = cls.xy_to_uv(XYZ[:, :2] / XYZ.sum(axis=1, keepdims=True)).T
+        cls.planckian_loci[cmfs.name] = (temperatures, u, v, cKDTree(np.column_stack((u, v))))
+        return cls.planckian_loci[cmfs.name]
+    
+    @classmethod
+    def xy_to_CCT(cls, xy, cmfs):
+        """Returns a tuple of arrays (CCT, Duv) for the xy coordinates (Ohno, 2013).
+        The CCT is NaN outside of the table of temperatures, or when |Duv| is greater than .max_Duv
+        """
+        """NOTE
+        The closest point of the Planckian table is searched for all coordinates at once (k-d tree). Then the
+        "triangular" solution is used close to the locus, and the "parabolic" solution farther from it
+        (|Duv| >= 0.002), as recommended by Ohno. With the table on 0.25% steps, the error is below 1 K.
+        """
+        temperatures, u_table, v_table, tree = cls.get_planckian_locus(cmfs)
+        uv = cls.xy_to_uv(xy)
+        u, v = uv[:, 0:1], uv[:, 1:2]
+        
+        # The closest point on the table and its neighbours
+        closest = tree.query(uv)[1]
+        m = np.clip(closest, 1, len(temperatures) - 2)
+        neighbours = np.stack((m - 1, m, m + 1), axis=1)
+        T = temperatures[neighbours]
+        d = np.hypot(u - u_table[neighbours], v - v_table[neighbours])
+        
+        # Triangular solution
+        l = np.hypot(u_table[m + 1] - u_table[m - 1], v_table[m + 1] - v_table[m - 1])
+        x = (d[:, 0] ** 2 - d[:, 2] ** 2 + l ** 2) / (2.0 * l)
+        CCT = T[:, 0] + (T[:, 2] - T[:, 0]) * x / l
+        v_x = v_table[m - 1] + (v_table[m + 1] - v_table[m - 1]) * x / l
+        Duv = np.sqrt(np.clip(d[:, 0] ** 2 - x ** 2, 0.0, None)) * np.sign(uv[:, 1] - v_x)
+        
+        # Parabolic solution
+        X = (T[:, 2] - T[:, 1]) * (T[:, 0] - T[:, 2]) * (T[:, 1] - T[:, 0])
+        a = (T[:, 0] * (d[:, 2] - d[:, 1]) + T[:, 1] * (d[:, 0] - d[:, 2]) + T[:, 2] * (d[:, 1] - d[:, 0])) / X
+        b = -(T[:, 0] ** 2 * (d[:, 2] - d[:, 1]) + T[:, 1] ** 2 * (d[:, 0] - d[:, 2]) + T[:, 2] ** 2 * (d[:, 1] - d[:, 0])) / X
+        c = -(
+            d[:, 0] * (T[:, 2] - T[:, 1]) * T[:, 1] * T[:, 2]
+            + d[:, 1] * (T[:, 0] - T[:, 2]) * T[:, 0] * T[:, 2]
+            + d[:, 2] * (T[:, 1] - T[:, 0]) * T[:, 0] * T[:, 1]
+        ) / X
+        CCT_parabolic = -b / (2.0 * a)
+        Duv_parabolic = (a * CCT_parabolic ** 2 + b * CCT_parabolic + c) * np.sign(Duv)
+        
+        parabolic = np.abs(Duv) >= 0.002
+        CCT = np.where(parabolic, CCT_parabolic, CCT)
+        Duv = np.where(parabolic, Duv_parabolic, Duv)
+        
+        # Coordinates that are not close to the locus, or beyond the ends of the table
+        CCT[(closest != m) | (np.abs(Duv) > cls.max_Duv)] = np.nan
+        return CCT, Duv
+    
+    @classmethod
+    def get_spectral_locus(cls, cmfs):
+        """Returns a tuple of arrays (wavelengths, xy) with the spectral locus for the color matching functions.
+        """
+        if cmfs.name not in cls.spectral_loci:
+            cmfs_trimmed = cmfs.copy().trim(colour.colorimetry.SPECTRAL_SHAPE_ASTME308)
+            XYZ = cmfs_trimmed.values
+            cls.spectral_loci[cmfs.name] = (cmfs_trimmed.wavelengths, XYZ[:, :2] / XYZ.sum(axis=1, keepdims=True))
+        return cls.spectral_loci[cmfs.name]
+    
+    @classmethod
+    def locus_intersection(cls, white, direction, cmfs):
+        """Intersect the rays that start on the white point and go on 'direction' (array of shape (points, 2))
+        with the closed spectral locus (the line of purples included).
+        Returns a tuple of arrays (wavelength, xy, purple): the wavelength of the intersection (NaN on
+        the line of purples), its coordinates, and whether it is on the line of purples.
+        """
+        """NOTE
+        Seen from the white point, the angle always turns in the same direction when going along the locus
+        (from 360 to 780 nm, then back through the line of purples). So the edge of the locus that each ray
+        crosses is found with a binary search on the angles of the locus points, instead of intersecting the
+        rays with all edges. The tail of the red end (which goes back and forth on the same coordinates) is
+        made monotonic, so those tiny edges are skipped.
+        """
+        wavelengths, locus = cls.get_spectral_locus(cmfs)
+        count = len(locus)
+
+        # Angles of the locus points around the white point (clockwise), and the angle after a full turn
+        angles = np.unwrap(-np.arctan2(locus[:, 1] - white[1], locus[:, 0] - white[0]))
+        angles = np.append(np.maximum.accumulate(angles), angles[0] + 2.0 * np.pi)
+
+        # Edge crossed by each ray (the last edge is the line of purples, from 780 nm back to 360 nm)
+        ray_angles = -np.arctan2(direction[:, 1], direction[:, 0])
+        ray_angles = angles[0] + np.mod(ray_angles - angles[0], 2.0 * np.pi)
+        edge = np.clip(np.searchsorted(angles, ray_angles, side="right") - 1, 0, count - 1)
+        start = locus[edge]
+        end = locus[(edge + 1) % count]
+
+        # Solve: white + t * direction = start + s * (end - start)
+        offset = start - white
+        side = end - start
+        with np.errstate(divide="ignore", invalid="ignore"):
+            denominator = direction[:, 0] * side[:, 1] - direction[:, 1] * side[:, 0]
+            t = (offset[:, 0] * side[:, 1] - offset[:, 1] * side[:, 0]) / denominator
+            s = np.clip((offset[:, 0] * direction[:, 1] - offset[:, 1] * direction[:, 0]) / denominator, 0.0, 1.0)
+        
+        xy = white + t[:, np.newaxis] * direction
+        purple = edge == count - 1
+        wavelength = wavelengths[edge] + s * (wavelengths[(edge + 1) % count] - wavelengths[edge])
+        wavelength[purple] = np.nan
+        return wavelength, xy, purple
+    
+    @classmethod
+    def dominant_wavelength(cls, xy, white, cmfs):
+        """Returns a tuple of arrays (dominant wavelength, complementary wavelength, excitation purity)
+        for the xy coordinates, with the given white point.
+        """
+        direction = xy - white
+        dominant, dominant_xy, dominant_purple = cls.locus_intersection(white, direction, cmfs)
+        complementary, _, complementary_purple = cls.locus_intersection(white, -direction, cmfs)
+        
+        # Purple colors: the dominant wavelength is the negative complementary wavelength, and vice-versa
+        dominant = np.where(dominant_purple, -complementary, dominant)
+        complementary = np.where(complementary_purple, -dominant, complementary)
+        
+        # Excitation purity: distance to the white point relative to the distance from the locus to the white point
+        with np.errstate(divide="ignore", invalid="ignore"):
+            purity = np.hypot(*direction.T) / np.hypot(*(dominant_xy - white).T)
+        return dominant, complementary, purity
+
+#-----------------------------------------------------------------------------
+# Processing of the spectra before the calculation of the color coordinates
+#-----------------------------------------------------------------------------
+class processing_pipeline():
+    """Ordered processing stages applied to a spectrum before its color coordinates are calculated
+    (cropping the wavelengths, subtracting a baseline, masking a region, smoothing and scaling).
+
+    The pipeline keeps the arrays of the spectrum as they were imported, and the arrays after each stage.
+    When the stages change, only the stages from the first one that changed are calculated again:
+        pipeline = processing_pipeline(wavelengths, intensities)
+        pipeline.set_stages([("crop", {"start": 400, "end": 700}), ("smooth", {"window": 11})])
+        processing_pipeline.run([pipeline, ...])    # Pipelines on the same point are run together
+        wavelengths, intensities = pipeline.output
+    
+    Stages and their parameters:
+        "crop"      start, end (nm): keep only the points between those wavelengths
+        "baseline"  degree (default 0), regions (list of (start, end) in nm, by default 5% of the points on each end):
+                    subtract a polynomial fitted to the points on the regions
+        "mask"      start, end (nm): remove the points between those wavelengths (the gap is interpolated)
+        "smooth"    window (default 11 points), order (default 2): Savitzky-Golay filter
+        "scale"     factor (default 1), normalize (None, "max" or "area")
+    """
+
+    # Method that applies each stage
+    stage_methods = {
+        "crop": "crop",
+        "baseline": "subtract_baseline",
+        "mask": "mask",
+        "smooth": "smooth",
+        "scale": "scale",
+    }
+
+    def __init__(self, wavelengths, intensities):
+        self.raw = (wavelengths, intensities)   # Arrays of the spectrum as they were imported
+        self.stages = []                        # Stages in the order they are applied: [(name, {parameter: value}), ...]
+        self.results = []                       # Arrays (wavelengths, intensities) after each stage that was already run
+    
+    @property
+    def output(self):
+        """Arrays (wavelengths, intensities) after all stages (None if some stages were not run yet)"""
+        if len(self.results) < len(self.stages):
+            return None
+        return self.results[-1] if self.results else self.raw
+    
+    def set_stages(self, stages):
+        """Replace the stages by a list of (name, {parameter: value}).
+        The results of the stages before the first one that changed are kept.
+        """
+        stages = [(name, dict(parameters)) for name, parameters in stages]
+        for name, parameters in stages:
+            if name not in self.stage_methods:
+                raise ValueError(f"Unknown processing stage: {name}")
+        
+        unchanged = 0
+        for old_stage, new_stage in zip(self.stages, stages):
+            if old_stage != new_stage:
+                break
+            unchanged += 1
+        
+        self.stages = stages
+        del self.results[unchanged:]
+    
+    @classmethod
+    def run(cls, pipelines):
+        """Run the stages that were not run yet on each pipeline.
+        The pipelines that stopped on the same point, with the same remaining stages and the same wavelengths,
+        are stacked and run together (each stage processes all their spectra at once).
+        """
+
+        # Group the pipelines
+        pipeline_groups = {}
+        for pipeline in pipelines:
+            done = len(pipeline.results)
+            if done >= len(pipeline.stages):
+                continue
+            wavelengths = pipeline.results[-1][0] if done else pipeline.raw[0]
+            key = (done, repr(pipeline.stages[done:]), interpolation_operator.get_key(wavelengths))
+            pipeline_groups.setdefault(key, []).append(pipeline)
+        
+        # Run the remaining stages of each group
+        for pipeline_group in pipeline_groups.values():
+            done = len(pipeline_group[0].results)
+            inputs = [pipeline.results[-1] if done else pipeline.raw for pipeline in pipeline_group]
+            wavelengths = inputs[0][0]
+            intensities = np.stack([intensities for _, intensities in inputs]).astype(np.float64)
+
+            for name, parameters in pipeline_group[0].stages[done:]:
+                wavelengths, intensities = getattr(cls, cls.stage_methods[name])(wavelengths, intensities, **parameters)
+                for n, pipeline in enumerate(pipeline_group):
+                    pipeline.results.append((wavelengths, intensities[n]))
+    
+    """NOTE
+    Each stage takes the wavelengths and a stack of intensities (spectra × wavelengths),
+    and returns the new (wavelengths, intensities).
+    """
+
+    @staticmethod
+    def crop(wavelengths, intensities, start = None, end = None):
+        keep = np.ones(len(wavelengths), dtype=bool)
+        if start is not None:
+            keep &= wavelengths >= start
+        if end is not None:
+            keep &= wavelengths <= end
+        return wavelengths[keep], intensities[:, keep]
+    
+    @staticmethod
+    def mask(wavelengths, intensities, start, end):
+        keep = (wavelengths < start) | (wavelengths > end)
+        return wavelengths[keep], intensities[:, keep]
+    
+    @staticmethod
+    def subtract_baseline(wavelengths, intensities, degree = 0, regions = None):
+        # Points used for fitting the baseline
+        if regions:
+            selected = np.zeros(len(wavelengths), dtype=bool)
+            for start, end in regions:
+                selected |= (wavelengths >= start) & (wavelengths <= end)
+        else:
+            count = max(degree + 1, int(np.ceil(0.05 * len(wavelengths))))
+            selected = np.zeros(len(wavelengths), dtype=bool)
+            selected[:count] = True
+            selected[-count:] = True
+        
+        if np.count_nonzero(selected) <= degree:
+            raise ValueError("Not enough points on the regions to fit the baseline.")
+        
+        # Least squares fit of all spectra at once (on centered and scaled wavelengths, for a well conditioned fit)
+        position = (wavelengths - wavelengths.mean()) / max(np.ptp(wavelengths), 1.0)
+        coefficients = np.linalg.lstsq(np.vander(position[selected], degree + 1), intensities[:, selected].T, rcond=None)[0]
+        baseline = np.vander(position, degree + 1) @ coefficients
+        return wavelengths, intensities - baseline.T
+    
+    @staticmethod
+    def smooth(wavelengths, intensities, window = 11, order = 2):
+        # The window must be odd, greater than the order, and not longer than the spectrum
+        window = min(int(window), len(wavelengths))
+        window -= 1 - window % 2
+        if window <= order:
+            return wavelengths, intensities
+        return wavelengths, savgol_filter(intensities, window, order, axis=-1)
+    
+    @staticmethod
+    def scale(wavelengths, intensities, factor = 1.0, normalize = None):
+        if normalize == "max":
+            intensities = intensities / np.max(intensities, axis=1, keepdims=True)
+        elif normalize == "area":
+            intensities = intensities / np.trapz(intensities, wavelengths, axis=1)[:, np.newaxis]
+        elif normalize is not None:
+            raise ValueError(f"Unknown normalization: {normalize}")
+        return wavelengths, intensities * factor
+
+#-----------------------------------------------------------------------------
+# Compact storage of the intensities of many spectra
+#-----------------------------------------------------------------------------
+class spectrum_storage():
+    """Keep the intensities of many spectra as float32 values on a single contiguous array, within a memory budget.
+    When the spectra on memory exceed the budget, the least recently used ones are moved to a temporary
+    memory-mapped file, and they come back to memory when they are used again.
+
+    Usage:
+        storage = spectrum_storage(memory_budget = 256 * 2**20)    # Budget in bytes
+        stored = storage.store(intensities)     # Returns a stored_intensities object
+        np.asarray(stored)                      # The intensities, as a float64 array
+    
+    The stored_intensities objects work as arrays on numpy functions, so they can replace the arrays of
+    the spectra (see spectrum_to_cie.compact()). The values are converted back to float64 when they are
+    used, so the color coordinates are still calculated in double precision.
+    """
+
+    def __init__(self, memory_budget = 256 * 2**20):
+        self.memory_budget = memory_budget          # Maximum size (in bytes) of the values kept on memory
+        self.memory = np.empty(0, dtype=np.float32) # Values of the spectra on memory
+        self.memory_end = 0                         # Position after the last value written to the memory array
+        self.memory_values = 0                      # Amount of values of the spectra on memory
+        self.disk = np.empty(0, dtype=np.float32)   # Values of the spectra moved to the disk (memory-mapped file)
+        self.disk_file = None                       # Temporary file of the disk array (created on the first time it is needed)
+        self.disk_end = 0                           # Position after the last value written to the disk array
+        self.disk_values = 0                        # Amount of values of the spectra on the disk
+        self.slots = {}                             # Position of each spectrum: {key: [on disk, offset, length]}
+        self.recent = OrderedDict()                 # Keys of the spectra on memory (least recently used first)
+        self.next_key = 0                           # Key of the next stored spectrum
+        self.shared_wavelengths = {}                # Wavelengths shared by the spectra: {interpolation_operator key: array}
+        """NOTE
+        Removed spectra (and the ones moved between the memory and the disk) leave gaps on the arrays.
+        The gaps are only removed when an array is full, by moving the values of the remaining spectra
+        to the beginning of the array (the array only grows if that is not enough).
+        """
+    
+    @property
+    def memory_size(self):
+        """Size (in bytes) of the values of the spectra on memory"""
+        return self.memory_values * self.memory.itemsize
+    
+    def store(self, intensities):
+        """Store the intensities of a spectrum (as float32). Returns a stored_intensities object.
+        """
+        values = np.ravel(np.asarray(intensities, dtype=np.float32))
+        key = self.next_key
+        self.next_key += 1
+
+        offset = self.allocate(False, len(values))
+        self.memory[offset:offset + len(values)] = values
+        self.slots[key] = [False, offset, len(values)]
+        self.recent[key] = None
+        self.memory_values += len(values)
+        self.enforce_budget(key)
+
+        return stored_intensities(self, key, len(values))
+    
+    def load(self, key):
+        """Returns the intensities of a stored spectrum, as a float64 array.
+        The spectrum becomes the most recently used one (and it is moved back to memory, if it was on the disk).
+        """
+        on_disk, offset, length = self.slots[key]
+
+        if not on_disk:
+            self.recent.move_to_end(key)
+            return self.memory[offset:offset + length].astype(np.float64)
+        
+        # Move the spectrum from the disk to the memory
+        values = np.array(self.disk[offset:offset + length])
+        self.disk_values -= length
+        offset = self.allocate(False, length)
+        self.memory[offset:offset + length] = values
+        self.slots[key] = [False, offset, length]
+        self.recent[key] = None
+        self.memory_values += length
+        self.enforce_budget(key)
+
+        return values.astype(np.float64)
+    
+    def free(self, key):
+        """Remove a spectrum from the storage (its space is reused later).
+        """
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        on_disk, offset, length = slot
+        if on_disk:
+            self.disk_values -= length
+        else:
+            self.memory_values -= length
+            self.recent.pop(key, None)
+    
+    def share_wavelengths(self, wavelengths):
+        """Returns an array with the same wavelengths, shared by all stored spectra that have them.
+        """
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        return self.shared_wavelengths.setdefault(interpolation_operator.get_key(wavelengths), wavelengths)
+    
+    def enforce_budget(self, keep):
+        """Move the least recently used spectra to the disk, until the memory is within the budget
+        (the spectrum of the key 'keep' is not moved).
+        """
+        while (self.memory_size > self.memory_budget) and (len(self.recent) > 1):
+            key = next(iter(self.recent))
+            if key == keep:
+                self.recent.move_to_end(key)
+                continue
+            
+            _, offset, length = self.slots[key]
+            values = self.memory[offset:offset + length].copy()
+            del self.recent[key]
+            self.memory_values -= length
+
+            disk_offset = self.allocate(True, length)
+            self.disk[disk_offset:disk_offset + length] = values
+            self.slots[key] = [True, disk_offset, length]
+            self.disk_values += length
+    
+    def allocate(self, on_disk, length):
+        """Returns the position for writing 'length' values at the end of the memory or disk array,
+        after removing the gaps or growing the array if there is not enough space.
+        """
+        array, end, used = (self.disk, self.disk_end, self.disk_values) if on_disk else (self.memory, self.memory_end, self.memory_values)
+        
+        if end + length > len(array):
+            # Remove the gaps, and grow the array if it would still be more than half full
+            capacity = len(array)
+            if used + length > capacity // 2:
+                capacity = max(2 * capacity, 2 * (used + length), 1024)
+            
+            if on_disk:
+                array = self.resize_disk(capacity)
+            else:
+                array = np.empty(capacity, dtype=np.float32)
+            
+            # Move the values of the spectra to the beginning of the array (in the order they were)
+            end = 0
+            tier = sorted((slot[1], key) for key, slot in self.slots.items() if slot[0] == on_disk)
+            source = self.disk if on_disk else self.memory
+            for offset, key in tier:
+                slot_length = self.slots[key][2]
+                array[end:end + slot_length] = source[offset:offset + slot_length].copy()
+                self.slots[key][1] = end
+                end += slot_length
+            
+            if on_disk:
+                self.disk = array
+            else:
+                self.memory = array
+        
+        # Reserve the space
+        if on_disk:
+            self.disk_end = end + length
+        else:
+            self.memory_end = end + length
+        return end
+    
+    def resize_disk(self, capacity):
+        """Make the disk array have at least the given capacity, and return it.
+        """
+        if self.disk_file is None:
+            self.disk_file = tempfile.TemporaryFile(prefix="spec2cie_")
+        
+        capacity = max(capacity, len(self.disk))
+        if capacity > len(self.disk):
+            self.disk_file.truncate(capacity * np.dtype(np.float32).itemsize)
+            self.disk = np.memmap(self.disk_file, dtype=np.float32, mode="r+", shape=(capacity,))
+        return self.disk
+
+
+class stored_intensities():
+    """Intensities of a spectrum on a spectrum_storage.
+    Numpy functions take it as a float64 array (the values are read from the storage when used).
+    """
+    __slots__ = ("storage", "key", "length", "__weakref__")
+
+    def __init__(self, storage, key, length):
+        self.storage = storage
+        self.key = key
+        self.length = length
+
+        # Free the space on the storage when the object is deleted
+        weakref.finalize(self, storage.free, key)
+    
+    def __array__(self, dtype = None):
+        values = self.storage.load(self.key)
+        return values if dtype is None else values.astype(dtype, copy=False)
+    
+    def __len__(self):
+        return self.length
+
+#-----------------------------------------------------------------------------
+# Cache on disk of the results from the spectrum_to_cie() class
+#-----------------------------------------------------------------------------
+class spectrum_cache():
+    """Store on disk the parsed spectra and their color coordinates, so the files do not need
+    to be parsed and calculated again when they are imported another time.
+
+    Each entry is a .npy file, named after the hash of the spectrum file contents together with
+    the calculation settings. So a file that was changed, or that is calculated with other
+    settings, gets a new entry instead of the old results.
+
+    When the entries take more than 'max_size' bytes, the least recently used ones are deleted.
+    (the modification time of an entry is updated every time it is read)
+
+    By default, the entries are stored on the user's cache directory (see cache_folder).
+    """
+
+    # Format version of the entries (changing it makes the older entries to be ignored)
+    version = 1
+
+    # Arrays stored on each entry (in this order)
+    fields = ("wavelengths", "intensities", "corrected_wavelengths", "corrected_intensities", "XYZ", "xy", "RGB")
+    """NOTE
+    Each entry is a single float64 array: first the size of each field, then the
+    contents of the fields one after another. Reading one array is several times faster
+    than reading a .npz file with one array per field, and the fields are just views of
+    the array that was read.
+    """
+
+    def __init__(self, cache_dir = cache_folder, max_size = 256 * 1024**2):
+        self.cache_dir = Path(cache_dir)    # Folder where the entries are stored
+        self.max_size = max_size            # Maximum size of all entries together (in bytes)
+        self.size = 0                       # Current size of all entries together (in bytes)
+        self.enabled = True                 # If the cache folder could be used
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".npy"):
+                    self.size += entry.stat().st_size
+        except OSError:
+            print(f"Error: Could not use the cache folder - {self.cache_dir}")
+            self.enabled = False
+    
+    def get_key(self, file_path, settings):
+        """Returns the hash (hexadecimal string) of the file contents and the calculation settings.
+        Returns None if the file could not be read.
+        """
+        if not self.enabled:
+            return None
+        
+        key_hash = hashlib.blake2b(f"{self.version}; {settings}".encode(), digest_size=20)
+        try:
+            with open(file_path, "rb") as spectrum_file:
+                chunk = spectrum_file.read(1024**2)
+                while chunk:
+                    key_hash.update(chunk)
+                    chunk = spectrum_file.read(1024**2)
+        except OSError:
+            return None
+        
+        return key_hash.hexdigest()
+    
+    def load(self, key):
+        """Returns the dictionary of arrays stored under the key, or None if there is no such entry.
+        (the fields stored as empty arrays are left out of the dictionary)
+        """
+        if key is None:
+            return None
+        
+        entry_path = self.cache_dir / f"{key}.npy"
+        try:
+            entry = np.load(entry_path)
+            os.utime(entry_path)    # Mark the entry as recently used
+
+            # Split the entry into its fields
+            field_count = len(self.fields)
+            field_sizes = entry[:field_count].astype(np.int64)
+            if (field_sizes.sum() + field_count) != len(entry):
+                raise ValueError("The size of the entry does not match its fields")
+            field_arrays = np.split(entry[field_count:], np.cumsum(field_sizes)[:-1])
+        
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError):
+            # Damaged entry: it is deleted, so it can be stored again
+            self.remove(entry_path)
+            return None
+        
+        return {field: array for field, array in zip(self.fields, field_arrays) if len(array) > 0}
+    
+    def store(self, key, color_data):
+        """Store a dictionary of arrays under the key (the fields missing from the dictionary are stored as empty arrays).
+        """
+        if key is None:
+            return False
+        
+        field_arrays = [np.ravel(color_data.get(field, ())) for field in self.fields]
+        entry = np.concatenate([[len(array) for array in field_arrays]] + field_arrays).astype(np.float64)
+
+        entry_path = self.cache_dir / f"{key}.npy"
+        temp_path = self.cache_dir / f"{key}.{os.getpid()}.tmp"
+        try:
+            # Write to a temporary file first, so an incomplete entry is never read
+            with open(temp_path, "wb") as entry_file:
+                np.save(entry_file, entry)
+            
+            # An entry with the same key is replaced, so its size is not counted twice
+            try:
+                old_size = entry_path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(temp_path, entry_path)
+            self.size += entry_path.stat().st_size - old_size
+        except OSError:
+            print(f"Error: Could not write to the cache folder - {self.cache_dir}")
+            self.remove(temp_path)
+            return False
+        
+        if self.size > self.max_size:
+            self.evict()
+        return True
+    
+    def evict(self):
+        """Delete the least recently used entries, until the cache fits on its maximum size.
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".npy")]
+            entries.sort(key = lambda entry: entry.stat().st_mtime)
+            self.size = sum(entry.stat().st_size for entry in entries)
+        except OSError:
+            return False
+        
+        for entry in entries:
+            if self.size <= self.max_size:
+                break
+            entry_size = entry.stat().st_size
+            if self.remove(entry.path):
+                self.size -= entry_size
+        return True
+    
+    def remove(self, entry_path):
+        """Delete a file from the cache folder. Returns whether it was deleted.
+        """
+        try:
+            os.remove(entry_path)
+            return True
+        except OSError:
+            return False
+
+#-----------------------------------------------------------------------------
+# Session file with the spectra of a spectrum_container
+#-----------------------------------------------------------------------------
+class spectrum_session():
+    """Save and open the spectra of a spectrum_container (and its series) on a single binary file, together
+    with their color coordinates, so the work can be reopened without importing and calculating the files again.
+    (usually called through spectrum_container.save_session() and spectrum_container.load_session())
+
+    Layout of the file:
+        magic line:     b"SPECTRACHROMA SESSION\\n"
+        manifest size:  8 bytes (little-endian unsigned integer)
+        manifest:       JSON with the version, the observer and illuminant, the settings of the window,
+                        the names, paths, fingerprints and processing stages of the spectra, and the
+                        position, type and shape of each array
+        arrays:         each one starting at a multiple of 64 bytes (after the manifest)
+    
+    The arrays of each spectrum (wavelengths, intensities, ...) are concatenated on a single array for each field,
+    with the length of the field on each spectrum. When the session is opened, the arrays are memory-mapped instead
+    of read: only the parts that are used (for example, to plot a spectral distribution) are read from the disk.
+    (except on Windows, where the file is read, so the session can be saved again over the file it was opened from)
+    """
+
+    # Format version of the file (files of other versions are not opened)
+    version = 1
+
+    # Start of the file
+    magic = b"SPECTRACHROMA SESSION\n"
+
+    # The arrays start at multiples of this size (in bytes)
+    alignment = 64
+
+    # Arrays of each spectrum (the interpolated arrays are only stored if they were already calculated,
+    # and the arrays before the processing only if the spectrum was processed)
+    fields = (
+        "wavelengths", "intensities",
+        "corrected_wavelengths", "corrected_intensities",
+        "source_wavelengths", "source_intensities",
+    )
+
+    # Quantities of color_metrics (in this order on the "metrics" array)
+    metrics = ("CCT", "Duv", "dominant_wavelength", "complementary_wavelength", "purity")
+
+    @classmethod
+    def save(cls, file_path, spectra, series = (), settings = None):
+        """Write a list of spectrum objects, and a list of spectrum_series, to a session file.
+        'settings' is a dictionary (that can be converted to JSON) stored with the spectra.
+        Returns whether the file was saved.
+        """
+        arrays = {}
+        manifest = {
+            "version": cls.version,
+            "observer": spectrum_to_cie.cmfs.name,
+            "illuminant": spectrum_to_cie.illuminant.name,
+            "settings": settings or {},
+            "spectra": cls.pack(spectra, arrays, "spectra/"),
+            "series": [
+                {"name": obj_series.name, **cls.pack(obj_series.spectra, arrays, f"series{n}/")}
+                for n, obj_series in enumerate(series)
+            ],
+        }
+
+        # Position of each array, counted from the start of the arrays
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = [offset, array.dtype.str, list(array.shape)]
+            offset += cls.aligned(array.nbytes)
+        manifest["arrays"] = layout
+        manifest_bytes = json.dumps(manifest).encode("utf-8")
+        header_size = len(cls.magic) + 8 + len(manifest_bytes)
+
+        # Write to a temporary file first, so an incomplete session never replaces a complete one
+        file_path = Path(file_path)
+        temp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as session_file:
+                session_file.write(cls.magic)
+                session_file.write(len(manifest_bytes).to_bytes(8, "little"))
+                session_file.write(manifest_bytes)
+                session_file.write(bytes(cls.aligned(header_size) - header_size))
+                for array in arrays.values():
+                    session_file.write(array.tobytes())
+                    session_file.write(bytes(cls.aligned(array.nbytes) - array.nbytes))
+            os.replace(temp_path, file_path)
+        except OSError:
+            print(f"Error: Could not write the session file - {file_path}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+        
+        return True
+    
+    @classmethod
+    def load(cls, file_path):
+        """Open a session file. Returns a dictionary with the list of spectrum objects ("spectra"),
+        the list of spectrum_series ("series"), the "observer" and "illuminant" of their coordinates,
+        and the "settings" stored with them. Returns None if the file could not be opened.
+        """
+        try:
+            with open(file_path, "rb") as session_file:
+                if session_file.read(len(cls.magic)) != cls.magic:
+                    raise ValueError("Not a session file")
+                manifest_size = int.from_bytes(session_file.read(8), "little")
+                manifest = json.loads(session_file.read(manifest_size).decode("utf-8"))
+            if manifest.get("version") != cls.version:
+                raise ValueError("Unsupported version of the session file")
+            
+            if sys.platform == "win32":
+                data = np.fromfile(file_path, dtype=np.uint8)
+            else:
+                data = np.memmap(file_path, dtype=np.uint8, mode="r").view(np.ndarray)
+            """NOTE
+            The arrays are still memory-mapped, but as plain numpy arrays: slicing the np.memmap
+            subclass for each spectrum takes longer than creating the spectrum objects.
+
+            Windows does not allow replacing a file while it is memory-mapped, and the arrays of the spectra
+            (and the caches that keep them, like the interpolation operators) would keep the mapping open for
+            as long as the spectra exist. Then saving the session over the file it was opened from would fail
+            with the file "in use" by this same program. So on Windows the file is read into memory instead.
+            """
+            data_start = cls.aligned(len(cls.magic) + 8 + manifest_size)
+
+            def get_array(name):
+                offset, dtype, shape = manifest["arrays"][name]
+                dtype = np.dtype(dtype)
+                start = data_start + offset
+                size = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+                if start + size > len(data):
+                    raise ValueError("The session file is incomplete")
+                return data[start:start + size].view(dtype).reshape(shape)
+            
+            spectra = cls.unpack(manifest["spectra"], get_array, "spectra/")
+            series = [
+                spectrum_series(cls.unpack(series_manifest, get_array, f"series{n}/"), name=series_manifest["name"])
+                for n, series_manifest in enumerate(manifest["series"])
+            ]
+        
+        except (OSError, ValueError, KeyError, TypeError):
+            print(f"Error: Could not open the session file - {file_path}")
+            return None
+        
+        return {
+            "spectra": spectra,
+            "series": series,
+            "observer": manifest["observer"],
+            "illuminant": manifest["illuminant"],
+            "settings": manifest["settings"],
+        }
+    
+    @classmethod
+    def aligned(cls, size):
+        """Size rounded up to a multiple of the alignment"""
+        return -(-size // cls.alignment) * cls.alignment
+    
+    @classmethod
+    def pack(cls, spectra, arrays, prefix):
+        """Add to the 'arrays' dictionary the arrays of a list of spectrum objects (with their names starting with 'prefix'),
+        and return the manifest of the spectra.
+        """
+        count = len(spectra)
+        arrays[prefix + "XYZ"] = np.array([obj_spectrum.XYZ for obj_spectrum in spectra], dtype=np.float64).reshape(count, 3)
+        arrays[prefix + "xy"] = np.array([obj_spectrum.xy for obj_spectrum in spectra], dtype=np.float64).reshape(count, 2)
+        arrays[prefix + "RGB"] = np.array([obj_spectrum.RGB for obj_spectrum in spectra], dtype=np.float64).reshape(count, 3)
+
+        # Metrics and uncertainty (NaN for the spectra that do not have them calculated)
+        metrics = np.full((count, len(cls.metrics)), np.nan)
+        xy_mean = np.full((count, 2), np.nan)
+        xy_covariance = np.full((count, 2, 2), np.nan)
+        for n, obj_spectrum in enumerate(spectra):
+            if obj_spectrum._metrics is not None:
+                metrics[n] = [obj_spectrum._metrics[name] for name in cls.metrics]
+            if obj_spectrum.xy_covariance is not None:
+                xy_mean[n], xy_covariance[n] = obj_spectrum.xy_mean, obj_spectrum.xy_covariance
+        arrays[prefix + "metrics"] = metrics
+        arrays[prefix + "xy_mean"] = xy_mean
+        arrays[prefix + "xy_covariance"] = xy_covariance
+
+        # Arrays of each spectrum, concatenated
+        # (the wavelengths shared by many spectra are stored once, with the index of the wavelengths of each spectrum)
+        for field in cls.fields:
+            parts = [np.ravel(np.asarray(cls.get_field(obj_spectrum, field), dtype=np.float64)) for obj_spectrum in spectra]
+            if field.endswith("wavelengths"):
+                unique_parts = {}
+                arrays[prefix + field + "_index"] = np.array(
+                    [unique_parts.setdefault(part.tobytes(), len(unique_parts)) for part in parts], dtype=np.int64
+                )
+                parts = [np.frombuffer(part_bytes) for part_bytes in unique_parts]
+            arrays[prefix + field] = np.concatenate(parts) if parts else np.empty(0)
+            arrays[prefix + field + "_length"] = np.array([len(part) for part in parts], dtype=np.int64)
+        
+        return {
+            "count": count,
+            "names": [obj_spectrum.file_name for obj_spectrum in spectra],
+            "paths": [str(obj_spectrum.file_path) for obj_spectrum in spectra],
+            "fingerprints": [obj_spectrum.fingerprint.hex() for obj_spectrum in spectra],
+            "metrics": [obj_spectrum._metrics is not None for obj_spectrum in spectra],
+            "stages": [obj_spectrum.pipeline.stages if obj_spectrum.pipeline else [] for obj_spectrum in spectra],
+        }
+    
+    @staticmethod
+    def get_field(obj_spectrum, field):
+        """Array of a spectrum object stored on the field (empty if the spectrum does not have it).
+        """
+        if field.startswith("source_"):
+            # Arrays before the processing (only for the spectra that were processed)
+            if (obj_spectrum.pipeline is None) or (len(obj_spectrum.pipeline.stages) == 0):
+                return ()
+            return obj_spectrum.pipeline.raw[0 if field == "source_wavelengths" else 1]
+        return obj_spectrum.color_data.get(field, ())
+    
+    @classmethod
+    def unpack(cls, manifest, get_array, prefix):
+        """Returns the list of spectrum objects of a manifest, with their arrays taken from the session file.
+        """
+        XYZ, xy, RGB = get_array(prefix + "XYZ"), get_array(prefix + "xy"), get_array(prefix + "RGB")
+        metrics = get_array(prefix + "metrics")
+        xy_mean, xy_covariance = get_array(prefix + "xy_mean"), get_array(prefix + "xy_covariance")
+
+        # Each field is split into the arrays of the spectra (as views of the memory-mapped file)
+        fields = {}
+        for field in cls.fields:
+            lengths = get_array(prefix + field + "_length")
+            fields[field] = np.split(get_array(prefix + field), np.cumsum(lengths)[:-1]) if len(lengths) else []
+            if field.endswith("wavelengths"):
+                fields[field] = [fields[field][index] for index in get_array(prefix + field + "_index")]
+        
+        spectra = []
+        for n in range(manifest["count"]):
+            color_data = {"XYZ": XYZ[n], "xy": xy[n], "RGB": RGB[n]}
+            for field in cls.fields[:4]:
+                if len(fields[field][n]) > 0:
+                    color_data[field] = fields[field][n]
+            
+            obj_spectrum = spectrum_to_cie(manifest["paths"][n], color_data=color_data, file_name=manifest["names"][n])
+            obj_spectrum._fingerprint = bytes.fromhex(manifest["fingerprints"][n])
+            if manifest["metrics"][n]:
+                obj_spectrum.metrics = {name: float(value) for name, value in zip(cls.metrics, metrics[n])}
+            if not np.isnan(xy_covariance[n]).any():
+                obj_spectrum.xy_mean, obj_spectrum.xy_covariance = xy_mean[n], xy_covariance[n]
+            if manifest["stages"][n]:
+                obj_spectrum.pipeline = processing_pipeline(fields["source_wavelengths"][n], fields["source_intensities"][n])
+                obj_spectrum.pipeline.set_stages(manifest["stages"][n])
+            spectra.append(obj_spectrum)
+        
+        return spectra
+
+
+#-----------------------------------------------------------------------------
+# Spatial index of the chromaticity coordinates
+#-----------------------------------------------------------------------------
+class xy_grid_index():
+    """Uniform grid over the xy coordinates, for finding quickly the points near a position or inside a region.
+    Each point is stored by an integer ID on the cell of the grid that contains it, and it can be inserted,
+    moved or deleted without rebuilding the index.
+
+    Usage:
+        index = xy_grid_index(cell_size = 0.01)
+        index.insert(spectrum_id, x, y)
+        index.nearest(x, y)                         # ID of the nearest point (or None)
+        index.within_radius(x, y, radius)           # Array of IDs
+        index.within_rectangle(x0, y0, x1, y1)
+        index.within_polygon([(x, y), ...])
+        index.within_ellipse(x, y, a, b, angle)     # Semi-axes 'a' and 'b', 'angle' in degrees (like the MacAdam ellipses)
+    """
+
+    def __init__(self, cell_size = 0.01):
+        self.cell_size = cell_size
+        self.cells = {}     # IDs on each cell of the grid: {(column, row): set of IDs}
+        self.points = {}    # Coordinates of each point: {ID: (x, y)}
+        """NOTE
+        The points of the diagram are within 0 and 0.9, so a cell size of 0.01 makes a grid of
+        at most 90 × 90 cells. The cells are only created when they have points.
+        """
+    
+    def __len__(self):
+        return len(self.points)
+    
+    def get_cell(self, x, y):
+        return (int(np.floor(x / self.cell_size)), int(np.floor(y / self.cell_size)))
+    
+    def insert(self, point_id, x, y):
+        """Add a point to the index (points with non-finite coordinates are not indexed).
+        """
+        if not (np.isfinite(x) and np.isfinite(y)):
+            return
+        self.points[point_id] = (float(x), float(y))
+        self.cells.setdefault(self.get_cell(x, y), set()).add(point_id)
+    
+    def delete(self, point_id):
+        """Remove a point from the index.
+        """
+        point = self.points.pop(point_id, None)
+        if point is None:
+            return
+        cell = self.get_cell(*point)
+        self.cells[cell].discard(point_id)
+        if not self.cells[cell]:
+            del self.cells[cell]
+    
+    def move(self, point_id, x, y):
+        """Change the coordinates of a point on the index.
+        """
+        self.delete(point_id)
+        self.insert(point_id, x, y)
+    
+    def clear(self):
+        self.cells.clear()
+        self.points.clear()
+    
+    def candidates(self, x0, y0, x1, y1):
+        """Returns the IDs and coordinates of the points on the cells that overlap a rectangle, as numpy arrays.
+        """
+        column_start, row_start = self.get_cell(min(x0, x1), min(y0, y1))
+        column_end, row_end = self.get_cell(max(x0, x1), max(y0, y1))
+
+        ids = []
+        if (column_end - column_start + 1) * (row_end - row_start + 1) > len(self.cells):
+            # The rectangle covers more cells than the ones that exist: check the existing cells instead
+            for (column, row), cell in self.cells.items():
+                if (column_start <= column <= column_end) and (row_start <= row <= row_end):
+                    ids.extend(cell)
+        else:
+            for column in range(column_start, column_end + 1):
+                for row in range(row_start, row_end + 1):
+                    ids.extend(self.cells.get((column, row), ()))
+        
+        ids = np.array(ids, dtype=np.int64)
+        xy = np.array([self.points[point_id] for point_id in ids.tolist()]).reshape(-1, 2)
+        return ids, xy
+    
+    def nearest(self, x, y, max_distance = np.inf):
+        """Returns the ID of the point nearest to (x, y), or None if there is no point within 'max_distance'.
+        """
+        if len(self.points) == 0:
+            return None
+        
+        # Search on squares around the position (doubling their size), until no point outside the square can be nearer
+        radius = self.cell_size
+        while True:
+            ids, xy = self.candidates(x - radius, y - radius, x + radius, y + radius)
+            if len(ids) > 0:
+                distances = np.hypot(xy[:, 0] - x, xy[:, 1] - y)
+                n = np.argmin(distances)
+                if (distances[n] <= radius) or (len(ids) == len(self.points)):
+                    return int(ids[n]) if distances[n] <= max_distance else None
+            if radius >= max_distance:
+                return None
+            radius *= 2
+    
+    def within_radius(self, x, y, radius):
+        """Returns the IDs of the points within a distance from (x, y).
+        """
+        ids, xy = self.candidates(x - radius, y - radius, x + radius, y + radius)
+        return ids[np.hypot(xy[:, 0] - x, xy[:, 1] - y) <= radius]
+    
+    def within_rectangle(self, x0, y0, x1, y1):
+        """Returns the IDs of the points inside a rectangle (given by two opposite corners).
+        """
+        ids, xy = self.candidates(x0, y0, x1, y1)
+        inside = (xy[:, 0] >= min(x0, x1)) & (xy[:, 0] <= max(x0, x1)) & (xy[:, 1] >= min(y0, y1)) & (xy[:, 1] <= max(y0, y1))
+        return ids[inside]
+    
+    def within_polygon(self, vertices):
+        """Returns the IDs of the points inside a polygon, given by a sequence of (x, y) vertices.
+        """
+        vertices = np.asarray(vertices, dtype=np.float64)
+        (x0, y0), (x1, y1) = vertices.min(axis=0), vertices.max(axis=0)
+        ids, xy = self.candidates(x0, y0, x1, y1)
+        if len(ids) == 0:
+            return ids
+        return ids[mpl_path.Path(vertices).contains_points(xy)]
+    
+    def within_ellipse(self, x, y, a, b, angle = 0.0):
+        """Returns the IDs of the points inside an ellipse centered on (x, y), with semi-axes 'a' and 'b',
+        and the axis 'a' rotated by 'angle' degrees from the x axis.
+        """
+        radius = max(a, b)
+        ids, xy = self.candidates(x - radius, y - radius, x + radius, y + radius)
+        theta = np.radians(angle)
+        dx, dy = xy[:, 0] - x, xy[:, 1] - y
+        u = dx * np.cos(theta) + dy * np.sin(theta)     # Coordinates along the axes of the ellipse
+        v = -dx * np.sin(theta) + dy * np.cos(theta)
+        return ids[(u / a)**2 + (v / b)**2 <= 1.0]
+
+
+#-----------------------------------------------------------------------------
+# Container to store the results from the spectrum_to_cie() class
+#-----------------------------------------------------------------------------
+class spectrum_record():
+    """Lightweight handle to a spectrum on a spectrum_container, by its ID (which does not change when other spectra are removed).
+    The coordinates, file name and path are read from the arrays of the container, and the other attributes
+    and methods are the ones of the spectrum object (spectrum_to_cie) on the container.
+    Two records are equal if they refer to the same spectrum, so they can be used as dictionary keys.
+    """
+    __slots__ = ("container", "id")
+
+    def __init__(self, container, spectrum_id):
+        object.__setattr__(self, "container", container)
+        object.__setattr__(self, "id", spectrum_id)
+    
+    @property
+    def row(self):
+        """Position of the spectrum on the arrays of the container"""
+        return self.container.rows[self.id]
+    
+    @property
+    def spectrum(self):
+        """The spectrum object (spectrum_to_cie) on the container"""
+        return self.container.spectra[self.row]
+
+    XYZ = property(lambda self: self.container._XYZ[self.row])
+    xy = property(lambda self: self.container._xy[self.row])
+    RGB = property(lambda self: self.container._RGB[self.row])
+    x = property(lambda self: float(self.container._xy[self.row, 0]))
+    y = property(lambda self: float(self.container._xy[self.row, 1]))
+    R = property(lambda self: float(self.container._RGB[self.row, 0]))
+    G = property(lambda self: float(self.container._RGB[self.row, 1]))
+    B = property(lambda self: float(self.container._RGB[self.row, 2]))
+    file_name = property(lambda self: self.container.names[self.row])
+    file_path = property(lambda self: self.container.paths[self.row])
+
+    def __getattr__(self, name):
+        return getattr(self.spectrum, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self.spectrum, name, value)
+    
+    def __eq__(self, other):
+        return isinstance(other, spectrum_record) and (self.container is other.container) and (self.id == other.id)
+    
+    def __hash__(self):
+        return hash((id(self.container), self.id))
+    
+    def __repr__(self):
+        return f"spectrum_record(id={self.id})"
+
+
+class spectrum_container():
+    """Store spectra and their color coordinates.
+
+    Instantiating the container:
+        spectrum = spectrum_container()
+    Optionally, the container can be bound to a specific Tk window, so it can generate events for that window:
+        spectrum = spectrum_container(tk_window = window)
+    And a spectrum_cache() can be provided, so files that were already imported before are not calculated again:
+        spectrum = spectrum_container(cache = spectrum_cache())
+    The amount of processes used for importing many files at once can be set (workers = 1 imports the files sequentially):
+        spectrum = spectrum_container(workers = 4)
+    And a spectrum_storage() can be provided, so the intensities are kept as float32 values on a shared array within a
+    memory budget (the least recently used spectra are moved to a temporary file on the disk):
+        spectrum = spectrum_container(storage = spectrum_storage(memory_budget = 512 * 2**20))
+    
+    New spectra can be added by calling the method .import_files:
+        spectrum.import_files()     # Opens a file dialog to the user (multiple files can be selected at once)
+    The spectra's color coordinates are calculated and stored on the container (in parallel, if there are many files).
+    A file can have several columns of intensities (sharing the first column of wavelengths),
+    in this case each column is added to the container as a separate spectrum.
+
+    Then the container can have each spectrum accessed by index (like a list):
+        [ spectrum[0], spectrum[1], spectrum[2], ...]
+    
+    Each spectrum[n] can have their color coordinates accessed by the attributes .xy or .RGB:
+        spectrum[n].xy      # A numpy array with its (x, y) CIE 1931 color coordiates
+        spectrum[n].RGB     # A numpy array with the approximate RGB values (R, G, B) - on the scale from 0 to 1
+    Those values can also be accessed individually (as floats):
+        spectrum[n].x , spectrum[n].y , spectrum[n].R , spectrum[n].G , spectrum[n].B
+    
+    Other attributes:
+        spectrum[n].XYZ         # Coordinates on the XYZ color space - array(X, Y, Z)
+        spectrum[n].file_path   # Absolute file system path to the spectrum file
+        spectrum[n].file_name   # Name of the file without the extension
+        spectrum[n].success     # If the file import has been successful  
+    
+    The coordinates of all spectra are kept on numpy arrays of the container (views of them, no copy is made):
+        spectrum.XYZ , spectrum.xy , spectrum.RGB , spectrum.ids
+    Each spectrum has an integer ID that does not change when other spectra are removed. The items of the container
+    are spectrum_record objects, that read their coordinates from those arrays (and pass the other attributes
+    to the spectrum object). A record can also be obtained from its ID:
+        spectrum.get(spectrum[n].id)
+    
+    The container can also be iterated on a for loop, like as:
+        for item in spectrum:
+            print(item.xy)  # Each individual item can have its attributes acessed, as listed above
+    
+    The amount of spectra on the container can be obtained with the len() function:
+        for n in range(len(spectrum)):
+            spectrum[n] ... # Do something with each spectrum
+    
+    A spectrum that is already on the container (same wavelengths and intensities, even if from another file) is not
+    added again when imported. Those spectra are listed on spectrum.duplicates after each import, together with the
+    spectrum of the container that has the same values.
+
+    A series of spectra (for example, taken during a heating ramp), whose colors are drawn as a path on the diagram,
+    can be imported with:
+        spectrum.import_series()    # The series are listed on spectrum.series (see spectrum_series)
+
+    The spectra can be processed (crop, baseline, mask, smooth and scale) without importing the files again:
+        spectrum.process([spectrum[0], spectrum[1]], [("crop", {"start": 400, "end": 700}), ("smooth", {})])
+
+    The spectra can be found by their position on the diagram (a grid index over the xy coordinates is kept):
+        spectrum.nearest(x, y) , spectrum.within_radius(x, y, radius) , spectrum.within_rectangle(x0, y0, x1, y1)
+        spectrum.within_polygon([(x, y), ...]) , spectrum.within_ellipse(x, y, a, b, angle)
+
+    The spectra and series of the container can be saved to a session file, and added again later
+    (without importing and calculating the files again, see spectrum_session):
+        spectrum.save_session(file_path, settings = {...})
+        settings = spectrum.load_session(file_path)
+
+    A spectrum can be removed from the container with:
+        spectrum.remove(spectrum[n])
+    Or many spectra at once (which returns the positions that changed, see .remove()):
+        spectrum.remove([spectrum[n], spectrum[m], ...])
+    
+    The spectral distributions (spectrum[n].spectrum_raw and spectrum[n].spectrum_corrected) are only created
+    when they are first accessed. Their memory can be freed again with:
+        spectrum.release()      # All spectra on the container
+        spectrum[n].release()   # A single spectrum
+    
+    The correlated color temperature, Duv, dominant and complementary wavelengths, and excitation purity are
+    calculated for all new spectra at once with:
+        spectrum.calculate_metrics()
+        spectrum[n].CCT , spectrum[n].Duv , spectrum[n].dominant_wavelength , spectrum[n].purity , ...
+    
+    The uncertainty of the xy coordinates, caused by the noise on the spectra, can be estimated by Monte Carlo:
+        spectrum.calculate_uncertainty(noise = "poisson", samples = 10000)
+        spectrum[n].xy_mean, spectrum[n].xy_covariance    # Mean and covariance matrix of the noisy xy coordinates
+    """
+
+    # Minimum amount of files for them to be imported in parallel
+    # (for fewer files, starting the processes and sending the results back is not worth it)
+    parallel_threshold = 8
+
+    def __init__(self, tk_window = None, cache = None, workers = None, storage = None):
+        # Spectrum objects, on the order they were added (one for each row of the arrays below)
+        self.spectra = []
+        # Arrays of the container: the ID and color coordinates of each spectrum (only the first self.count rows are used)
+        self.count = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)   # False for the rows of the removed spectra (until the arrays are compacted)
+        self.removed_count = 0                  # Amount of removed rows that are still on the arrays
+        self._XYZ = np.empty((0, 3))
+        self._xy = np.empty((0, 2))
+        self._RGB = np.empty((0, 3))
+        # File name and path of each spectrum
+        self.names = []
+        self.paths = []
+        # Row of each spectrum on the arrays, by its ID: {ID: row}
+        self.rows = {}
+        # Spatial index of the xy coordinates of the spectra (by their IDs)
+        self.index = xy_grid_index()
+        # ID of the next spectrum added to the container (IDs are never reused)
+        self.next_id = 0
+        # Index of the spectra on the container by their fingerprint: {fingerprint: ID}
+        self.fingerprints = {}
+        # Spectra of the last import that were already on the container: [(file name, spectrum_record already on the container)]
+        self.duplicates = []
+        # Optionally, bind the container to a Tk window
+        self.window = tk_window
+        # Optionally, store the results on a cache on the disk
+        self.cache = cache
+        # Amount of processes for importing the files in parallel (by default, one for each CPU core)
+        self.workers = workers or os.cpu_count() or 1
+        # Pool of processes (created on the first parallel import, then kept for the next imports)
+        self.pool = None
+        # Series of spectra drawn as paths on the diagram (spectrum_series objects)
+        self.series = []
+        # Optionally, keep the intensities of the spectra on a compact storage
+        self.storage = storage
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [spectrum_record(self, spectrum_id) for spectrum_id in self.ids[index]]
+        return spectrum_record(self, int(self.ids[index]))
+    
+    def __len__(self):
+        return self.count - self.removed_count
+    
+    def __iter__(self):
+        self.compact_rows()
+        self._index = 0
+        self._max_index = self.count
+        return self
+    
+    def __next__(self):
+        if self._index < self._max_index:
+            record = spectrum_record(self, int(self._ids[self._index]))
+            self._index += 1
+            return record
+        else:
+            raise StopIteration
+    
+    @property
+    def ids(self):
+        """IDs of the spectra on the container (a view of the array, no copy is made)"""
+        self.compact_rows()
+        return self._ids[:self.count]
+    
+    @property
+    def XYZ(self):
+        """XYZ coordinates of the spectra on the container (a view of the array, no copy is made)"""
+        self.compact_rows()
+        return self._XYZ[:self.count]
+    
+    @property
+    def xy(self):
+        """xy coordinates of the spectra on the container (a view of the array, no copy is made)"""
+        self.compact_rows()
+        return self._xy[:self.count]
+    
+    @property
+    def RGB(self):
+        """RGB values of the spectra on the container (a view of the array, no copy is made)"""
+        self.compact_rows()
+        return self._RGB[:self.count]
+    
+    def get(self, spectrum_id):
+        """Returns the spectrum_record of an ID.
+        """
+        if spectrum_id not in self.rows:
+            raise KeyError(f"There is no spectrum with the ID {spectrum_id} on the container.")
+        return spectrum_record(self, spectrum_id)
+    
+    def append(self, obj_spectrum):
+        """Add a spectrum object to the container, and return its spectrum_record.
+        """
+        
+        # Double the size of the arrays when they are full
+        if self.count == len(self._ids):
+            capacity = max(2 * self.count, 64)
+            for name in ("_ids", "_alive", "_XYZ", "_xy", "_RGB"):
+                old_array = getattr(self, name)
+                new_array = np.empty((capacity,) + old_array.shape[1:], dtype=old_array.dtype)
+                new_array[:self.count] = old_array[:self.count]
+                setattr(self, name, new_array)
+        
+        spectrum_id = self.next_id
+        self.next_id += 1
+        row = self.count
+        self.count += 1
+
+        self._ids[row] = spectrum_id
+        self._alive[row] = True
+        self.rows[spectrum_id] = row
+        self.spectra.append(obj_spectrum)
+        self.names.append(obj_spectrum.file_name)
+        self.paths.append(obj_spectrum.file_path)
+        self.fingerprints[obj_spectrum.fingerprint] = spectrum_id
+        self.update_rows([row])
+
+        return spectrum_record(self, spectrum_id)
+    
+    def update_rows(self, rows):
+        """Copy to the arrays of the container the color coordinates of the spectra on the given rows.
+        """
+        for row in rows:
+            obj_spectrum = self.spectra[row]
+            self._XYZ[row] = obj_spectrum.XYZ
+            self._xy[row] = obj_spectrum.xy
+            self._RGB[row] = obj_spectrum.RGB
+            self.index.move(int(self._ids[row]), *self._xy[row])
+    
+    def nearest(self, x, y, max_distance = np.inf):
+        """Returns the spectrum_record whose xy coordinates are the nearest to (x, y),
+        or None if there is no spectrum within 'max_distance'.
+        """
+        spectrum_id = self.index.nearest(x, y, max_distance)
+        return None if spectrum_id is None else spectrum_record(self, spectrum_id)
+    
+    def within_radius(self, x, y, radius):
+        """Returns a list with the spectrum_record of the spectra within a distance from (x, y) on the diagram.
+        """
+        return self.get_records(self.index.within_radius(x, y, radius))
+    
+    def within_rectangle(self, x0, y0, x1, y1):
+        """Returns a list with the spectrum_record of the spectra inside a rectangle (given by two opposite corners).
+        """
+        return self.get_records(self.index.within_rectangle(x0, y0, x1, y1))
+    
+    def within_polygon(self, vertices):
+        """Returns a list with the spectrum_record of the spectra inside a polygon, given by its (x, y) vertices.
+        """
+        return self.get_records(self.index.within_polygon(vertices))
+    
+    def within_ellipse(self, x, y, a, b, angle = 0.0):
+        """Returns a list with the spectrum_record of the spectra inside an ellipse (for example, a MacAdam ellipse),
+        centered on (x, y), with semi-axes 'a' and 'b', and the axis 'a' rotated by 'angle' degrees.
+        """
+        return self.get_records(self.index.within_ellipse(x, y, a, b, angle))
+    
+    def get_records(self, ids):
+        """Returns a list with the spectrum_record of the given IDs, in the order of the spectra on the container.
+        """
+        return [spectrum_record(self, spectrum_id) for spectrum_id in sorted(ids.tolist(), key=self.rows.__getitem__)]
+    
+    def get_rows(self, spectra):
+        """Returns the rows on the container's arrays of a list of spectrum_record.
+        """
+        return [self.rows[record.id] for record in spectra]
+    
+    def import_files(self):
+        """Open a file dialog for the user to choose the spectrum files.
+        Then parse the files, calculate the color data, and stores it in an object inside the spectrum container.
+        """
+
+        file_list = self.ask_files("Import spectra")
+
+        file_list_size = len(file_list)
+        if file_list_size == 0:
+            return False
+        
+        # Parse the spectrum files
+        success_count = 0
+        self.duplicates = []
+        for obj_file in self.read_files(file_list):
+            for obj_spectrum in obj_file.spectra:
+                
+                # Skip the spectra that are already on the container (from the same file or from another file with the same values)
+                existing_id = self.fingerprints.get(obj_spectrum.fingerprint)
+                if existing_id is not None:
+                    self.duplicates.append((obj_spectrum.file_name, spectrum_record(self, existing_id)))
+                    continue
+                
+                self.append(obj_spectrum)       # Add the spectrum object to the container
+                self.compact([obj_spectrum])
+                success_count += 1
+            
+        if success_count > 0:
+            if self.window:
+                # Generate an event for Tkinter (so we can automatically update the diagram and the rest of the window)
+                self.window.event_generate("<<FilesImported>>", when="tail")
+                self.window.update()
+            return True
+        else:
+            return False
     
-    def __iter__(self):
-        self._index = 0
-        self._max_index = len(self.id)
-        return self
+    def import_series(self):
+        """Open a file dialog for the user to choose the files of a series of spectra (for example, taken
+        during a heating ramp or a kinetic experiment), and add them to the container as a spectrum_series.
+        The files are ordered by their names, with the numbers on the names compared by their values
+        (so "sample_2" comes before "sample_10"). Returns the series, or False if no spectrum was imported.
+        """
+
+        file_list = sorted(self.ask_files("Import series"), key=self.natural_sort_key)
+        if len(file_list) == 0:
+            return False
+        
+        # Spectra already on the container are not skipped, a series can go back to a previous color
+        series_spectra = [obj_spectrum for obj_file in self.read_files(file_list) for obj_spectrum in obj_file.spectra]
+        if len(series_spectra) == 0:
+            return False
+        
+        series = spectrum_series(series_spectra, name=Path(file_list[0]).parent.name)
+        self.series.append(series)
+        self.compact(series_spectra)
+
+        if self.window:
+            # Generate an event for Tkinter (so we can automatically update the diagram)
+            self.window.event_generate("<<SeriesImported>>", when="tail")
+            self.window.update()
+        return series
     
-    def __next__(self):
-        if self._index < self._max_index:
-            obj_spectrum = self.id[self._index]
-            self._index += 1
-            return obj_spectrum
-        else:
-            raise StopIteration
+    @staticmethod
+    def natural_sort_key(file_path):
+        """Key for sorting file names with the numbers on them ordered by their values.
+        """
+        return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", Path(file_path).name)]
     
-    def import_files(self):
-        """Open a file dialog for the user to choose the spectrum files.
-        Then parse the files, calculate the color data, and stores it in an object inside the spectrum container.
+    def ask_files(self, title):
+        """Open a file dialog for the user to choose spectrum files, and return their paths.
         """
 
         if sys.platform == "win32":
@@ -236,42 +2752,535 @@ class spectrum_container():
         All of them in the end of the day are just plan text documents.
         """
 
-        file_list = askopenfilenames(
+        # Binary files are read by the loader of their extension (see spectrum_to_cie.binary_loaders)
+        binary_extensions = (
+            ("NumPy arrays", "*.npy"),
+            ("NumPy archives", "*.npz"),
+            ("Raw binary files (with a .hdr header)", "*.raw"),
+        )
+
+        return askopenfilenames(
             parent = self.window,
-            filetypes = (text_extensions, ("All files", "*.*")),
-            title = "Import spectra"
+            filetypes = (text_extensions, *binary_extensions, ("All files", "*.*")),
+            title = title
         )
+    
+    def read_files(self, file_list):
+        """Parse the files and calculate the color coordinates (of each column of intensities of the files).
+        Returns a list of multi_spectrum_to_cie() objects of the files that were imported, in the same order as 'file_list'.
 
-        file_list_size = len(file_list)
-        if file_list_size == 0:
-            return False
-        
-        # Parse the spectrum files
-        success_count = 0
-        for file in file_list:
-            
-            # Instantiate spectrum object
-            obj_spectrum = spectrum_to_cie(file)   # Parse the file and calculate the color coordinates
-            
-            if obj_spectrum.success:
-                self.id.append(obj_spectrum)       # Add the spectrum object to the list
-                success_count += 1
+        When there are at least .parallel_threshold files, they are split among a pool of processes.
+        The processes send back only the arrays of each file, and the objects are created from them on this process.
+        """
+
+        if (self.workers > 1) and (len(file_list) >= self.parallel_threshold):
+            try:
+                if self.pool is None:
+                    self.pool = ProcessPoolExecutor(self.workers)
+                
+                # Each process takes a few files at a time, and the results come back in the order of the files
+                chunk_size = max(1, len(file_list) // (self.workers * 4))
+                colorimetry = (spectrum_to_cie.cmfs.name, spectrum_to_cie.illuminant.name)
+                results = self.pool.map(
+                    multi_spectrum_to_cie.calculate_file, file_list, repeat(self.cache), repeat(colorimetry),
+                    chunksize = chunk_size
+                )
+                obj_list = [
+                    multi_spectrum_to_cie(file, table_data=table_data)
+                    for file, table_data in zip(file_list, results)
+                    if table_data
+                ]
+
+                # The processes added entries to the cache without knowing about each other, so check its size again
+                if self.cache:
+                    self.cache.evict()
+                
+                return obj_list
             
-        if success_count > 0:
-            if self.window:
-                # Generate an event for Tkinter (so we can automatically update the diagram and the rest of the window)
-                self.window.event_generate("<<FilesImported>>", when="tail")
-                self.window.update()
-            return True
-        else:
-            return False
+            except (BrokenProcessPool, OSError) as error:
+                print(f"Error: Could not import the files in parallel ({error}), importing them one by one")
+                self.close_pool()
+        
+        obj_list = (multi_spectrum_to_cie(file, cache=self.cache) for file in file_list)
+        return [obj_file for obj_file in obj_list if obj_file.success]
+    
+    def close_pool(self):
+        """Stop the processes of the parallel import (they are started again on the next import, if needed).
+        """
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+    
+    def remove(self, records):
+        """Remove from the container a spectrum_record, or a list of them.
+        Returns the change on the order of the spectra, as a dictionary:
+            {"ids": IDs of the removed spectra, "positions": their former positions (sorted), "first": the first position that changed}
+        The spectra after "first" moved up on the order (the ones before it are unchanged), so a list showing the
+        spectra can remove the items on "positions" and renumber only the items after "first".
+
+        The rows of the removed spectra are only marked as removed, and all of them are removed at once from the
+        arrays when they are read or when a quarter of the rows were removed (see compact_rows).
+        So removing many spectra does not move the arrays each time.
+
+        Records that are repeated, already removed or from another container are ignored.
+        """
+        if isinstance(records, spectrum_record):
+            records = [records]
+        
+        # IDs of the spectra that are still on the container (checked before anything is changed)
+        ids = {record.id for record in records if (record.container is self) and (record.id in self.rows)}
+
+        # Positions of the spectra (their rows minus the removed rows before them)
+        rows = np.array(sorted(self.rows[spectrum_id] for spectrum_id in ids), dtype=np.int64)
+        removed_before = np.cumsum(~self._alive[:self.count])
+        positions = rows - removed_before[rows]
+
+        for row in rows:
+            spectrum_id = int(self._ids[row])
+            obj_spectrum = self.spectra[row]
+            del self.rows[spectrum_id]
+            self.index.delete(spectrum_id)
+            if self.fingerprints.get(obj_spectrum.fingerprint) == spectrum_id:
+                del self.fingerprints[obj_spectrum.fingerprint]
+            self.spectra[row] = None    # Free the spectrum object (the arrays are compacted later)
+        self._alive[rows] = False
+        self.removed_count += len(rows)
+
+        changes = {
+            "ids": self._ids[rows].copy(),
+            "positions": positions,
+            "first": int(positions[0]) if len(positions) > 0 else len(self),
+        }
+
+        # Remove the rows from the arrays once they are more than a quarter of them
+        if self.removed_count > self.count // 4:
+            self.compact_rows()
+        
+        return changes
+    
+    def compact_rows(self):
+        """Remove from the arrays the rows of the removed spectra, keeping the order of the other spectra.
+        """
+        if self.removed_count == 0:
+            return
+        
+        alive = self._alive[:self.count].copy()    # The mask is reset below, before the lists are filtered
+        kept = len(self)
+        for array in (self._ids, self._XYZ, self._xy, self._RGB):
+            array[:kept] = array[:self.count][alive]
+        self._alive[:kept] = True
+        self.spectra = [obj_spectrum for obj_spectrum in self.spectra if obj_spectrum is not None]
+        self.names = [name for name, keep in zip(self.names, alive) if keep]
+        self.paths = [path for path, keep in zip(self.paths, alive) if keep]
+        self.count = kept
+        self.removed_count = 0
+        self.rows = dict(zip(self._ids[:kept].tolist(), range(kept)))
+    
+    def recalculate(self):
+        """Calculate again the color coordinates of all spectra on the container
+        (after the observer or the illuminant were changed with spectrum_to_cie.set_colorimetry).
+
+        The spectra with the same wavelengths are stacked and calculated together, with a single matrix product.
+        """
+        self.compact_rows()
+        self.calculate_color(self.spectra)
+        self.update_rows(range(self.count))
+        for series in self.series:
+            series.recalculate()
+    
+    @staticmethod
+    def calculate_color(spectra):
+        """Calculate the color coordinates of a list of spectrum objects, replacing the ones they already had.
+        The spectra with the same wavelengths are stacked and calculated together, with a single matrix product.
+        """
+
+        # Group the spectra by their wavelengths
+        spectrum_groups = {}
+        for obj_spectrum in spectra:
+            key = interpolation_operator.get_key(obj_spectrum.color_data["wavelengths"])
+            spectrum_groups.setdefault(key, []).append(obj_spectrum)
+        
+        # Calculate each group at once
+        for spectrum_group in spectrum_groups.values():
+            wavelengths = spectrum_group[0].color_data["wavelengths"]
+            intensities = np.stack([obj_spectrum.color_data["intensities"] for obj_spectrum in spectrum_group])
+            XYZ, xy, RGB = multi_spectrum_to_cie.table_to_color(wavelengths, intensities)
+
+            for n, obj_spectrum in enumerate(spectrum_group):
+                obj_spectrum.set_color_data({**obj_spectrum.color_data, "XYZ": XYZ[n], "xy": xy[n], "RGB": RGB[n]})
+    
+    def process(self, spectra, stages):
+        """Apply processing stages to a list of spectrum objects (see processing_pipeline for the stages),
+        and calculate again their color coordinates. 'stages' is the full list of stages, in order:
+            spectrum.process(spectra, [("crop", {"start": 400, "end": 700}), ("baseline", {"degree": 1})])
+        An empty list brings the spectra back to how they were imported.
+
+        Only the stages from the first one that changed are calculated again, and the spectra with the same
+        wavelengths are processed together. Returns the list of spectra that could not be processed (because
+        not enough points were left for the interpolation); those spectra keep their previous stages.
+        """
+        pipelines = [obj_spectrum.get_pipeline() for obj_spectrum in spectra]
+        previous_stages = [pipeline.stages for pipeline in pipelines]
+        for pipeline in pipelines:
+            pipeline.set_stages(stages)
+        try:
+            processing_pipeline.run(pipelines)
+        except ValueError as error:
+            # Invalid parameters: keep all spectra as they were
+            print(f"Error: Could not process the spectra - {error}")
+            for pipeline, old_stages in zip(pipelines, previous_stages):
+                pipeline.set_stages(old_stages)
+            processing_pipeline.run(pipelines)
+            return list(spectra)
+
+        # Replace the arrays of the spectra by the processed ones
+        processed = []
+        failed = []
+        for obj_spectrum, pipeline, old_stages in zip(spectra, pipelines, previous_stages):
+            wavelengths, intensities = pipeline.output
+            try:
+                interpolation_operator.get(wavelengths)
+            except ValueError:
+                print(f"Error: Not enough points to interpolate the processed spectrum - {obj_spectrum.file_path}")
+                pipeline.set_stages(old_stages)
+                failed.append(obj_spectrum)
+                continue
+            obj_spectrum.set_processed_data(wavelengths, intensities)
+            processed.append(obj_spectrum)
+        
+        # Bring the failed pipelines back to their previous output, and calculate the colors of the processed spectra
+        processing_pipeline.run([obj_spectrum.pipeline for obj_spectrum in failed])
+        self.calculate_color(processed)
+        self.update_rows(self.get_rows(processed))
+        self.compact(processed)
+        return failed
+    
+    def save_session(self, file_path, settings = None):
+        """Save the spectra and the series of the container to a session file (see spectrum_session).
+        'settings' is a dictionary (that can be converted to JSON) stored with them, for example the options of the window.
+        Returns whether the file was saved.
+        """
+        self.compact_rows()
+        return spectrum_session.save(file_path, self.spectra, self.series, settings)
+    
+    def load_session(self, file_path):
+        """Add to the container the spectra and the series of a session file (see spectrum_session).
+        Returns the settings stored on the session (or None if the file could not be opened), and the
+        series that were added to the container are listed on self.series as usual.
+
+        If the container is empty, the observer and the illuminant of the session are used from now on.
+        Otherwise the spectra of the session are calculated again with the current ones.
+        The spectra already on the container are not added again (they are listed on self.duplicates).
+        """
+        session = spectrum_session.load(file_path)
+        if session is None:
+            return None
+        
+        spectra = session["spectra"]
+        colorimetry = (session["observer"], session["illuminant"])
+        if colorimetry != (spectrum_to_cie.cmfs.name, spectrum_to_cie.illuminant.name):
+            if (len(self) == 0) and (len(self.series) == 0) and (session["observer"] in colorimetry_tables.observers) \
+                and (session["illuminant"] in colorimetry_tables.illuminants):
+                spectrum_to_cie.set_colorimetry(*colorimetry)
+            else:
+                self.calculate_color(spectra)
+                for obj_series in session["series"]:
+                    obj_series.recalculate()
+        
+        self.duplicates = []
+        for obj_spectrum in spectra:
+            existing_id = self.fingerprints.get(obj_spectrum.fingerprint)
+            if existing_id is not None:
+                self.duplicates.append((obj_spectrum.file_name, spectrum_record(self, existing_id)))
+                continue
+            self.append(obj_spectrum)
+        self.series.extend(session["series"])
+        """NOTE
+        The spectra of the session are not moved to the storage of the container (see .compact()),
+        since their arrays are already memory-mapped from the session file.
+        """
+
+        return session["settings"]
+    
+    def compact(self, spectra):
+        """Move the intensities of a list of spectrum objects to the storage of the container (if it has one).
+        """
+        if self.storage is None:
+            return
+        for obj_spectrum in spectra:
+            obj_spectrum.compact(self.storage)
+    
+    def calculate_metrics(self):
+        """Calculate at once the CCT, Duv, dominant and complementary wavelengths, and excitation purity
+        of the spectra on the container that do not have them yet (see color_metrics).
+        """
+        self.compact_rows()
+        missing = [row for row, obj_spectrum in enumerate(self.spectra) if obj_spectrum._metrics is None]
+        if len(missing) == 0:
+            return
+        
+        metrics = color_metrics.calculate(self._xy[missing], spectrum_to_cie.cmfs, spectrum_to_cie.illuminant)
+        for n, row in enumerate(missing):
+            self.spectra[row].metrics = {name: float(values[n]) for name, values in metrics.items()}
+    
+    def calculate_uncertainty(self, noise = "poisson", sigma = None, samples = 10000, seed = None, only_missing = False):
+        """Estimate by Monte Carlo the uncertainty of the xy coordinates of all spectra on the container
+        (see spectrum_to_cie.calculate_uncertainty() for the parameters).
+        If 'only_missing' is True, the spectra that already have their uncertainty are skipped.
+
+        The spectra with the same wavelengths are calculated together.
+        """
+
+        # Group the spectra by their wavelengths
+        self.compact_rows()
+        spectrum_groups = {}
+        for obj_spectrum in self.spectra:
+            if only_missing and (obj_spectrum.xy_covariance is not None):
+                continue
+            key = interpolation_operator.get_key(obj_spectrum.color_data["wavelengths"])
+            spectrum_groups.setdefault(key, []).append(obj_spectrum)
+        
+        # Calculate each group at once
+        rng = np.random.default_rng(seed)
+        for spectrum_group in spectrum_groups.values():
+            wavelengths = spectrum_group[0].color_data["wavelengths"]
+            intensities = np.stack([obj_spectrum.color_data["intensities"] for obj_spectrum in spectrum_group])
+            XYZ = np.stack([obj_spectrum.XYZ for obj_spectrum in spectrum_group])
+
+            # Covariance of the XYZ coordinates of each spectrum: W·diag(variance)·Wᵀ
+            weights = interpolation_operator.get(wavelengths).get_color_weights(spectrum_to_cie.cmfs, spectrum_to_cie.illuminant)
+            variance = spectrum_to_cie.noise_variance(intensities, noise, sigma)
+            XYZ_covariance = (variance[:, np.newaxis, :] * weights) @ weights.T
+
+            xy_mean, xy_covariance = spectrum_to_cie.xy_monte_carlo(XYZ, XYZ_covariance, samples, rng)
+            for n, obj_spectrum in enumerate(spectrum_group):
+                obj_spectrum.xy_mean, obj_spectrum.xy_covariance = xy_mean[n], xy_covariance[n]
+    
+    def get_uncertainty(self):
+        """Returns a tuple of numpy arrays (mean, covariance) with the uncertainty of the xy coordinates
+        of the spectra on the container that have it calculated.
+        """
+        self.compact_rows()
+        calculated = [obj_spectrum for obj_spectrum in self.spectra if obj_spectrum.xy_covariance is not None]
+        xy_mean = np.array([obj_spectrum.xy_mean for obj_spectrum in calculated]).reshape(-1, 2)
+        xy_covariance = np.array([obj_spectrum.xy_covariance for obj_spectrum in calculated]).reshape(-1, 2, 2)
+        return xy_mean, xy_covariance
+    
+    def release(self):
+        """Free the memory used by the spectral distributions of all spectra (they are created again when needed).
+        """
+        self.compact_rows()
+        for obj_spectrum in self.spectra:
+            obj_spectrum.release()
+        gc.collect()
     
     def get_xy(self):
-        xy_dict = {'x': [], 'y': []}
-        for obj_spectrum in self.id:
-            xy_dict['x'].append(obj_spectrum.xy[0])
-            xy_dict['y'].append(obj_spectrum.xy[1])
-        return xy_dict
+        """Returns a dictionary with the x and y coordinates of the spectra, as views of the container's array (no copy is made).
+        The views are only valid until the next spectrum is added or removed.
+        """
+        self.compact_rows()
+        return {'x': self._xy[:self.count, 0], 'y': self._xy[:self.count, 1]}
+
+#-----------------------------------------------------------------------------
+# Ordered sequence of spectra, drawn as a path on the diagram
+#-----------------------------------------------------------------------------
+class spectrum_series():
+    """Ordered sequence of spectra (for example, taken during a heating ramp or a kinetic experiment).
+    What matters on a series is how its color moves, so it is drawn as a path on the Chromaticity Diagram
+    (see plot_container.plot_series()) instead of as numbered points.
+
+    Creating a series from spectrum objects:
+        series = spectrum_series(spectra, name = "Heating ramp")
+    The xy coordinates of all spectra are on an array of shape (spectra, 2):
+        series.xy
+    New spectra can be appended to the end of the series (only the coordinates of the new spectra are calculated):
+        series.extend(new_spectra)
+    
+    The series can be accessed by index and iterated like a list of its spectra.
+    """
+
+    def __init__(self, spectra = (), name = "Series"):
+        self.name = name                    # Name of the series
+        self.spectra = []                   # spectrum_to_cie() objects, in the order of the series
+        self._xy = np.empty((64, 2))        # Coordinates of the spectra (the array has room for more spectra)
+        """NOTE
+        The array of coordinates grows by doubling its size when it is full, so appending the spectra
+        one at a time (as they are measured) does not copy the whole series every time.
+        """
+        self.extend(spectra)
+    
+    @property
+    def xy(self):
+        """xy coordinates of the spectra of the series - array of shape (spectra, 2)"""
+        return self._xy[:len(self.spectra)]
+    
+    def extend(self, spectra):
+        """Append spectra to the end of the series (the ones that were not imported successfully are skipped).
+        The coordinates of the spectra that were not calculated yet are calculated at once.
+        """
+        spectra = [obj_spectrum for obj_spectrum in spectra if obj_spectrum.success]
+        spectrum_container.calculate_color([obj_spectrum for obj_spectrum in spectra if obj_spectrum._xy is None])
+
+        start = len(self.spectra)
+        stop = start + len(spectra)
+        if stop > len(self._xy):
+            grown = np.empty((max(stop, 2 * len(self._xy)), 2))
+            grown[:start] = self._xy[:start]
+            self._xy = grown
+        
+        for n, obj_spectrum in enumerate(spectra, start):
+            self._xy[n] = obj_spectrum.xy
+        self.spectra.extend(spectra)
+    
+    def append(self, spectrum):
+        """Append a single spectrum to the end of the series.
+        """
+        self.extend([spectrum])
+    
+    def recalculate(self):
+        """Calculate again the coordinates of all spectra of the series
+        (after the observer or the illuminant were changed with spectrum_to_cie.set_colorimetry).
+        """
+        spectrum_container.calculate_color(self.spectra)
+        for n, obj_spectrum in enumerate(self.spectra):
+            self._xy[n] = obj_spectrum.xy
+    
+    def __getitem__(self, index):
+        return self.spectra[index]
+    
+    def __len__(self):
+        return len(self.spectra)
+    
+    def __iter__(self):
+        return iter(self.spectra)
+
+#-----------------------------------------------------------------------------
+# Numbered labels of the points on the Chromaticity Diagram
+#-----------------------------------------------------------------------------
+class point_labels(Artist):
+    """Single matplotlib artist that draws the numbers of the points on the Chromaticity Diagram
+    (the number inside a solid circle, on the same position as the point).
+
+    Only the labels inside the current view are drawn, and a label is skipped if it would overlap one of
+    the drawn labels with a lower number. So zooming into a crowded region shows the labels that were hidden.
+    
+    Usage:
+        labels = point_labels(get_points)   # 'get_points' is a function that returns the (N, 2) array of the points
+        axes.add_artist(labels)
+    """
+
+    def __init__(self, get_points, fontsize = 6, color = "white", background = "#212121"):
+        super().__init__()
+        self.get_points = get_points        # Function that returns the xy coordinates of the points
+        self.background = background        # Color of the circles
+        self.drawn = np.empty(0, dtype=np.int64)    # Positions of the labels drawn on the last time
+        self.set_zorder(3)                  # Same as matplotlib's annotations
+        self.set_in_layout(False)           # The labels do not change the layout of the figure
+
+        # Text reused for drawing each label
+        self.text = Text(
+            color = color,
+            ha = "center",                  # Center the text over the point (horizontally)
+            va = "center",                  # Center the text over the point (vertically)
+            fontfamily = "sans-serif",      # Use a font without serif
+            fontweight = "bold",            # Bold text
+            fontsize = fontsize,
+            transform = IdentityTransform(),    # Position in pixels
+        )
+        """NOTE
+        Drawing one annotation (text and circle) for each point is the slowest part of drawing the diagram
+        when there are hundreds of points. Here all circles of the same size are drawn with a single call
+        (as markers), and the text is only drawn for the labels that are visible.
+        """
+    
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        
+        points = self.get_points()
+        if len(points) == 0:
+            self.drawn = np.empty(0, dtype=np.int64)
+            return
+        
+        # Points inside the current view (in pixels)
+        screen = self.axes.transData.transform(points)
+        view = self.axes.bbox
+        inside = np.isfinite(screen).all(axis=1) & (screen[:, 0] >= view.x0) & (screen[:, 0] <= view.x1) \
+            & (screen[:, 1] >= view.y0) & (screen[:, 1] <= view.y1)
+        candidates = np.flatnonzero(inside)
+        
+        # Radius of the circles for each amount of digits of the numbers (same as the "circle" box style of matplotlib)
+        self.text.set_figure(self.figure)
+        digits = np.floor(np.log10(candidates + 1)).astype(np.int64) + 1
+        pad = 0.3 * renderer.points_to_pixels(self.text.get_fontsize())
+        radius_by_digits = {}
+        for digit_count in np.unique(digits):
+            self.text.set_text("8" * digit_count)
+            extent = self.text.get_window_extent(renderer)
+            radius_by_digits[digit_count] = np.hypot(extent.width + 2 * pad, extent.height + 2 * pad) / 2
+        radius = np.array([radius_by_digits[digit_count] for digit_count in digits]).reshape(-1)
+
+        self.drawn = self.cull(screen[candidates], radius, candidates)
+
+        # Circles (the ones with the same size are drawn together)
+        graphics_context = renderer.new_gc()
+        graphics_context.set_foreground(self.background)
+        graphics_context.set_linewidth(0)
+        graphics_context.set_alpha(self.get_alpha())
+        face_color = to_rgba(self.background, self.get_alpha())
+        drawn_radius = np.array([radius_by_digits[len(str(position + 1))] for position in self.drawn]).reshape(-1)
+        for circle_radius in np.unique(drawn_radius):
+            centers = screen[self.drawn[drawn_radius == circle_radius]]
+            renderer.draw_markers(
+                graphics_context, mpl_path.Path.unit_circle(), Affine2D().scale(circle_radius),
+                mpl_path.Path(centers), IdentityTransform(), face_color,
+            )
+        graphics_context.restore()
+
+        # Numbers
+        for position in self.drawn:
+            self.text.set_position(screen[position])
+            self.text.set_text(str(position + 1))
+            self.text.draw(renderer)
+        
+        self.stale = False
+    
+    @staticmethod
+    def cull(centers, radius, positions):
+        """Returns the positions of the labels that do not overlap any of the labels kept before them.
+        'centers' are the positions of the labels in pixels, and 'radius' the radius of each label.
+        """
+        if len(positions) == 0:
+            return positions
+        
+        # The labels are placed on a grid with cells of the largest diameter, so only the labels on the
+        # neighboring cells need to be checked
+        cell_size = 2 * radius.max()
+        cells = np.floor(centers / cell_size).astype(np.int64).tolist()
+        x = centers[:, 0].tolist()
+        y = centers[:, 1].tolist()
+        r = radius.tolist()
+
+        accepted = []
+        grid = {}   # Accepted labels on each cell: {(column, row): [label, ...]}
+        for n, (column, row) in enumerate(cells):
+            overlap = False
+            for neighbor_column in (column - 1, column, column + 1):
+                for neighbor_row in (row - 1, row, row + 1):
+                    for m in grid.get((neighbor_column, neighbor_row), ()):
+                        if (x[n] - x[m])**2 + (y[n] - y[m])**2 < (r[n] + r[m])**2:
+                            overlap = True
+                            break
+                    if overlap:
+                        break
+                if overlap:
+                    break
+            if not overlap:
+                grid.setdefault((column, row), []).append(n)
+                accepted.append(n)
+        
+        return positions[np.array(accepted, dtype=np.int64)]
+
 
 #-----------------------------------------------------------------------------
 # Plot the values stored on the spectrum_container() class
@@ -279,8 +3288,16 @@ class spectrum_container():
 class plot_container():
     """Plot and store the Chromaticity Diagram and the Spectral Distributions.
     The plots themselves are meant to be displayed by the Graphical User Interface.
+
+    The colors of the diagram and its spectral locus are loaded from the "lib" folder (see .load_background()).
+    With 'regenerate_background = True', they are calculated again by colour and the files are overwritten.
     """
-    def __init__(self):
+
+    # Precomputed background of the Chromaticity Diagram
+    background_image = Path(program_folder, "lib", "CIE1931_diagram.png")  # Colors of the diagram (256 x 256 RGB)
+    background_locus = Path(program_folder, "lib", "CIE1931_locus.csv")    # CIE x and y of the spectral locus (360 nm to 830 nm)
+
+    def __init__(self, regenerate_background = False):
         
         # The amount of points plotted on the CIE Chromaticity Diagram
         self.points_count = 0
@@ -295,30 +3312,29 @@ class plot_container():
         )
 
         # Draw the Chromaticity Diagram
-        plot_chromaticity_diagram_CIE1931(
-            figure = self.fig_CIE,
-            axes = self.ax_CIE,
-            standalone = False,
-            title = "CIE 1931 Chromaticity Diagram",
-            bounding_box = (0.0, 0.8, 0.0, 0.9),
-            tight_layout = True,
-            transparent_background = False,
-            show_spectral_locus = False,
+        diagram_image, diagram_locus = self.load_background(regenerate_background)
+        diagram_polygon = Polygon(diagram_locus, facecolor="none", edgecolor="none")
+        self.ax_CIE.add_patch(diagram_polygon)
+        self.image_CIE = self.ax_CIE.imshow(
+            diagram_image,
+            interpolation = "bilinear",
+            extent = (0, 1, 0, 1),
         )
+        self.image_CIE.set_clip_path(diagram_polygon)   # Only the colors inside the spectral locus are shown
+
+        self.ax_CIE.set_xlim(0.0, 0.8)
+        self.ax_CIE.set_ylim(0.0, 0.9)
+        self.ax_CIE.set_title("CIE 1931 Chromaticity Diagram", wrap=True)
+        self.ax_CIE.set_xlabel("CIE x")
+        self.ax_CIE.set_ylabel("CIE y")
+        self.fig_CIE.tight_layout()
         """NOTE:
-        "standalone = False" means that the figure isn't rendered yet, so it
-        is still open for plotting the coordinates.
-        
-        Setting "transparent_background = False" actually makes the background
-        transparent, in spite of what the parameter name might suggest. We are
-        making axes background transparent so we can set the figure to black
-        and get the plot on a dark background too.
+        This draws the same diagram as colour's plot_chromaticity_diagram_CIE1931(), without its spectral locus.
+        But instead of converting the xy grid to RGB on every launch, the image is loaded from a file, so the
+        diagram appears without needing colour's plotting functions.
 
-        "show_spectral_locus = False" prevents the function from drawing
-        the wavelenghts around the spectrum. I don't like the style that the
-        module use for the locus, however the module doesn't allow to change
-        it easily. The locus will be drawn later, through a custom method, with
-        a style that fits better with what I am going for.
+        The wavelenghts around the spectral locus are drawn below, with a style that fits better with
+        what I am going for (the module doesn't allow to change its style easily).
         """
 
         # Set the diagram's background to black
@@ -427,36 +3443,64 @@ class plot_container():
                 )
             )
         
-        # List for the point labels on the Chromaticity Diagram
+        # Labels of the points on the Chromaticity Diagram
         """NOTE
-        Each point plotted on the diagram will have a number label over it.
-        This list will hold those labels handlers, so batch operations can be applied to them.
+        Each point plotted on the diagram has a number label over it. All labels are drawn by a single
+        artist (see point_labels), which takes the coordinates of the points from the buffer of the scatter plot.
         """
-        self.label_CIE = []
+        self.label_CIE = point_labels(lambda: self.points_CIE[:self.points_count])
+        self.ax_CIE.add_artist(self.label_CIE)
         self.label_CIE_visible = True  # Whether the data labels are being shown on the diagram
 
-        # List for the plotted coordinates
+        # Scatter plot with all CIE coordinates
         """NOTE
-        List to store each scatter plot of CIE coordinates, so operations can be applied later
-        to them.
+        A single scatter plot is kept for the diagram, and its points are changed in place (with .set_offsets())
+        when spectra are added or removed, instead of adding a new scatter plot for each import.
+        The coordinates are kept on a buffer that doubles its size when full, so adding points does not copy
+        the previous ones each time.
         """
-        self.scatter_CIE = []
+        self.points_CIE = np.empty((0, 2))
+        self.scatter_CIE = self.ax_CIE.scatter([], [], marker="o", color="#212121", s=3)
+
+        # Covariance ellipses of the xy coordinates (see .plot_uncertainty())
+        self.ellipses_CIE = None
+
+        # Paths of the series of spectra: {spectrum_series: (line collection, [labels])}
+        self.series_CIE = {}
+
+        # Container whose points generate pick events when clicked (see .enable_picking())
+        self.pick_container = None
+        self.pick_tolerance = 5
+
+        # Cached image of the static background of the diagram (see .enable_blitting())
+        self.canvas_CIE = None          # Canvas where the diagram is displayed
+        self.blitting = False           # Whether the data is drawn separately from the background
+        self.background_CIE = None      # Pixels of the background, copied after each full draw
+        self.background_bounds = None   # Size of the figure when the background was copied
 
         # Create the figure for the spectral distributions (sd)
         """NOTE
-        To speed up things, I am using a single figure with multiple axes (one for each sd).
-        Then I will make the figure to render only one axis at a time.
+        To speed up things, I am using a single figure with a single axis for all spectral distributions.
+        The artists on the axis are reused: when another spectrum is shown, only their data is changed.
         """
         self.fig_sd = plt.figure(
             figsize = (2.8, 2.1),
             dpi = 100,
         )
-        
-        self.ax_sd = {}    # Spectral Distribution dictionary
-        """NOTE
-        The dictionary will associate the spectrum ID to its axis on the sd figure:
-        {spectrum: sd_axis, ...}
-        """
+        self.ax_sd = self.fig_sd.add_axes((0, 0, 1, 1))    # No blank spaces around the distribution
+        self.ax_sd.set_axis_off()                           # No bounding box around the distribution
+        self.ax_sd.set_visible(False)
+
+        # Area under the distribution, filled with the colors of the wavelengths (see .show_sd())
+        self.polygon_sd = Polygon(np.zeros((3, 2)), facecolor="none", edgecolor="none")
+        self.ax_sd.add_patch(self.polygon_sd)
+        self.colors_sd = None
+
+        # Line of the distribution
+        self.line_sd, = self.ax_sd.plot([], [], color="#333333", linewidth=0.5)
+
+        self.spectrum_sd = None     # Spectrum whose distribution is being shown
+        self.limits_sd = {}         # Cached limits of the distributions: {spectrum: (x_min, x_max, y_max)}
     
     def plot_cie(self, CIEx, CIEy):
         """Take lists of CIE x an CIE y coordinates, and plot them on the Chromaticity diagram.
@@ -468,115 +3512,412 @@ class plot_container():
         if (len_CIEx == 0) or (len_CIEx != len_CIEy):
             return False    # Exit the function if the lists are empty or have different sizes
         
-        # Plot the points to the Chromaticity Diagram
-        my_scatter = self.ax_CIE.scatter(CIEx, CIEy, marker="o", color="#212121", s=3)
-        self.scatter_CIE.append(my_scatter)
-        #print(f"About to annotate points:\n{CIEx}\n{CIEy}")
-
-        # Annotate with numbers the points on the diagram 
-        point_index = 0
-        for point in range(self.points_count, self.points_count + len_CIEx):
+        # Add the points to the scatter plot of the Chromaticity Diagram
+        new_count = self.points_count + len_CIEx
+        if new_count > len(self.points_CIE):
+            buffer = np.empty((max(2 * len(self.points_CIE), new_count, 64), 2))
+            buffer[:self.points_count] = self.points_CIE[:self.points_count]
+            self.points_CIE = buffer
+        self.points_CIE[self.points_count:new_count, 0] = CIEx
+        self.points_CIE[self.points_count:new_count, 1] = CIEy
+        self.scatter_CIE.set_offsets(self.points_CIE[:new_count])
+        self.points_count = new_count   # How many points there are currently on the diagram
+        self.label_CIE.stale = True     # The labels of the new points are drawn with the diagram
+        return True
+    
+    def enable_picking(self, container, tolerance = 5):
+        """Generate matplotlib pick events when a point of a spectrum_container is clicked on the Chromaticity Diagram.
+        The event has the attribute .spectrum, with the spectrum_record of the nearest point within 'tolerance' pixels.
+        """
+        self.pick_container = container
+        self.pick_tolerance = tolerance
+        self.ax_CIE.set_picker(self.pick_spectrum)
+        """NOTE
+        The points are found through the spatial index of the container, instead of checking whether
+        the click is on each point of the scatter plots.
+        """
+    
+    @classmethod
+    def load_background(cls, regenerate = False):
+        """Load the colors and the spectral locus of the Chromaticity Diagram, as a (image, locus) tuple.
+        They are generated again if 'regenerate' is True or if the files are missing (or can't be read).
+        """
+        if regenerate or not (cls.background_image.exists() and cls.background_locus.exists()):
+            return cls.generate_background()
+        
+        try:
+            image = plt.imread(cls.background_image)
+            locus = np.loadtxt(cls.background_locus, delimiter=",", ndmin=2)
+        except (OSError, ValueError) as error:
+            print(f"Error: Could not read the background of the Chromaticity Diagram ({error})")
+            return cls.generate_background()
+        
+        return image, locus
+    
+    @classmethod
+    def generate_background(cls, samples = 256):
+        """Calculate the colors and the spectral locus of the Chromaticity Diagram, and save them to the "lib" folder.
+        Returns a (image, locus) tuple.
+        """
+        from colour.plotting import (CONSTANTS_COLOUR_STYLE, XYZ_to_plotting_colourspace)
+        from colour.utilities import (normalise_maximum, suppress_warnings, tstack)
 
-            my_label = self.ax_CIE.annotate(point + 1,          # The result of "point+1" is the text annotated to the current point
-                color = "white",                                # Color of the annotated text
-                xy = (CIEx[point_index], CIEy[point_index]),    # Coordinate of the point
-                xytext = (0, 0),                                # Place the text on the same coordinate as the point
-                textcoords = "offset points",                   # Coordinates relative to the point
-                ha = "center",                                  # Center the text over the point (horizontally)
-                va = "center",                                  # Center the text over the point (vertically)
-                fontfamily = "sans-serif",                      # Use a font without serif
-                fontweight = "bold",                            # Bold text
-                fontsize = 6,                                   # Text with size of 6 points
-                bbox = dict(
-                    boxstyle = "circle",                        # Place the text inside a solid circle
-                    color = "#212121",                          # Color of the circle
-                )
-            )
+        cmfs = colour.MSDS_CMFS["CIE 1931 2 Degree Standard Observer"]
+        illuminant = CONSTANTS_COLOUR_STYLE.colour.colourspace.whitepoint
 
-            my_label.set_visible(self.label_CIE_visible)    # Show or hide the label, based on the current setting
+        # RGB color of each point of a xy grid (the first row is at y = 1)
+        ii, jj = np.meshgrid(np.linspace(0, 1, samples), np.linspace(1, 0, samples))
+        with suppress_warnings(python_warnings=True):
+            XYZ = colour.xy_to_XYZ(tstack([ii, jj]))
+            locus = colour.XYZ_to_xy(cmfs.values, illuminant)
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            RGB = normalise_maximum(XYZ_to_plotting_colourspace(XYZ, illuminant), axis=-1)
+        image = np.clip(np.nan_to_num(RGB), 0.0, 1.0)
+        """NOTE
+        This is the same calculation of colour's plot_chromaticity_diagram_colours(). The points outside
+        the spectral locus can't be converted (or are out of the RGB range), but they are not shown anyway.
+        """
 
-            #print(f"Point: {(CIEx[point_index], CIEy[point_index])} (index: {point_index})")
-            point_index += 1
+        try:
+            cls.background_image.parent.mkdir(parents=True, exist_ok=True)
+            plt.imsave(cls.background_image, image)
+            np.savetxt(cls.background_locus, locus, fmt="%.12g", delimiter=",")
+        except (OSError, ValueError) as error:
+            print(f"Error: Could not save the background of the Chromaticity Diagram ({error})")
+        """NOTE
+        The program folder might be read-only (for example, when installed for all users). Then the
+        diagram is still drawn from the calculated arrays, it is just calculated again on the next start.
+        """
+        
+        return image, locus
+    
+    def enable_blitting(self, canvas):
+        """Cache the static background of the Chromaticity Diagram displayed on 'canvas', so .redraw_cie() can
+        update the data (points, labels, ellipses and series) without rendering the whole diagram again.
+        """
+        self.canvas_CIE = canvas
+        self.blitting = True
+        for artist in self.data_artists():
+            artist.set_animated(True)
+        canvas.mpl_connect("draw_event", self.cache_background)
+        """NOTE
+        Animated artists are skipped by a full draw of the canvas, so the full draw renders only
+        the background (the horseshoe, the spectral locus, the grid, the axes and the title).
+        The background is copied right after, and then the data is drawn over it.
+        Matplotlib already does a full draw whenever the size, the DPI or the view limits of the
+        figure change, and the toggles of the background (grid and axes) also do a full draw.
+        """
+    
+    def data_artists(self):
+        """List the artists of the Chromaticity Diagram that change with the spectra, in their drawing order.
+        """
+        artists = [self.scatter_CIE, self.label_CIE]
+        if self.ellipses_CIE is not None:
+            artists.append(self.ellipses_CIE)
+        for path, series_labels in self.series_CIE.values():
+            artists.append(path)
+            artists.extend(series_labels)
+        
+        return sorted(artists, key=lambda artist: artist.get_zorder())
+    
+    def cache_background(self, event):
+        """Callback of the draw events of the canvas: copy the rendered background, then draw the data over it.
+        """
+        if (not self.blitting) or (event.canvas is not self.canvas_CIE):
+            return
+        
+        self.background_CIE = self.canvas_CIE.copy_from_bbox(self.fig_CIE.bbox)
+        self.background_bounds = self.fig_CIE.bbox.bounds
+        for artist in self.data_artists():
+            self.ax_CIE.draw_artist(artist)
+    
+    def redraw_cie(self):
+        """Update the Chromaticity Diagram on its canvas after the data changed.
+        The cached background is restored and only the data is drawn over it (a full draw is done if there is no background yet).
+        """
+        if self.canvas_CIE is None:
+            return
+        
+        if (not self.blitting) or (self.background_CIE is None) or (self.background_bounds != self.fig_CIE.bbox.bounds):
+            self.canvas_CIE.draw()  # The background is copied again by .cache_background()
+            return
+        
+        self.canvas_CIE.restore_region(self.background_CIE)
+        for artist in self.data_artists():
+            self.ax_CIE.draw_artist(artist)
+        self.canvas_CIE.blit(self.fig_CIE.bbox)
+    
+    def save_cie(self, file_path):
+        """Save the Chromaticity Diagram to an image file (the data is included even when blitting is enabled).
+        """
+        blitting = self.blitting
+        self.blitting = False
+        for artist in self.data_artists():
+            artist.set_animated(False)
+        
+        try:
+            self.fig_CIE.savefig(file_path)
+        finally:
+            self.blitting = blitting
+            for artist in self.data_artists():
+                artist.set_animated(blitting)
+            self.background_CIE = None  # The renderer of the canvas was used for the saved resolution
+    
+    def pick_spectrum(self, artist, mouse_event):
+        """Picker of the diagram's axes: returns whether a spectrum was clicked, and its spectrum_record.
+        Only clicks with the left mouse button pick a spectrum (the other buttons can be used for other tools).
+        """
+        if (mouse_event.inaxes is not self.ax_CIE) or (mouse_event.xdata is None) or (mouse_event.button != 1):
+            return False, {}
+        
+        # Distance on the diagram that corresponds to the tolerance in pixels
+        to_data = self.ax_CIE.transData.inverted()
+        corner = to_data.transform((mouse_event.x + self.pick_tolerance, mouse_event.y + self.pick_tolerance))
+        max_distance = max(abs(corner[0] - mouse_event.xdata), abs(corner[1] - mouse_event.ydata))
 
-            # Add the label to the list
-            self.label_CIE.append(my_label)
+        record = self.pick_container.nearest(mouse_event.xdata, mouse_event.ydata, max_distance)
+        return (record is not None), {"spectrum": record}
+    
+    def remove_cie(self, positions):
+        """Remove from the Chromaticity Diagram the points on the given positions (0 for the first plotted point),
+        and renumber the labels of the points after them. The other points are not plotted again.
+        """
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        if len(positions) == 0:
+            return False
+        
+        # Remove the points from the scatter plot (the points after them move back on the buffer)
+        keep = np.ones(self.points_count, dtype=bool)
+        keep[positions] = False
+        first = positions[0]
+        moved = self.points_CIE[first:self.points_count][keep[first:]]
+        self.points_count -= len(positions)
+        self.points_CIE[first:self.points_count] = moved
+        self.scatter_CIE.set_offsets(self.points_CIE[:self.points_count])
+        self.label_CIE.stale = True     # The labels after the removed points are renumbered when drawn
+        return True
+    
+    def update_cie(self, CIEx, CIEy):
+        """Move the plotted points to new CIE x and y coordinates (for example, after the spectra were calculated
+        with another illuminant). There must be one coordinate for each point on the diagram, in the same order.
+        """
+        if (len(CIEx) != self.points_count) or (len(CIEy) != self.points_count):
+            raise ValueError("There must be one coordinate for each point on the diagram.")
         
-        self.points_count += len_CIEx   # How many points there are currently on the diagram
+        self.points_CIE[:self.points_count, 0] = CIEx
+        self.points_CIE[:self.points_count, 1] = CIEy
+        self.scatter_CIE.set_offsets(self.points_CIE[:self.points_count])
+        self.label_CIE.stale = True
+        return True
     
     def flush_cie(self):
         """Clear all plotted CIE points from the Chromaticity Diagram.
         """
         
-        # Remove all labels
-        for label in self.label_CIE:    # Loop through the list
-            label.remove()              # Remove the specific item
-        self.label_CIE.clear()          # Clear the entire list
-        
-        # Remove all plotted CIE coordinates
-        for scatter_plot in self.scatter_CIE:   # Loop through the list
-            scatter_plot.remove()               # Remove the specific item
-        self.scatter_CIE.clear()                # Clear the entire list
+        # Remove all plotted CIE coordinates (the scatter plot is kept for the next points)
+        self.scatter_CIE.set_offsets(np.empty((0, 2)))
+        """NOTE
+        The paths of the series are not removed here (see .flush_series()), since they are not
+        on the list of spectra.
+        """
+
+        # Remove the uncertainty ellipses
+        self.flush_uncertainty()
 
         # Reset the points counter
         self.points_count = 0
     
+    def plot_uncertainty(self, xy_mean, xy_covariance, n_std = 2.0):
+        """Draw the covariance ellipses of the xy coordinates on the Chromaticity Diagram
+        (replacing the ones that were drawn before). The semi-axes have 'n_std' standard deviations.
+        """
+        self.flush_uncertainty()
+        if len(xy_mean) == 0:
+            return False
+        
+        # Axes of the ellipses: the eigenvectors of the covariance matrices, scaled by the standard deviations
+        eigenvalues, eigenvectors = np.linalg.eigh(xy_covariance)
+        deviation = np.sqrt(np.clip(eigenvalues, 0.0, None))
+        angles = np.degrees(np.arctan2(eigenvectors[:, 1, 1], eigenvectors[:, 0, 1]))   # Direction of the major axis
+
+        # All ellipses are drawn as a single collection
+        self.ellipses_CIE = EllipseCollection(
+            widths = 2 * n_std * deviation[:, 1],       # Major axis
+            heights = 2 * n_std * deviation[:, 0],      # Minor axis
+            angles = angles,
+            units = "xy",                               # Sizes on the diagram's coordinates
+            offsets = xy_mean,                          # Centers of the ellipses
+            offset_transform = self.ax_CIE.transData,
+            facecolors = "none",
+            edgecolors = "white",
+            linewidths = 0.8,
+            zorder = 3,
+        )
+        self.ellipses_CIE.set_animated(self.blitting)
+        self.ax_CIE.add_collection(self.ellipses_CIE)
+    
+    def flush_uncertainty(self):
+        """Remove the covariance ellipses from the Chromaticity Diagram.
+        """
+        if self.ellipses_CIE is not None:
+            self.ellipses_CIE.remove()
+            self.ellipses_CIE = None
+    
     def show_labels_cie(self, display_labels):
         """ Show (True) or hide (False) the data labels on the Chromaticity Diagram.
         """
         self.label_CIE_visible = display_labels     # Change the current setting flag
+        self.label_CIE.set_visible(display_labels)  # All labels of the points are a single artist
+        
+        for _, series_labels in self.series_CIE.values():
+            for label in series_labels:
+                label.set_visible(display_labels)
+    
+    def plot_series(self, series, label_indices = None, colormap = "plasma"):
+        """Draw the path of a spectrum_series on the Chromaticity Diagram, as a single line whose color goes
+        from the first to the last spectrum of the series. Labels with the name of the spectrum are only drawn
+        on the points at 'label_indices' (by default, the first and last points).
 
-        for label in self.label_CIE:                # Change the setting on each label
-            label.set_visible(display_labels)
-
-    def plot_sd(self, spectrum_list):
-        """Plot a Spectral Distribution for each spectrum in a list.
+        If the series was already drawn, its line is updated (so a running series can be drawn again after
+        new spectra are appended to it).
         """
-        
-        if len(spectrum_list) == 0:
+        xy = series.xy
+        if len(xy) == 0:
             return False
         
-        for spectrum in spectrum_list:
-            
-            # Create the axis
-            current_axis = self.fig_sd.subplots(sharex=True, sharey=True)
-            current_axis.set_visible(False)
-            
-            # Plot the current spectral distribution
-            plot_single_sd(
-                spectrum.spectrum_corrected,        # Interpolated spectrum
-                figure = self.fig_sd,
-                axes = current_axis,
-                axes_visible = False,               # No bounding box around the spectrum
-                title = False,                      # No title
-                standalone = False,
-                transparent_background = False,     # No background
-            )
-
-            # Change the line width to 0.5 (from the default of 1.0)
-            (current_axis.get_lines()[0]).set_linewidth(0.5)
-            current_axis.set_xlim((380, 780))
-            
-            # Update dictionary of spectral distributions
-            self.ax_sd.update({spectrum: current_axis})
+        # Segments between consecutive points, colored by their position on the series
+        segments = np.stack((xy[:-1], xy[1:]), axis=1)
+        position = np.arange(len(segments))
+
+        if series in self.series_CIE:
+            path, series_labels = self.series_CIE[series]
+            path.set_segments(segments)
+            path.set_array(position)
+            for label in series_labels:
+                label.remove()
+            series_labels.clear()
+        else:
+            path = LineCollection(segments, cmap=colormap, linewidths=1.5, zorder=3)
+            path.set_array(position)
+            path.set_animated(self.blitting)
+            self.ax_CIE.add_collection(path)
+            series_labels = []
+            self.series_CIE[series] = (path, series_labels)
+        path.set_clim(0, max(len(segments) - 1, 1))
         
-        # Remove the blank spaces around the figure
-        self.fig_sd.subplots_adjust(left=0, bottom=0, right=1, top=1, wspace=0, hspace=0)
+        # Label only the chosen points
+        if label_indices is None:
+            label_indices = sorted({0, len(xy) - 1})
+        for index in label_indices:
+            my_label = self.ax_CIE.annotate(series[index].file_name,
+                color = "white",                                # Color of the annotated text
+                xy = xy[index],                                 # Coordinate of the point
+                xytext = (5, 5),                                # Place the text a little above and to the right of the point
+                textcoords = "offset points",                   # Coordinates relative to the point
+                fontfamily = "sans-serif",                      # Use a font without serif
+                fontsize = 6,                                   # Text with size of 6 points
+                arrowprops = dict(arrowstyle="-", color="white", shrinkA=0, shrinkB=0),
+            )
+            my_label.set_visible(self.label_CIE_visible)    # Show or hide the label, based on the current setting
+            my_label.set_animated(self.blitting)            # Drawn with the data, over the cached background
+            series_labels.append(my_label)
     
-    def save_sd(self, spectral_distribution):
-        """Export the Spectral Distribution to an image file.
+    def flush_series(self):
+        """Remove the paths of all series from the Chromaticity Diagram.
         """
-        # Find the spectrum handler on the container
-        my_sd = False
-        for spectrum,axis_sd in self.ax_sd.items():
-            if axis_sd == spectral_distribution:
-                my_sd = spectrum
-                break
+        for path, series_labels in self.series_CIE.values():
+            path.remove()
+            for label in series_labels:
+                label.remove()
+        self.series_CIE.clear()
+
+    def show_sd(self, spectrum):
+        """Show the Spectral Distribution of a spectrum (the interpolated spectrum, from 380 nm to 780 nm).
+        """
+        if self.colors_sd is None:
+            self.plot_sd_colors()
+        
+        # Points of the spectrum within the wavelengths of the color matching functions
+        spectral_distribution = spectrum.spectrum_corrected
+        wavelengths = spectral_distribution.wavelengths
+        values = spectral_distribution.values
+        inside = (wavelengths >= self.wavelengths_sd[0]) & (wavelengths <= self.wavelengths_sd[-1])
+        wavelengths = wavelengths[inside]
+        values = values[inside]
         
-        # If no spectrum is found, exit the function
+        # Range of the axis (the intensity has a margin of 5% above the maximum)
+        limits = self.limits_sd.get(spectrum)
+        if limits is None:
+            if len(values) > 0:
+                y_max = 1.05 * np.max(values)
+                limits = (wavelengths[0], wavelengths[-1], y_max if y_max > 0 else 1.0)
+            else:
+                limits = (380, 780, 1.0)    # No point of the spectrum is within the visible range (the axis is left empty)
+            self.limits_sd[spectrum] = limits
+        x_min, x_max, y_max = limits
+        
+        # Swap the data of the artists
+        self.line_sd.set_data(wavelengths, values)
+        self.polygon_sd.set_xy(np.vstack([(x_min, 0), np.column_stack((wavelengths, values)), (x_max, 0)]))
+        self.colors_sd.set_clip_path(self.polygon_sd)
+        self.colors_sd.set_extent((self.wavelengths_sd[0] - 0.1, self.wavelengths_sd[-1] + 1.0, 0, y_max))
+        self.ax_sd.set_xlim((380, 780))
+        self.ax_sd.set_ylim((0, y_max))
+        
+        self.ax_sd.set_visible(True)
+        self.spectrum_sd = spectrum
+    
+    def plot_sd_colors(self):
+        """Draw the colors of the wavelengths on the Spectral Distribution's axis, as a single image.
+        The image is clipped to the area under the distribution.
+        """
+        from colour.plotting import (CONSTANTS_COLOUR_STYLE, XYZ_to_plotting_colourspace)
+        from colour.utilities import normalise_maximum
+
+        cmfs = colour.MSDS_CMFS["CIE 1931 2 Degree Standard Observer"]
+        self.wavelengths_sd = cmfs.wavelengths
+        RGB = XYZ_to_plotting_colourspace(
+            colour.wavelength_to_XYZ(self.wavelengths_sd, cmfs),
+            colour.CCS_ILLUMINANTS["CIE 1931 2 Degree Standard Observer"]["E"],
+            apply_cctf_encoding = False,
+        )
+        RGB = CONSTANTS_COLOUR_STYLE.colour.colourspace.cctf_encoding(normalise_maximum(RGB))
+        """NOTE
+        Those are the same colors of colour's plot_single_sd(), which draws them as one bar for each
+        wavelength. Here all the colors are on a single row of pixels, stretched under the distribution.
+        """
+
+        self.colors_sd = self.ax_sd.imshow(
+            np.clip(RGB, 0.0, 1.0)[np.newaxis],
+            interpolation = "nearest",
+            aspect = "auto",    # The image is stretched to the axis range
+            zorder = 1,         # Below the line of the distribution
+        )
+    
+    def hide_sd(self):
+        """Stop showing the Spectral Distribution.
+        """
+        self.ax_sd.set_visible(False)
+        self.spectrum_sd = None
+    
+    def remove_sd(self, spectrum):
+        """Forget the cached limits of the Spectral Distribution of a spectrum (and stop showing it, if it is shown).
+        """
+        self.limits_sd.pop(spectrum, None)
+        if spectrum == self.spectrum_sd:
+            self.hide_sd()
+    
+    def save_sd(self, spectrum):
+        """Export the Spectral Distribution of a spectrum to an image file.
+        """
+        # If no spectrum is given, exit the function
+        my_sd = spectrum
         if not my_sd:
             return False
 
         # Plot the spectral distribution from the raw spectrum data
+        from colour.plotting import plot_single_sd
         figure, axis = plot_single_sd(
             my_sd.spectrum_raw,              # Dictionary with the spectrum values
             axes_visible = True,
@@ -1,1414 +1,1867 @@
 import tkinter as tk
 import tkinter.ttk as ttk
-from tkinter.messagebox import (askyesno, showerror)
-from tkinter.filedialog import asksaveasfilename
+from tkinter.messagebox import (askyesno, showerror, showinfo)
+from tkinter.filedialog import (asksaveasfilename, askopenfilename)
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
+from matplotlib.widgets import RectangleSelector
 import matplotlib as mpl
 import xlsxwriter as excel
 import os, sys, gc, re
-from spec2cie import (spectrum_container, plot_container)
+import multiprocessing
+from spec2cie import (spectrum_container, spectrum_cache, plot_container, spectrum_to_cie, colorimetry_tables, spectrum_storage)
 from pathlib import Path
 
-#-----------------------------------------------------------------------------
-# Initialize the main window
-#-----------------------------------------------------------------------------
-
-# Create the main window and set its properties
-main_window = tk.Tk()
-main_window.title("SpectraChroma")      # Title that apears on the title bar at the top of the window
-main_window.minsize(840, 590)           # This is the minimum size in which all the content remain visible
-main_window.iconphoto(True, tk.PhotoImage(file=Path("lib", "icon.png"))) # Icon for the task bar and the window's title bar
-
-# Force focus on the main window as soon as it is open
-main_window.after(1, lambda: main_window.focus_force())
-"""NOTE
-This prevents the program from being closed with Alt+F4 before it gets the focus.
-If the program were closed this way, it would hang because the Alt+F4 event cannot
-be intercepted if the window is nor focused. By forcing focus on the window I can
-ensure that the program exits properly by using my clean_exit() function.
-
-The program would hang because matplotlib would still be running on the background.
-"""
-
-# Left column - Color and spectrum tables
-main_window.columnconfigure(
-    0,
-    weight = 1,
-    minsize = 300
-)
-
-# Right column - CIE Chromaticity Diagram
-main_window.columnconfigure(
-    1,
-    weight = 2,
-    minsize = 540,
-)
-
-# Top row - Toolbar
-main_window.rowconfigure(
-    0,
-    weight = 0,     # The toolbar row height will not increase when the window is resized
-)
-
-# Next two rows (left column) - Tables
-main_window.rowconfigure(
-    # Color information table
-    1,
-    weight = 2,     # When the window is resized, this row increases more than the Treeview row
-)
-main_window.rowconfigure(
-    # Treeview table (list of spectra and their color coordinates)
-    2,
-    weight = 1,     # When the window is resized, this row increases less than the color info row
-)
-
-#-----------------------------------------------------------------------------
-# Initialise the containers
-#-----------------------------------------------------------------------------
-
-# Spectrum container
-spectrum_box = spectrum_container(tk_window=main_window)
-spectrum_count = 0          # How many spectra are stored in the container
-spectrum_CIEx = []          # List the x CIE color coordinate for each spectrum
-spectrum_CIEy = []          # List the y CIE color coordinate for each spectrum
-spectrum_CIE_dict = {}      # Dictionary to associate each plotted point to its spectrum
-
-# Container for the Chromaticity Diagram and the Spectral Distribution
-plot = plot_container()
-current_sd = None           # Which Spectral Distribution is being shown
-previous_sd = None          # Which Spectral Distribution was shown last (so it can be hidden when a new one is shown)
-
-#-----------------------------------------------------------------------------
-# Global flags
-#-----------------------------------------------------------------------------
-
-confirm_exit = False                # Confirm wheter the user wants to close the program
-                                    # This will be set to True when a file is imported and to False when a file is saved
-
-show_gridlines = tk.BooleanVar()    # Display the grid lines on the Chromaticity Diagram (Default: False)
-show_gridlines.set(False)
-show_axis = tk.BooleanVar()         # Display the axis (x and y) and the bounding box on the diagram (Default: True)
-show_axis.set(True)
-show_labels = tk.BooleanVar()       # Display the numbering on each point of the graph (Default: True)
-show_labels.set(True)
-
-#-----------------------------------------------------------------------------
-# Callback functions
-#-----------------------------------------------------------------------------
-
-#--- Import spectra ---#
-
-def import_spectra(*event):
-    spectrum_box.import_files()
-
-main_window.bind("<Control-o>", import_spectra)     # Bind to the Ctrl+O shortcut
-
-
-# --- Update the window when new files are successfully loaded ---#
-
-def update_spectrum_window(event):
-    global spectrum_count, spectrum_CIEx, spectrum_CIEy, spectrum_CIE_dict, spectrum_box, canvas_CIE, confirm_exit
-
-    count_start = spectrum_count
-
-    # Populate the lists of the CIE xy color coordinates
-    for spectrum in spectrum_box[spectrum_count:]:
-        spectrum_CIEx.append(spectrum.x)
-        spectrum_CIEy.append(spectrum.y)
-    
-    # Add the the color coordinates to the treeview and the diagram
-    first_loop = True
-    for i in range(spectrum_count, len(spectrum_box)):
-        
-        # Set the background colors for the odd and even rows
-        if spectrum_count % 2 == 1:
-            format_tag = ("odd",)
-        else:
-            format_tag = ("even",)
+def main():
+    """Create the main window of SpectraChroma and run the program.
+    """
+
+    #-----------------------------------------------------------------------------
+    # Initialize the main window
+    #-----------------------------------------------------------------------------
+
+    # Create the main window and set its properties
+    main_window = tk.Tk()
+    main_window.title("SpectraChroma")      # Title that apears on the title bar at the top of the window
+    main_window.minsize(840, 590)           # This is the minimum size in which all the content remain visible
+    main_window.iconphoto(True, tk.PhotoImage(file=Path("lib", "icon.png"))) # Icon for the task bar and the window's title bar
+
+    # Force focus on the main window as soon as it is open
+    main_window.after(1, lambda: main_window.focus_force())
+    """NOTE
+    This prevents the program from being closed with Alt+F4 before it gets the focus.
+    If the program were closed this way, it would hang because the Alt+F4 event cannot
+    be intercepted if the window is nor focused. By forcing focus on the window I can
+    ensure that the program exits properly by using my clean_exit() function.
+
+    The program would hang because matplotlib would still be running on the background.
+    """
+
+    # Left column - Color and spectrum tables
+    main_window.columnconfigure(
+        0,
+        weight = 1,
+        minsize = 300
+    )
+
+    # Right column - CIE Chromaticity Diagram
+    main_window.columnconfigure(
+        1,
+        weight = 2,
+        minsize = 540,
+    )
+
+    # Top row - Toolbar
+    main_window.rowconfigure(
+        0,
+        weight = 0,     # The toolbar row height will not increase when the window is resized
+    )
+
+    # Next two rows (left column) - Tables
+    main_window.rowconfigure(
+        # Color information table
+        1,
+        weight = 2,     # When the window is resized, this row increases more than the Treeview row
+    )
+    main_window.rowconfigure(
+        # Treeview table (list of spectra and their color coordinates)
+        2,
+        weight = 1,     # When the window is resized, this row increases less than the color info row
+    )
+
+    #-----------------------------------------------------------------------------
+    # Initialise the containers
+    #-----------------------------------------------------------------------------
+
+    # Spectrum container
+    spectrum_box = spectrum_container(tk_window=main_window, cache=spectrum_cache(), storage=spectrum_storage(memory_budget=512 * 2**20))
+    spectrum_count = 0          # How many spectra are stored in the container
+    spectrum_CIE_dict = {}      # Dictionary to associate each plotted point to its spectrum
+
+    # Container for the Chromaticity Diagram and the Spectral Distribution
+    plot = plot_container(regenerate_background = "--regenerate-background" in sys.argv)
+    """NOTE
+    The colors of the diagram are loaded from the "lib" folder. Running the program with the
+    command line argument "--regenerate-background" calculates them again and overwrites the files.
+    """
+    current_sd = None           # Which spectrum has its Spectral Distribution shown
+
+    #-----------------------------------------------------------------------------
+    # Global flags
+    #-----------------------------------------------------------------------------
+
+    confirm_exit = False                # Confirm wheter the user wants to close the program
+                                        # This will be set to True when a file is imported and to False when a file is saved
+
+    show_gridlines = tk.BooleanVar()    # Display the grid lines on the Chromaticity Diagram (Default: False)
+    show_gridlines.set(False)
+    show_axis = tk.BooleanVar()         # Display the axis (x and y) and the bounding box on the diagram (Default: True)
+    show_axis.set(True)
+    show_labels = tk.BooleanVar()       # Display the numbering on each point of the graph (Default: True)
+    show_labels.set(True)
+
+    selected_observer = tk.StringVar()      # Color matching functions used on the calculations (Default: CIE 1931 2°)
+    selected_observer.set(spectrum_to_cie.cmfs.name)
+    selected_illuminant = tk.StringVar()    # Illuminant used on the calculations (Default: D65)
+    selected_illuminant.set(spectrum_to_cie.illuminant.name)
+
+    show_uncertainty = tk.BooleanVar()  # Display the uncertainty ellipses of the coordinates on the diagram (Default: False)
+    show_uncertainty.set(False)
+    noise_model = tk.StringVar()        # Noise on the spectra used to calculate the uncertainty (Default: Poisson)
+    noise_model.set("poisson")
+
+    #-----------------------------------------------------------------------------
+    # Callback functions
+    #-----------------------------------------------------------------------------
+
+    #--- Import spectra ---#
+
+    def import_spectra(*event):
+        spectrum_box.import_files()
+
+        # Tell the user which spectra were skipped because they were already imported
+        if spectrum_box.duplicates:
+            duplicate_names = [f"{name}  (same as: {existing.file_name})" for name, existing in spectrum_box.duplicates[:10]]
+            if len(spectrum_box.duplicates) > 10:
+                duplicate_names.append(f"... and {len(spectrum_box.duplicates) - 10} more")
+            showinfo(
+                parent = main_window,
+                title = "Spectra already imported",
+                message = "The following spectra were already imported, so they were skipped:\n\n" + "\n".join(duplicate_names),
+            )
+
+    main_window.bind("<Control-o>", import_spectra)     # Bind to the Ctrl+O shortcut
+
+
+    # --- Update the window when new files are successfully loaded ---#
+
+    def update_spectrum_window(event):
+        nonlocal spectrum_count, spectrum_CIE_dict, spectrum_box, canvas_CIE, confirm_exit
+
+        count_start = spectrum_count
+
+        # Calculate the CCT, Duv, dominant wavelength and purity of all new spectra at once
+        spectrum_box.calculate_metrics()
+
+        # Add the the color coordinates to the treeview and the diagram
+        first_loop = True
+        for i in range(spectrum_count, len(spectrum_box)):
+
+            # Set the background colors for the odd and even rows
+            if spectrum_count % 2 == 1:
+                format_tag = ("odd",)
+            else:
+                format_tag = ("even",)
+
+            spectrum_count += 1
+
+            # Append the data to the treeview
+            CIE_point = tree_spectrum.insert(
+                parent = "",
+                index = tk.END,
+                text = f"{spectrum_count:>2}. {spectrum_box[i].file_name}",
+                values = tree_values(spectrum_box[i]),
+                tags = format_tag
+            )
+            """NOTE:
+            On the first column, if the spectrum count is a single digit, then it gets a white space added to its left.
+            This way the labels look better, because all the periods after the count get aligned vertically (on counts up to 99).
+            If the count goes to the 3 digits, the periods just get misaligned. I doubt that anyone is going to add 100+ files,
+            and even if they do the misalignment will be hardly a problem on longer labels.
+
+            On a related note, for the Treeview the coordinates values get rounded to 3 decimals. This is the precision normally
+            seen on literature, and 3 decimals on each coordinate (x,y) already covers one million different colors. Any more
+            decimals would hardly produce any difference on the perceived color, plus it likely is beyond the experimental error.
+
+            The plotting still uses the maximum precision provided by Python.
+            """
+
+            # Update the dictionary that holds which item corresponds to which spectrum in the container
+            spectrum_CIE_dict.update({CIE_point: spectrum_box[i]})
+
+            # Stores the ID of first imported item, so it can be highlighted on the treeview
+            if first_loop:
+                first_item = CIE_point
+                first_loop = False
+
+        # Change the selection to the first imported item, if no more than 1 item is already selected
+        if len(tree_spectrum.selection()) <= 1:
+            tree_spectrum.selection_set(first_item)
+
+        # Change the focus to the first imported item
+        tree_spectrum.focus(first_item)
+
+        # Plot the point to the spectra
+        CIE_coordinate = spectrum_box.get_xy()
+        plot.plot_cie(CIE_coordinate["x"][count_start:spectrum_count], CIE_coordinate["y"][count_start:spectrum_count])
+        update_uncertainty(draw=False)
+        plot.redraw_cie()
+
+        # The spectral distribution of each new spectrum is only plotted when the spectrum is selected (see update_color_info)
 
-        spectrum_count += 1
+        # Turn on exit confirmation
+        confirm_exit = True
 
-        # Append the data to the treeview
-        CIE_point = tree_spectrum.insert(
-            parent = "",
-            index = tk.END,
-            text = f"{spectrum_count:>2}. {spectrum_box[i].file_name}",
-            values = (f"{spectrum_CIEx[i]:.3f}", f"{spectrum_CIEy[i]:.3f}", f"{1.0 - spectrum_CIEx[i] - spectrum_CIEy[i]:.3f}"),
-            tags = format_tag
+        # Enable menu options
+        menu_file.entryconfigure(5, state=tk.NORMAL)    # File > Save spectral distribution
+        menu_file.entryconfigure(6, state=tk.NORMAL)    # File > Export coordinates
+        menu_edit.entryconfigure(4, state=tk.NORMAL)    # Edit > Select all spectra
+        menu_edit.entryconfigure(5, state=tk.NORMAL)    # Edit > Delete selected spectra
+        menu_edit.entryconfigure(6, state=tk.NORMAL)    # Edit > Delete all spectra
+        menu_edit.entryconfigure(7, state=tk.NORMAL)    # Edit > Process selected spectra
+
+    # Bind the update function to the "Files Imported" event
+    main_window.bind("<<FilesImported>>", update_spectrum_window)
+
+
+    #--- Importing a series of spectra ---#
+
+    def import_series(*event):
+        spectrum_box.import_series()
+
+    def update_series_window(event):
+        nonlocal confirm_exit
+
+        # Draw the path of the last imported series
+        plot.plot_series(spectrum_box.series[-1])
+        plot.redraw_cie()
+
+        # Turn on exit confirmation
+        confirm_exit = True
+
+    main_window.bind("<<SeriesImported>>", update_series_window)
+
+
+    #--- Saving the CIE diagram ---#
+
+    def save_diagram(*event):
+        toolbar.save_figure()
+
+    def disable_exit_confirmation(*event):
+        nonlocal confirm_exit
+        confirm_exit = False
+
+    main_window.bind("<<FigureSaved>>", disable_exit_confirmation)  # Turn off exit confirmation when the diagram is saved
+    main_window.bind("<Control-s>", save_diagram)                   # Bind diagram saving to the Ctrl+S shortcut
+
+    #--- Values of a spectrum on the Treeview ---#
+
+    def format_metric(value, format_spec):
+        """Format a number as text, or return an empty text if the value is not defined (NaN).
+        """
+        return "" if value != value else format(value, format_spec)    # NaN is the only value not equal to itself
+
+    def tree_values(spectrum):
+        """Returns a tuple with the texts of each column of the Treeview, for a spectrum.
+        """
+        return (
+            f"{spectrum.x:.3f}",                                      # CIE x
+            f"{spectrum.y:.3f}",                                      # CIE y
+            f"{1.0 - spectrum.x - spectrum.y:.3f}",                   # CIE z
+            format_metric(spectrum.CCT, ".0f"),                       # Correlated color temperature (K)
+            format_metric(spectrum.Duv, ".4f"),                       # Distance from the Planckian locus
+            format_metric(spectrum.dominant_wavelength, ".1f"),       # Dominant wavelength (nm)
+            format_metric(spectrum.complementary_wavelength, ".1f"),  # Complementary wavelength (nm)
+            format_metric(spectrum.purity, ".3f"),                    # Excitation purity
         )
-        """NOTE:
-        On the first column, if the spectrum count is a single digit, then it gets a white space added to its left.
-        This way the labels look better, because all the periods after the count get aligned vertically (on counts up to 99).
-        If the count goes to the 3 digits, the periods just get misaligned. I doubt that anyone is going to add 100+ files,
-        and even if they do the misalignment will be hardly a problem on longer labels.
 
-        On a related note, for the Treeview the coordinates values get rounded to 3 decimals. This is the precision normally
-        seen on literature, and 3 decimals on each coordinate (x,y) already covers one million different colors. Any more
-        decimals would hardly produce any difference on the perceived color, plus it likely is beyond the experimental error.
 
-        The plotting still uses the maximum precision provided by Python.
+    #--- Convert RGB color to hexadecimal (HTML representation)---#
+
+    def rgb_to_hex(color_RGB):
+        """Takes a sequence of 3 elements (each one a integer from 0 to 255), representing a RGB color.
+        Returns the HTML representation of the color (hexadecimal): #RRGGBB
         """
-        
-        # Update the dictionary that holds which item corresponds to which spectrum in the container
-        spectrum_CIE_dict.update({CIE_point: spectrum_box[i]})
-        
-        # Stores the ID of first imported item, so it can be highlighted on the treeview
-        if first_loop:
-            first_item = CIE_point
-            first_loop = False
-        
-    # Change the selection to the first imported item, if no more than 1 item is already selected
-    if len(tree_spectrum.selection()) <= 1:
-        tree_spectrum.selection_set(first_item)
-    
-    # Change the focus to the first imported item
-    tree_spectrum.focus(first_item)
-
-    # Plot the point to the spectra
-    plot.plot_cie(spectrum_CIEx[count_start:spectrum_count], spectrum_CIEy[count_start:spectrum_count])
-    canvas_CIE.draw()
 
-    # Create the spectral distribution for each new spectrum
-    plot.plot_sd(spectrum_box[count_start:spectrum_count])
+        color_hex = hex((color_RGB[0] << 16) | (color_RGB[1] << 8) | (color_RGB[2]))    # Convert the color values to hexadecimal
+        color_hex = color_hex.replace("0x", "", 1)  # Remove the "0x" from the beginning
+        color_hex = color_hex.rjust(6, "0")         # Ensure that the string is 6 characters long (fill with leading "0", if needed)
+        color_hex = "#" + color_hex                 # Add a "#" to the beginning
 
-    # Turn on exit confirmation
-    confirm_exit = True
+        return color_hex
 
-    # Enable menu options
-    menu_file.entryconfigure(4, state=tk.NORMAL)    # File > Save spectral distribution
-    menu_file.entryconfigure(5, state=tk.NORMAL)    # File > Export coordinates
-    menu_edit.entryconfigure(4, state=tk.NORMAL)    # Edit > Select all spectra
-    menu_edit.entryconfigure(5, state=tk.NORMAL)    # Edit > Delete selected spectra
-    menu_edit.entryconfigure(6, state=tk.NORMAL)    # Edit > Delete all spectra
 
-# Bind the update function to the "Files Imported" event
-main_window.bind("<<FilesImported>>", update_spectrum_window)
+    #--- Exporting the coordinates to a text file ---#
 
+    def export_coordinates(*event):
 
-#--- Saving the CIE diagram ---#
+        if menu_file.entrycget(6, "state") == tk.DISABLED:
+            return False    # Exit the funtion when there is no data to be exported
 
-def save_diagram(*event):
-    toolbar.save_figure()
+        save_path = asksaveasfilename(
+            parent =  main_window,
+            title = "Exporting CIE color coordinates",
+            defaultextension = "",
+            filetypes = (("Microsoft Excel spreadsheet (*.xlsx)", "*.xlsx"), ("Text file (*.txt)", "*.txt")),
+        )
 
-def disable_exit_confirmation(*event):
-    global confirm_exit
-    confirm_exit = False
+        if save_path == "":
+            return False
 
-main_window.bind("<<FigureSaved>>", disable_exit_confirmation)  # Turn off exit confirmation when the diagram is saved
-main_window.bind("<Control-s>", save_diagram)                   # Bind diagram saving to the Ctrl+S shortcut
+        if save_path.endswith(".xlsx"):     # File is being saved as Microsoft Excel spreadsheet
+
+            workbook = excel.Workbook(save_path)            # Create the workbook (a colection of spreadsheets)
+            worksheet = workbook.add_worksheet("CIE 1931")  # Create a spreadsheet on the workbook
+
+            # Format the first row to bold
+            bold = workbook.add_format({'bold': True})
+            worksheet.set_row(0, None, bold)
+
+            # Write the title headers on the first row
+            worksheet.write(0, 0, "Spectrum")   # Column A
+            worksheet.write(0, 1, "CIE x")      # Column B
+            worksheet.write(0, 2, "CIE y")      # Column C
+            worksheet.write(0, 3, "CIE z")      # Column D
+            worksheet.write(0, 4, "RGB color")  # Column E
+            worksheet.write(0, 5, "CCT (K)")                        # Column F
+            worksheet.write(0, 6, "Duv")                            # Column G
+            worksheet.write(0, 7, "Dominant wavelength (nm)")       # Column H
+            worksheet.write(0, 8, "Complementary wavelength (nm)")  # Column I
+            worksheet.write(0, 9, "Excitation purity")              # Column J
+
+            # Loop through all spectra and write their color coordinates to the spreadsheet
+            for row, spectrum in enumerate(spectrum_CIE_dict.values(), 1):
+
+                # Get the RGB color and use it as the background of its own cell
+                color_RGB = tuple(int(255 * color) for color in spectrum.RGB)
+                color_hex = rgb_to_hex(color_RGB)
+                background = workbook.add_format({"bg_color" : color_hex})
+
+                # Write each cell of the row
+                worksheet.write(row, 0, spectrum.file_name)             # Spectrum
+                worksheet.write(row, 1, spectrum.x)                     # CIE x
+                worksheet.write(row, 2, spectrum.y)                     # CIE y
+                worksheet.write(row, 3, 1.0 - spectrum.x - spectrum.y)  # CIE z
+                worksheet.write(row, 4, str(color_RGB), background)     # RGB color
+
+                # Write the metrics (the cell is left empty when a metric is not defined for the spectrum)
+                metrics = (spectrum.CCT, spectrum.Duv, spectrum.dominant_wavelength, spectrum.complementary_wavelength, spectrum.purity)
+                for column, value in enumerate(metrics, 5):
+                    if value == value:                                  # Skip NaN (the only value not equal to itself)
+                        worksheet.write(row, column, value)
+
+            # Enlarge the columns A (Spectrum) and E (RBG color), so their contents are better displayed
+            worksheet.set_column(0, 0, 30)          # 30 numeric characters wide
+            worksheet.set_column_pixels(4, 4, 95)   # 95 pixels wide
+            worksheet.set_column(5, 9, 16)          # Columns F to J (metrics): 16 numeric characters wide
+            """NOTE
+            It is not possible to do an "auto fit" column through code, only when viewing the file on Excel.
+            The correlation between the width of the column and the number of characters is not trivial,
+            it depends on the screen resolution and the default font (which can have variable character width).
+            More info: https://docs.microsoft.com/en-US/office/troubleshoot/excel/determine-column-widths
+                       https://xlsxwriter.readthedocs.io/worksheet.html#set_column
+
+            That width is based on numeric characters, however the file names usually use mostly letters.
+            It is perhaps not possibly the reliably calculate the maximum width of the text in Column A.
+            So I instead just set it to a reasonable value so most of the text can be shown.
+            """
 
-#--- Convert RGB color to hexadecimal (HTML representation)---#
+            try:
+                workbook.close()    # Finish writing to the workbook and save the file
+            except excel.exceptions.FileCreateError:
+                # Display a error if the file was already in use
+                showerror(
+                    master = main_window,
+                    title = "Save error",
+                    message = f"Could not save to {save_path}\nThe file is already in use by another program."
+                )
+                print(f"Error: Could not save to {save_path} - The file is already in use by another program.")
+                del worksheet
+                del workbook
+
+        else:   # File is being saved as plain text
 
-def rgb_to_hex(color_RGB):
-    """Takes a sequence of 3 elements (each one a integer from 0 to 255), representing a RGB color.
-    Returns the HTML representation of the color (hexadecimal): #RRGGBB
-    """
+            try:
+                with open(save_path, "w") as file:
 
-    color_hex = hex((color_RGB[0] << 16) | (color_RGB[1] << 8) | (color_RGB[2]))    # Convert the color values to hexadecimal
-    color_hex = color_hex.replace("0x", "", 1)  # Remove the "0x" from the beginning
-    color_hex = color_hex.rjust(6, "0")         # Ensure that the string is 6 characters long (fill with leading "0", if needed)
-    color_hex = "#" + color_hex                 # Add a "#" to the beginning
+                    # Write the header titles
+                    file.write(f"{'Spectrum':<20}\tCIE x\tCIE y\tCIE z\tRGB color\tCCT (K)\tDuv\tDominant (nm)\tComplementary (nm)\tPurity\n")
 
-    return color_hex
+                    # Loop through each spectrum and write its color coordinates to a new line
+                    for spectrum in spectrum_CIE_dict.values():
+                        color_RGB = tuple(int(255 * color) for color in spectrum.RGB)
+                        metrics = "\t".join(tree_values(spectrum)[3:])  # CCT, Duv, dominant and complementary wavelengths, purity
+                        line = f"{spectrum.file_name:<20}\t{spectrum.x:.3f}\t{spectrum.y:.3f}\t{1.0 - spectrum.x - spectrum.y:.3f}\t{color_RGB}\t{metrics}\n"
+                        file.write(line)
 
+            except PermissionError:
+                # Display a error if the file was already in use
+                showerror(
+                    master = main_window,
+                    title = "Save error",
+                    message = f"Could not save to {save_path}\nThe file is already in use by another program."
+                )
+                print(f"Error: Could not save to {save_path} - The file is already in use by another program.")
 
-#--- Exporting the coordinates to a text file ---#
+    main_window.bind("<Control-e>", export_coordinates)
 
-def export_coordinates(*event):
 
-    if menu_file.entrycget(5, "state") == tk.DISABLED:
-        return False    # Exit the funtion when there is no data to be exported
-    
-    save_path = asksaveasfilename(
-        parent =  main_window,
-        title = "Exporting CIE color coordinates",
-        defaultextension = "",
-        filetypes = (("Microsoft Excel spreadsheet (*.xlsx)", "*.xlsx"), ("Text file (*.txt)", "*.txt")),
-    )
-    
-    if save_path == "":
-        return False
+    #--- Saving and opening sessions ---#
 
-    if save_path.endswith(".xlsx"):     # File is being saved as Microsoft Excel spreadsheet
-        
-        workbook = excel.Workbook(save_path)            # Create the workbook (a colection of spreadsheets)
-        worksheet = workbook.add_worksheet("CIE 1931")  # Create a spreadsheet on the workbook
-
-        # Format the first row to bold
-        bold = workbook.add_format({'bold': True})
-        worksheet.set_row(0, None, bold)
-
-        # Write the title headers on the first row
-        worksheet.write(0, 0, "Spectrum")   # Column A
-        worksheet.write(0, 1, "CIE x")      # Column B
-        worksheet.write(0, 2, "CIE y")      # Column C
-        worksheet.write(0, 3, "CIE z")      # Column D
-        worksheet.write(0, 4, "RGB color")  # Column E
-
-        # Loop through all spectra and write their color coordinates to the spreadsheet
-        for row, spectrum in enumerate(spectrum_CIE_dict.values(), 1):
-
-            # Get the RGB color and use it as the background of its own cell
-            color_RGB = tuple(int(255 * color) for color in spectrum.RGB)
-            color_hex = rgb_to_hex(color_RGB)
-            background = workbook.add_format({"bg_color" : color_hex})
-
-            # Write each cell of the row
-            worksheet.write(row, 0, spectrum.file_name)             # Spectrum
-            worksheet.write(row, 1, spectrum.x)                     # CIE x
-            worksheet.write(row, 2, spectrum.y)                     # CIE y
-            worksheet.write(row, 3, 1.0 - spectrum.x - spectrum.y)  # CIE z
-            worksheet.write(row, 4, str(color_RGB), background)     # RGB color
-
-        # Enlarge the columns A (Spectrum) and E (RBG color), so their contents are better displayed
-        worksheet.set_column(0, 0, 30)          # 30 numeric characters wide
-        worksheet.set_column_pixels(4, 4, 95)   # 95 pixels wide
-        """NOTE
-        It is not possible to do an "auto fit" column through code, only when viewing the file on Excel.
-        The correlation between the width of the column and the number of characters is not trivial,
-        it depends on the screen resolution and the default font (which can have variable character width).
-        More info: https://docs.microsoft.com/en-US/office/troubleshoot/excel/determine-column-widths
-                   https://xlsxwriter.readthedocs.io/worksheet.html#set_column
-        
-        That width is based on numeric characters, however the file names usually use mostly letters.
-        It is perhaps not possibly the reliably calculate the maximum width of the text in Column A.
-        So I instead just set it to a reasonable value so most of the text can be shown.
-        """
+    session_filetypes = (("SpectraChroma session (*.spectrachroma)", "*.spectrachroma"),)
 
-        try:
-            workbook.close()    # Finish writing to the workbook and save the file
-        except excel.exceptions.FileCreateError:
-            # Display a error if the file was already in use
+    def save_session(*event):
+        nonlocal confirm_exit
+
+        if (spectrum_count == 0) and (len(spectrum_box.series) == 0):
+            return False    # Exit the function when there is nothing to be saved
+
+        save_path = asksaveasfilename(
+            parent = main_window,
+            title = "Saving session",
+            defaultextension = ".spectrachroma",
+            filetypes = session_filetypes,
+        )
+
+        if save_path == "":
+            return False
+
+        # Options of the diagram, restored when the session is opened
+        settings = {
+            "show_gridlines": show_gridlines.get(),
+            "show_axis": show_axis.get(),
+            "show_labels": show_labels.get(),
+            "show_uncertainty": show_uncertainty.get(),
+            "noise_model": noise_model.get(),
+        }
+
+        if spectrum_box.save_session(save_path, settings):
+            confirm_exit = False    # Turn off exit confirmation because the work was saved
+        else:
             showerror(
                 master = main_window,
                 title = "Save error",
                 message = f"Could not save to {save_path}\nThe file is already in use by another program."
             )
-            print(f"Error: Could not save to {save_path} - The file is already in use by another program.")
-            del worksheet
-            del workbook
-    
-    else:   # File is being saved as plain text
-
-        try:
-            with open(save_path, "w") as file:
-
-                # Write the header titles
-                file.write(f"{'Spectrum':<20}\tCIE x\tCIE y\tCIE z\tRGB color\n")
-                
-                # Loop through each spectrum and write its color coordinates to a new line
-                for spectrum in spectrum_CIE_dict.values():
-                    color_RGB = tuple(int(255 * color) for color in spectrum.RGB)
-                    line = f"{spectrum.file_name:<20}\t{spectrum.x:.3f}\t{spectrum.y:.3f}\t{1.0 - spectrum.x - spectrum.y:.3f}\t{color_RGB}\n"
-                    file.write(line)
-        
-        except PermissionError:
-            # Display a error if the file was already in use
+
+    def open_session(*event):
+        nonlocal confirm_exit
+
+        open_path = askopenfilename(
+            parent = main_window,
+            title = "Opening session",
+            filetypes = session_filetypes,
+        )
+
+        if open_path == "":
+            return False
+
+        series_start = len(spectrum_box.series)
+        settings = spectrum_box.load_session(open_path)
+        if settings is None:
             showerror(
                 master = main_window,
-                title = "Save error",
-                message = f"Could not save to {save_path}\nThe file is already in use by another program."
+                title = "Open error",
+                message = f"Could not open {open_path}\nThe file is not a valid session."
             )
-            print(f"Error: Could not save to {save_path} - The file is already in use by another program.")
+            return False
 
-main_window.bind("<Control-e>", export_coordinates)
+        # Restore the options of the diagram
+        show_gridlines.set(settings.get("show_gridlines", False))
+        show_axis.set(settings.get("show_axis", True))
+        show_labels.set(settings.get("show_labels", True))
+        show_uncertainty.set(settings.get("show_uncertainty", False))
+        noise_model.set(settings.get("noise_model", "poisson"))
+        toggle_gridlines()
+        toggle_axis()
+        toggle_labels()
 
+        # The observer and the illuminant of the session are used if the diagram was empty
+        selected_observer.set(spectrum_to_cie.cmfs.name)
+        selected_illuminant.set(spectrum_to_cie.illuminant.name)
 
-#--- Exporting the Spectral Distribution ---#
+        # Add the spectra and the series to the window
+        if len(spectrum_box) > spectrum_count:
+            update_spectrum_window(None)
+        for series in spectrum_box.series[series_start:]:
+            plot.plot_series(series)
+        plot.redraw_cie()
 
-def save_sd(*event):
-    if current_sd:
-        plot.save_sd(current_sd)
+        confirm_exit = False    # The diagram is the same as the saved session
 
-# Bind the function to the Ctrl+D shortcut
-main_window.bind("<Control-d>", save_sd)
 
-# --- Updating the color information frame
-def update_color_info(event):
-    """ Updates automatically the color information frame when the user select a single spectrum.
-    """
-    global cell_spectrum_title, cell_x_value_text, cell_y_value_text, cell_z_value_text, canvas_sd, \
-        current_sd, previous_sd
+    #--- Exporting the Spectral Distribution ---#
 
-    selected = tree_spectrum.selection()
-    if len(selected) != 1:
-        return False
-    """NOTE
-    I am doing the logic based on the selected items, instead of the focused item
-    because of two reasons:
-      1. It's more obvious to the user which item is active, because the focus is shown more subtly
-      2. In order for the focus to work, the user would need to click on the Treeview.
-         I want the information to update automatically to the latest imported spectrum, and that
-         wouldn't happen if it was based on focus (item focus cannot change unless the Treeview is
-         also focused).
-    
-    I am checking if exactly one item is selected so the frame does not keep updating while the user
-    is doing a multiple selection with Ctrl held and clicking. That would be annoying and potentially
-    also slow down the selection.
-    """
+    def save_sd(*event):
+        if current_sd:
+            plot.save_sd(current_sd)
 
-    point = selected[0]
-    spectrum = spectrum_CIE_dict[point]
+    # Bind the function to the Ctrl+D shortcut
+    main_window.bind("<Control-d>", save_sd)
 
-    # Display the spectrum's title
-    cell_spectrum_title["text"] = tree_spectrum.item(point, option="text")
+    # --- Updating the color information frame
+    def update_color_info(event):
+        """ Updates automatically the color information frame when the user select a single spectrum.
+        """
+        nonlocal cell_spectrum_title, cell_x_value_text, cell_y_value_text, cell_z_value_text, canvas_sd, \
+            current_sd
 
-    # Get CIE coordinates from the Treeview and display them on the color info frame
-    CIE = tree_spectrum.item(point, option="values")
-    cell_x_value_text.set(CIE[0])
-    cell_y_value_text.set(CIE[1])
-    cell_z_value_text.set(CIE[2])
+        selected = tree_spectrum.selection()
+        if len(selected) != 1:
+            return False
+        """NOTE
+        I am doing the logic based on the selected items, instead of the focused item
+        because of two reasons:
+          1. It's more obvious to the user which item is active, because the focus is shown more subtly
+          2. In order for the focus to work, the user would need to click on the Treeview.
+             I want the information to update automatically to the latest imported spectrum, and that
+             wouldn't happen if it was based on focus (item focus cannot change unless the Treeview is
+             also focused).
+
+        I am checking if exactly one item is selected so the frame does not keep updating while the user
+        is doing a multiple selection with Ctrl held and clicking. That would be annoying and potentially
+        also slow down the selection.
+        """
 
-    # Get the RGB color from the spectrum and display the color
-    color_RGB = [int(255 * color) for color in spectrum.RGB]    # Integer list [Red, Green, Blue] on the 0..255 range
-    color_hex = rgb_to_hex(color_RGB)                           # Convert the color to the hexadecimal format: #RRGGBB
-    cell_color_display["bg"] = color_hex                        # Display the color
+        point = selected[0]
+        spectrum = spectrum_CIE_dict[point]
 
-    # Update the Spectral Distribution
-    previous_sd = current_sd            # Store the previous Spectral Distribution
-    current_sd = plot.ax_sd[spectrum]   # Get the current distribution
-    if previous_sd:
-        previous_sd.set_visible(False)  # Switch off the previous distribution
-    current_sd.set_visible(True)        # Switch on the current distribution
-    canvas_sd.draw()                    # Update the canvas so the distribution is shown
+        # Display the spectrum's title
+        cell_spectrum_title["text"] = tree_spectrum.item(point, option="text")
 
-# Bind the function to the Treeview Select event
-main_window.bind("<<TreeviewSelect>>", update_color_info)
+        # Get CIE coordinates from the Treeview and display them on the color info frame
+        CIE = tree_spectrum.item(point, option="values")
+        cell_x_value_text.set(CIE[0])
+        cell_y_value_text.set(CIE[1])
+        cell_z_value_text.set(CIE[2])
 
+        # Get the RGB color from the spectrum and display the color
+        color_RGB = [int(255 * color) for color in spectrum.RGB]    # Integer list [Red, Green, Blue] on the 0..255 range
+        color_hex = rgb_to_hex(color_RGB)                           # Convert the color to the hexadecimal format: #RRGGBB
+        cell_color_display["bg"] = color_hex                        # Display the color
 
-#--- Clear the values of color info frame ---#
+        # Update the Spectral Distribution
+        current_sd = spectrum               # Store the current spectrum
+        plot.show_sd(spectrum)              # Swap the data of the distribution's plot
+        canvas_sd.draw()                    # Update the canvas so the distribution is shown
 
-def reset_color_info(*event):
-    """Remove the values from the color info frame.
-    This function will be called when no items on the Treeview are selected.
-    """
-    global previous_sd, current_sd
-    
-    cell_spectrum_title["text"] = "Please select or add a spectrum to display its color coordinate"
-    cell_x_value_text.set("")
-    cell_y_value_text.set("")
-    cell_z_value_text.set("")
-    cell_color_display["bg"] = "#f0f0f0"
+    # Bind the function to the Treeview Select event
+    main_window.bind("<<TreeviewSelect>>", update_color_info)
 
-    if current_sd:
-        current_sd.set_visible(False)
-    canvas_sd.draw()
-    current_sd = None
-    previous_sd = None
 
+    #--- Clear the values of color info frame ---#
 
-#--- Toggle grid lines on the Chromaticity Diagram ---#
+    def reset_color_info(*event):
+        """Remove the values from the color info frame.
+        This function will be called when no items on the Treeview are selected.
+        """
+        nonlocal current_sd
 
-def toggle_gridlines(*event, reset=False):
-    """Switch on/off the gridlines on the Chromaticity Diagram
-    """
-    
-    if len(event) > 0:
-        shortcut = True
-    else:
-        shortcut = False
-    """NOTE
-    If the "event" argument was sent to the function, then that means that
-    the function was activated by its shortcut key rather than chosen on
-    the menu.
-    So len(event) will always be 0 when the function is activated by the
-    menu, and will be 1 when activated by the shortcut.
-    This is important because the option flag is switched automatically
-    when actiavted through the menu, but in the case of a shortcut being used
-    I need to switch through my code.
-    """
-    
-    # Toggle the variable if the shortcut key was used
-    if shortcut:
-        old_value = show_gridlines.get()
-        show_gridlines.set(not old_value)
-    elif reset:
-        show_gridlines.set(False)
-    
-    # Display or remove the grid lines
-    if show_gridlines.get():    # Grid lines are enabled
-        plot.ax_CIE.grid(alpha = 0.3)
-        canvas_CIE.draw()
-    
-    else:                       # Grid lines are disabled
-        plot.ax_CIE.grid(False)
-        canvas_CIE.draw()
-
-# Bind the function to the F2 shortcut
-main_window.bind("<F2>", toggle_gridlines)
-
-
-#--- Toggle grid lines on the Chromaticity Diagram ---#
-
-def toggle_axis(*event, reset=False):
-    """Switch on/off the axes on the Chromaticity Diagram
-    """
-    
-    # Verify if the shortcut key was used
-    if len(event) > 0:
-        shortcut = True
-    else:
-        shortcut = False
-    
-    # Toggle the variable if the shortcut key was used
-    if shortcut:
-        old_value = show_axis.get()
-        show_axis.set(not old_value)
-    elif reset:
-        show_axis.set(True)
-    
-    # Display or remove the grid lines
-    if show_axis.get():                     # Axes are enabled
-        plot.ax_CIE.axis("on")              # Display axes
-        plot.title_CIE.set_visible(True)    # Display title
-        canvas_CIE.draw()
-    
-    else:                                   # Axes are disabled
-        plot.ax_CIE.axis("off")             # Hide axes
-        plot.title_CIE.set_visible(False)   # Hide title
-        canvas_CIE.draw()
-
-# Bind the function to the F3 shortcut
-main_window.bind("<F3>", toggle_axis)
-
-
-#--- Toggle labels on the Chromaticity Diagram ---#
-
-def toggle_labels(*event, reset=False):
-    """Switch on/off the data labels on the Chromaticity Diagram
-    """
-    
-    # Verify if the shortcut key was used
-    if len(event) > 0:
-        shortcut = True
-    else:
-        shortcut = False
-    
-    # Toggle the variable if the shortcut key was used
-    if shortcut:
-        old_value = show_labels.get()
-        show_labels.set(not old_value)
-    elif reset:
-        show_labels.set(True)
-    
-    # Display or remove the grid lines
-    if show_labels.get():           # Labels are enabled
-        plot.show_labels_cie(True)  # Display labels
-        canvas_CIE.draw()
-    
-    else:                           # Labels are disabled
-        plot.show_labels_cie(False) # Hide labels
-        canvas_CIE.draw()
-
-# Bind the function to the F4 shortcut
-main_window.bind("<F4>", toggle_labels)
-
-
-#--- Deleting points from the diagram ---#
-
-def delete_selected(*event, do_confirmation=True):
-    """Remove from the diagram the points selected on the Treeview
-    """
-    
-    # Get the current selection from the Treeview
-    selected_items = tree_spectrum.selection()
-    selected_amount = len(selected_items)
-
-    if selected_amount == 0:
-        return False
-    
-    # Whether the user is pressing the Shift key (True or False)
-    if len(event) > 0:
-        shift_key = bool(event[0].state & 0x0001)
-    else:
-        shift_key = False
-    """NOTE
-    The .state attribute returns a mask that tells which modifiers keys are active.
-    The hexadecimal mask 0x0001 corresponds to the Shift key, so I am performing
-    the bitwise AND to the state mask in order to check if the Shift key is active.
-    
-    The following page has a table of modifier key masks:
-    https://anzeljg.github.io/rin2/book2/2405/docs/tkinter/event-handlers.html
-    
-    The "event" argument isn't passed when the function is called through the
-    menu, only when the Delete key is pressed. So the items are only deleted
-    without confirmation if the user press Shift+Del
-    This behaviour is desired, since I always want a confirmation when deleting
-    through the menu.
-    """
-    
-    def do_deletion():
-        global confirm_exit, spectrum_count, spectrum_CIEx, spectrum_CIEy, spectrum_CIE_dict
-
-        # Delete the selected data from the containers
-        for item in selected_items:
-            spectrum = spectrum_CIE_dict[item]  # Spectrum handler
-            
-            # Remove spectrum from its container
-            spectrum_box.id.remove(spectrum)
-            
-            # Remove the spectral distribution from its container
-            plot.ax_sd[spectrum].cla()      # Clear axis
-            plot.ax_sd[spectrum].remove()   # Delete axis
-            del plot.ax_sd[spectrum]        # Delete its entry on the axis dictionary
-            
-            # Remove spectrum from the CIE coordinates dictionary
-            del spectrum_CIE_dict[item]
-        
-        # Rebuild the lists of CIEx and CIEy coordinates
-        """NOTE
-        I am aware that those lists might be a little redundant with the spectrum_CIE_dict[], maybe
-        it would be easier to just associate each spectrum to its coordinates. However when I started
-        developing this program an ordered list just seemed to make more sense, and later it got clear
-        that a dictionary would be necessary.
+        cell_spectrum_title["text"] = "Please select or add a spectrum to display its color coordinate"
+        cell_x_value_text.set("")
+        cell_y_value_text.set("")
+        cell_z_value_text.set("")
+        cell_color_display["bg"] = "#f0f0f0"
 
-        Now I do not want to completely remove the lists, because that could break the file importing logic.
-        And also because reading the data from an ordered list is still faster than reading from an
-        unordered dictionary. So at the very least the file importing is more efficient, when speed is
-        concerned :-)
+        plot.hide_sd()
+        canvas_sd.draw()
+        current_sd = None
 
-        Just clearing and rebuilding the list from scratch should do the trick to keep data consistecy.
+
+    #--- Toggle grid lines on the Chromaticity Diagram ---#
+
+    def toggle_gridlines(*event, reset=False):
+        """Switch on/off the gridlines on the Chromaticity Diagram
         """
-        spectrum_CIEx.clear()
-        spectrum_CIEy.clear()
-        CIE_coordinate = spectrum_box.get_xy()
-        spectrum_CIEx.extend(CIE_coordinate["x"])
-        spectrum_CIEy.extend(CIE_coordinate["y"])
-        spectrum_count = len(spectrum_CIEx)
 
-        # Plot the remaining points to the Chromaticity Diagram
+        if len(event) > 0:
+            shortcut = True
+        else:
+            shortcut = False
         """NOTE
-        Similarly to above, just rebuilding the diagram's points is easier than removing only specific points and
-        renumbering them.
+        If the "event" argument was sent to the function, then that means that
+        the function was activated by its shortcut key rather than chosen on
+        the menu.
+        So len(event) will always be 0 when the function is activated by the
+        menu, and will be 1 when activated by the shortcut.
+        This is important because the option flag is switched automatically
+        when actiavted through the menu, but in the case of a shortcut being used
+        I need to switch through my code.
+        """
+
+        # Toggle the variable if the shortcut key was used
+        if shortcut:
+            old_value = show_gridlines.get()
+            show_gridlines.set(not old_value)
+        elif reset:
+            show_gridlines.set(False)
+
+        # Display or remove the grid lines
+        if show_gridlines.get():    # Grid lines are enabled
+            plot.ax_CIE.grid(alpha = 0.3)
+            canvas_CIE.draw()
+
+        else:                       # Grid lines are disabled
+            plot.ax_CIE.grid(False)
+            canvas_CIE.draw()
 
-        I am assuming that people will not import hundreds of spectra, which would make my approach ineficient.
-        But realistically speaking, there's no need to import that big amount. Usually what I saw was 4 or 5 at
-        most, but even with a few dozens spectra this program still run fast.
+    # Bind the function to the F2 shortcut
+    main_window.bind("<F2>", toggle_gridlines)
+
+
+    #--- Toggle grid lines on the Chromaticity Diagram ---#
+
+    def toggle_axis(*event, reset=False):
+        """Switch on/off the axes on the Chromaticity Diagram
         """
-        plot.flush_cie()                                    # Clear the diagram's points
-        if spectrum_count > 0:
-            plot.plot_cie(spectrum_CIEx, spectrum_CIEy)     # Plot the points of the remaining spectra
-            confirm_exit = True                             # Turn on exit confirmation because the diagram has changed
+
+        # Verify if the shortcut key was used
+        if len(event) > 0:
+            shortcut = True
         else:
-            confirm_exit = False                            # Turn off exit confirmation because there are no remaining spectra
-            menu_file.entryconfigure(4, state=tk.DISABLED)  # Disable menu option: File > Save spectral distribution
-            menu_file.entryconfigure(5, state=tk.DISABLED)  # Disable menu option: File > Export coordinates
-            menu_edit.entryconfigure(4, state=tk.DISABLED)  # Disable menu option: Edit > Select all spectra
-            menu_edit.entryconfigure(5, state=tk.DISABLED)  # Disable menu option: Edit > Remove selected spectra
-            menu_edit.entryconfigure(6, state=tk.DISABLED)  # Disable menu option: Edit > Remove all spectra
-        
-        canvas_CIE.draw()                                   # Update the diagram's canvas
+            shortcut = False
 
-        # Delete the selected items from the Treeview
-        tree_spectrum.delete(*selected_items)
+        # Toggle the variable if the shortcut key was used
+        if shortcut:
+            old_value = show_axis.get()
+            show_axis.set(not old_value)
+        elif reset:
+            show_axis.set(True)
+
+        # Display or remove the grid lines
+        if show_axis.get():                     # Axes are enabled
+            plot.ax_CIE.axis("on")              # Display axes
+            plot.title_CIE.set_visible(True)    # Display title
+            canvas_CIE.draw()
+
+        else:                                   # Axes are disabled
+            plot.ax_CIE.axis("off")             # Hide axes
+            plot.title_CIE.set_visible(False)   # Hide title
+            canvas_CIE.draw()
+
+    # Bind the function to the F3 shortcut
+    main_window.bind("<F3>", toggle_axis)
 
-        # Change the selection to the first item on the Treeview
-        if spectrum_count > 0:
-            first_item = tree_spectrum.get_children()[0]
-            tree_spectrum.selection_set(first_item)
-            tree_spectrum.focus(first_item)
-        
-        # Run the garbage collector to free the memory that was being used by the removed spectra
-        gc.collect()
-    
-    # Delete without confirmation if Shift is being held
-    if shift_key:
-        do_deletion()
-    
-    # Ask whether the user wants to delete the points
-    else:
-        # Confirmation message, based on if one or more items are selected
-        if selected_amount == 1:
-            item_name = spectrum_CIE_dict[selected_items[0]].file_name    # Name of the corresponding spectrum file
-            confirmation_message = f"{item_name} will be removed from the list and diagram. Continue?"
-        else:
-            confirmation_message = f"{selected_amount} items will be removed from the list and diagram. Continue?"
-        
-        # Display the confirmation dialog
-        if do_confirmation:
-            confirmation = askyesno(
-                master = main_window,
-                title = "Confirm removal",
-                message = confirmation_message,
-                default = "no",
-            )
-        else:
-            confirmation = True
 
-        if confirmation:
-            # Delete items if the user chose "yes"
-            do_deletion()
+    #--- Toggle labels on the Chromaticity Diagram ---#
+
+    def toggle_labels(*event, reset=False):
+        """Switch on/off the data labels on the Chromaticity Diagram
+        """
+
+        # Verify if the shortcut key was used
+        if len(event) > 0:
+            shortcut = True
         else:
-            # Exit the function if the user chose "no"
+            shortcut = False
+
+        # Toggle the variable if the shortcut key was used
+        if shortcut:
+            old_value = show_labels.get()
+            show_labels.set(not old_value)
+        elif reset:
+            show_labels.set(True)
+
+        # Display or remove the grid lines
+        if show_labels.get():           # Labels are enabled
+            plot.show_labels_cie(True)  # Display labels
+            plot.redraw_cie()
+
+        else:                           # Labels are disabled
+            plot.show_labels_cie(False) # Hide labels
+            plot.redraw_cie()
+
+    # Bind the function to the F4 shortcut
+    main_window.bind("<F4>", toggle_labels)
+
+
+    #--- Deleting points from the diagram ---#
+
+    def delete_selected(*event, do_confirmation=True):
+        """Remove from the diagram the points selected on the Treeview
+        """
+
+        # Get the current selection from the Treeview
+        selected_items = tree_spectrum.selection()
+        selected_amount = len(selected_items)
+
+        if selected_amount == 0:
             return False
-    
-    # Reset the color info frame
-    reset_color_info()
-    
-    # Renumber and recolor the background of the Treeview's rows
-    # (so they still keep the alternate colors while being numbered sequentially from 1)
-    
-    remaining_rows = tree_spectrum.get_children()   # Get the rows present on the Treeview
-
-    for number,row in enumerate(remaining_rows):    # Enumerate the rows and loop through then
-        
-        if number % 2 == 1:         # Odd rows
-            format_tag = ("odd",)
-        else:                       # Even rows
-            format_tag = ("even",)
-        
-        old_text = tree_spectrum.item(row, option = "text")
-        new_text = f"{(number + 1):>2}{old_text.lstrip().lstrip('0123456789')}"
+
+        # Whether the user is pressing the Shift key (True or False)
+        if len(event) > 0:
+            shift_key = bool(event[0].state & 0x0001)
+        else:
+            shift_key = False
         """NOTE
-        The first lstrip() only removes the spaces to the left,
-        while the next lstrip() removes the digits to the left.
+        The .state attribute returns a mask that tells which modifiers keys are active.
+        The hexadecimal mask 0x0001 corresponds to the Shift key, so I am performing
+        the bitwise AND to the state mask in order to check if the Shift key is active.
+
+        The following page has a table of modifier key masks:
+        https://anzeljg.github.io/rin2/book2/2405/docs/tkinter/event-handlers.html
+
+        The "event" argument isn't passed when the function is called through the
+        menu, only when the Delete key is pressed. So the items are only deleted
+        without confirmation if the user press Shift+Del
+        This behaviour is desired, since I always want a confirmation when deleting
+        through the menu.
         """
 
-        # Apply the format tag and new text
-        tree_spectrum.item(row, tags = format_tag, text = new_text)  # Apply the corresponding format tag
+        def do_deletion():
+            nonlocal confirm_exit, spectrum_count, spectrum_CIE_dict
+
+            # Delete the selected data from the containers
+            selected_spectra = [spectrum_CIE_dict.pop(item) for item in selected_items]
+            changes = spectrum_box.remove(selected_spectra)     # All spectra are removed at once
+            for spectrum in selected_spectra:
+                plot.remove_sd(spectrum)                        # Forget the limits of its spectral distribution
+            spectrum_count = len(spectrum_box)
+
+            # Remove the points from the Chromaticity Diagram
+            """NOTE
+            Only the removed points are deleted from the diagram, and only the labels after the first removed
+            point are renumbered (the other points are not plotted again).
+            The positions of the spectra on the container are the same as the order of the rows on the Treeview.
+            """
+            plot.remove_cie(changes["positions"])
+            if spectrum_count > 0:
+                update_uncertainty(draw=False)                  # Draw the uncertainty of the remaining spectra
+                confirm_exit = True                             # Turn on exit confirmation because the diagram has changed
+            else:
+                plot.flush_uncertainty()                        # Remove the uncertainty ellipses
+                confirm_exit = False                            # Turn off exit confirmation because there are no remaining spectra
+                menu_file.entryconfigure(5, state=tk.DISABLED)  # Disable menu option: File > Save spectral distribution
+                menu_file.entryconfigure(6, state=tk.DISABLED)  # Disable menu option: File > Export coordinates
+                menu_edit.entryconfigure(4, state=tk.DISABLED)  # Disable menu option: Edit > Select all spectra
+                menu_edit.entryconfigure(5, state=tk.DISABLED)  # Disable menu option: Edit > Remove selected spectra
+                menu_edit.entryconfigure(6, state=tk.DISABLED)  # Disable menu option: Edit > Remove all spectra
+                menu_edit.entryconfigure(7, state=tk.DISABLED)  # Disable menu option: Edit > Process selected spectra
+
+            plot.redraw_cie()                                   # Update the diagram's canvas
+
+            # Delete the selected items from the Treeview
+            tree_spectrum.delete(*selected_items)
+
+            # Change the selection to the first item on the Treeview
+            if spectrum_count > 0:
+                first_item = tree_spectrum.get_children()[0]
+                tree_spectrum.selection_set(first_item)
+                tree_spectrum.focus(first_item)
+
+            # Run the garbage collector to free the memory that was being used by the removed spectra
+            gc.collect()
+            return changes
+
+        # Delete without confirmation if Shift is being held
+        if shift_key:
+            changes = do_deletion()
+
+        # Ask whether the user wants to delete the points
+        else:
+            # Confirmation message, based on if one or more items are selected
+            if selected_amount == 1:
+                item_name = spectrum_CIE_dict[selected_items[0]].file_name    # Name of the corresponding spectrum file
+                confirmation_message = f"{item_name} will be removed from the list and diagram. Continue?"
+            else:
+                confirmation_message = f"{selected_amount} items will be removed from the list and diagram. Continue?"
+
+            # Display the confirmation dialog
+            if do_confirmation:
+                confirmation = askyesno(
+                    master = main_window,
+                    title = "Confirm removal",
+                    message = confirmation_message,
+                    default = "no",
+                )
+            else:
+                confirmation = True
+
+            if confirmation:
+                # Delete items if the user chose "yes"
+                changes = do_deletion()
+            else:
+                # Exit the function if the user chose "no"
+                return False
+
+        # Reset the color info frame
+        reset_color_info()
+
+        # Renumber and recolor the background of the Treeview's rows after the first removed one
+        # (so they still keep the alternate colors while being numbered sequentially from 1)
+
+        remaining_rows = tree_spectrum.get_children()   # Get the rows present on the Treeview
+        first_changed = changes["first"]                # The rows before it kept their numbers
+
+        for number,row in enumerate(remaining_rows[first_changed:], first_changed):    # Enumerate the rows and loop through then
+
+            if number % 2 == 1:         # Odd rows
+                format_tag = ("odd",)
+            else:                       # Even rows
+                format_tag = ("even",)
+
+            old_text = tree_spectrum.item(row, option = "text")
+            new_text = f"{(number + 1):>2}{old_text.lstrip().lstrip('0123456789')}"
+            """NOTE
+            The first lstrip() only removes the spaces to the left,
+            while the next lstrip() removes the digits to the left.
+            """
+
+            # Apply the format tag and new text
+            tree_spectrum.item(row, tags = format_tag, text = new_text)  # Apply the corresponding format tag
+
+    # Bind the function to the Delete key
+    main_window.bind("<Delete>", delete_selected)
+
+
+    #--- Select all spectra ---#
+
+    def select_all(*event):
+        all_items = tree_spectrum.get_children()
+        tree_spectrum.selection_set(all_items)
+
+    # Bind the function to the Ctrl+A shortcut
+    main_window.bind("<Control-a>", select_all)
+
+
+    #--- Deleta all spectra ---#
+
+    def delete_all():
+        select_all()
+        delete_selected()
+
+
+    #--- New diagram ---#
+
+    def new_diagram(*event):
+        nonlocal confirm_exit
+
+        # Delete all items (no confirmation, if the user has already saved the diagram)
+        select_all()
+        delete_selected(do_confirmation=confirm_exit)
+
+        # Remove the series (if the spectra were removed)
+        if (spectrum_count == 0) and (len(spectrum_box.series) > 0):
+            if confirm_exit:
+                confirmation = askyesno(
+                    master = main_window,
+                    title = "Confirm removal",
+                    message = f"{len(spectrum_box.series)} series will be removed from the diagram. Continue?",
+                    default = "no",
+                )
+            else:
+                confirmation = True
+            """NOTE
+            The confirmation is only needed when the diagram has only series. If there were spectra, then
+            their removal was already confirmed (otherwise spectrum_count would not be zero), and that
+            removal turns off the exit confirmation.
+            """
+
+            if confirmation:
+                spectrum_box.series.clear()
+                plot.flush_series()
+                plot.redraw_cie()
+                confirm_exit = False    # Nothing is left to be saved
 
-# Bind the function to the Delete key
-main_window.bind("<Delete>", delete_selected)
+        # Reset the diagram options
+        toggle_gridlines(reset=True)
+        toggle_axis(reset=True)
+        toggle_labels(reset=True)
 
+        # Reset to the original view
+        toolbar.home()
 
-#--- Select all spectra ---#
+    # Bind the function to the Ctrl+N shortcut
+    main_window.bind("<Control-n>", new_diagram)
 
-def select_all(*event):
-    all_items = tree_spectrum.get_children()
-    tree_spectrum.selection_set(all_items)
 
-# Bind the function to the Ctrl+A shortcut
-main_window.bind("<Control-a>", select_all)
+    #--- Change the observer or the illuminant ---#
+
+    def change_colorimetry(*event):
+        # Use the selected tables on the next calculations (including the spectra imported later)
+        spectrum_to_cie.set_colorimetry(selected_observer.get(), selected_illuminant.get())
+        if (spectrum_count == 0) and (len(spectrum_box.series) == 0):
+            return
+
+        # Calculate again the color of all spectra
+        spectrum_box.recalculate()
+        refresh_spectra()
 
 
-#--- Deleta all spectra ---#
+    #--- Update the window after the color of the spectra changed ---#
+
+    def refresh_spectra():
+        nonlocal confirm_exit
+
+        # Update the coordinates on the Treeview
+        spectrum_box.calculate_metrics()
+        for item, spectrum in spectrum_CIE_dict.items():
+            tree_spectrum.item(item, values=tree_values(spectrum))
+
+        # Move the points on the diagram to their new coordinates
+        CIE_coordinate = spectrum_box.get_xy()
+        plot.update_cie(CIE_coordinate["x"], CIE_coordinate["y"])
+        update_uncertainty(draw=False)
+        for series in spectrum_box.series:
+            plot.plot_series(series)
+        plot.redraw_cie()
+
+        # Update the color info of the selected spectrum
+        update_color_info(None)
 
-def delete_all():
-    select_all()
-    delete_selected()
+        confirm_exit = True     # Turn on exit confirmation because the diagram has changed
 
 
-#--- New diagram ---#
+    #--- Processing the selected spectra ---#
 
-def new_diagram(*event):
-    # Delete all items (no confirmation, if the user has already saved the diagram)
-    select_all()
-    delete_selected(do_confirmation=confirm_exit)
+    processing_window = None    # Window with the processing options (only one can be open at a time)
 
-    # Reset the diagram options
-    toggle_gridlines(reset=True)
-    toggle_axis(reset=True)
-    toggle_labels(reset=True)
+    def process_selected(*event):
+        """Open a window for choosing the processing (crop, mask, baseline, smoothing and normalization)
+        that is applied to the spectra selected on the Treeview.
+        """
+        nonlocal processing_window
 
-    # Reset to the original view
-    toolbar.home()
+        if len(tree_spectrum.selection()) == 0:
+            return False
 
-# Bind the function to the Ctrl+N shortcut
-main_window.bind("<Control-n>", new_diagram)
+        # Bring the window to the front, if it is already open
+        if processing_window is not None:
+            processing_window.state("normal")
+            processing_window.focus_force()
+            return False
 
-#--- Exiting the program ---#
+        processing_window = tk.Toplevel(master=main_window)
+        processing_window.title("Process selected spectra")
+        processing_window.resizable(False, False)
+
+        def close_window():
+            nonlocal processing_window
+            processing_window.destroy()
+            processing_window = None
+
+        processing_window.protocol("WM_DELETE_WINDOW", close_window)
+
+        # The fields start with the processing of the first selected spectrum: {stage: {parameter: value}}
+        first_spectrum = spectrum_CIE_dict[tree_spectrum.selection()[0]]
+        current_stages = dict(first_spectrum.pipeline.stages) if first_spectrum.pipeline else {}
+
+        # Fields of the parameters: (text, stage, parameter)
+        parameter_fields = (
+            ("Crop from (nm)", "crop", "start"),
+            ("Crop to (nm)", "crop", "end"),
+            ("Mask from (nm)", "mask", "start"),
+            ("Mask to (nm)", "mask", "end"),
+            ("Baseline (polynomial degree)", "baseline", "degree"),
+            ("Smoothing (window of points)", "smooth", "window"),
+        )
+        field_values = {}
+        for row, (text, stage, parameter) in enumerate(parameter_fields):
+            value = current_stages.get(stage, {}).get(parameter)
+            field_values[(stage, parameter)] = tk.StringVar(value="" if value is None else f"{value:g}")
+            ttk.Label(master=processing_window, text=text).grid(column=0, row=row, sticky="w", padx=5, pady=2)
+            ttk.Entry(master=processing_window, textvariable=field_values[(stage, parameter)], width=10).grid(column=1, row=row, padx=5, pady=2)
+
+        normalize = tk.BooleanVar(value=current_stages.get("scale", {}).get("normalize") == "max")
+        ttk.Checkbutton(master=processing_window, text="Normalize to the maximum", variable=normalize).grid(
+            column=0, row=len(parameter_fields), columnspan=2, sticky="w", padx=5, pady=2
+        )
 
-# As the user if they want to close the program, when there are still stuff to save
-def clean_exit(*event):
-    global main_window, error_log
-    if confirm_exit:
-        confirmation = askyesno(
-            master = main_window,
-            title = "Confirm exit",
-            message = "Unsaved diagram will be lost. Continue?",
-            default = "no",
+        def apply_processing():
+            # Read the fields (the empty ones are not used)
+            try:
+                values = {key: float(value.get()) if value.get().strip() else None for key, value in field_values.items()}
+            except ValueError:
+                showerror(parent=processing_window, title="Invalid value", message="The fields must have numbers (or be left empty).")
+                return False
+
+            # Stages in the order they are applied
+            stages = []
+            if (values[("crop", "start")] is not None) or (values[("crop", "end")] is not None):
+                stages.append(("crop", {"start": values[("crop", "start")], "end": values[("crop", "end")]}))
+            if (values[("mask", "start")] is not None) and (values[("mask", "end")] is not None):
+                stages.append(("mask", {"start": values[("mask", "start")], "end": values[("mask", "end")]}))
+            if values[("baseline", "degree")] is not None:
+                stages.append(("baseline", {"degree": int(values[("baseline", "degree")])}))
+            if values[("smooth", "window")] is not None:
+                stages.append(("smooth", {"window": int(values[("smooth", "window")])}))
+            if normalize.get():
+                stages.append(("scale", {"normalize": "max"}))
+
+            # Process all selected spectra at once
+            selected_spectra = [spectrum_CIE_dict[item] for item in tree_spectrum.selection()]
+            failed = spectrum_box.process(selected_spectra, stages)
+            if failed:
+                showerror(
+                    parent = processing_window,
+                    title = "Processing error",
+                    message = f"{len(failed)} of the selected spectra could not be processed with those values, so they were kept as before.",
+                )
+
+            # The spectral distributions are plotted again when the spectra are selected
+            for spectrum in selected_spectra:
+                plot.remove_sd(spectrum)
+            refresh_spectra()
+
+        ttk.Button(master=processing_window, text="Apply", command=apply_processing).grid(
+            column=0, row=len(parameter_fields) + 1, padx=5, pady=5
         )
-        if confirmation:
+        ttk.Button(master=processing_window, text="Close", command=close_window).grid(
+            column=1, row=len(parameter_fields) + 1, padx=5, pady=5
+        )
+        processing_window.focus_force()
+
+
+    #--- Uncertainty of the color coordinates ---#
+
+    def update_uncertainty(*event, recalculate=False, draw=True):
+        # Estimate the uncertainty of the spectra that do not have it yet, and draw the ellipses of all spectra
+        if show_uncertainty.get() and spectrum_count > 0:
+            spectrum_box.calculate_uncertainty(noise=noise_model.get(), only_missing=not recalculate)
+            plot.plot_uncertainty(*spectrum_box.get_uncertainty())
+        else:
+            plot.flush_uncertainty()
+
+        if draw:
+            plot.redraw_cie()
+
+    #--- Exiting the program ---#
+
+    # As the user if they want to close the program, when there are still stuff to save
+    def clean_exit(*event):
+        nonlocal main_window, error_log
+        if confirm_exit:
+            confirmation = askyesno(
+                master = main_window,
+                title = "Confirm exit",
+                message = "Unsaved diagram will be lost. Continue?",
+                default = "no",
+            )
+            if confirmation:
+                spectrum_box.close_pool()   # Stop the processes of the parallel import
+                main_window.destroy()
+                try:
+                    error_log.close()
+                except:
+                    pass
+                sys.exit()
+        else:
+            spectrum_box.close_pool()
             main_window.destroy()
             try:
                 error_log.close()
             except:
                 pass
             sys.exit()
-    else:
-        main_window.destroy()
-        try:
-            error_log.close()
-        except:
-            pass
-        sys.exit()
-
-# Exit the program properly when closing the window or pressing Alt+F4
-main_window.bind("<Alt-F4>", clean_exit)
-main_window.protocol("WM_DELETE_WINDOW", clean_exit)
-"""NOTE
-Those bindings are necessary because Matplotlib does not automatically close
-the plots when the window is closed. That would cause the program to hang on
-the shell.
-"""
-
-#-----------------------------------------------------------------------------
-# "Help" and "About" windows
-#-----------------------------------------------------------------------------
-
-class new_window():
-    """Create the Help menu windows, that are opened from the Help menu.
-    That is done by calling one of the methods:
-        .help()
-        .about()
-        .cite()
-        .license()
+
+    # Exit the program properly when closing the window or pressing Alt+F4
+    main_window.bind("<Alt-F4>", clean_exit)
+    main_window.protocol("WM_DELETE_WINDOW", clean_exit)
+    """NOTE
+    Those bindings are necessary because Matplotlib does not automatically close
+    the plots when the window is closed. That would cause the program to hang on
+    the shell.
     """
-    def __init__(self, parent_window):
-        self.parent_window = parent_window  # Associate the new window to the main window
-        self.open_windows = {}              # Store the open windows so duplicates can be avoided
-    
-    def __create_window(self, text_file, window_title):
-        """Create a new window with the the contents of a text file.
+
+    #-----------------------------------------------------------------------------
+    # "Help" and "About" windows
+    #-----------------------------------------------------------------------------
+
+    class new_window():
+        """Create the Help menu windows, that are opened from the Help menu.
+        That is done by calling one of the methods:
+            .help()
+            .about()
+            .cite()
+            .license()
         """
-        # Check for a duplicate window
-        if self.open_windows.get(window_title, None):
-            
-            # Bring the existing window to the front
-            self.open_windows[window_title].state("normal")
+        def __init__(self, parent_window):
+            self.parent_window = parent_window  # Associate the new window to the main window
+            self.open_windows = {}              # Store the open windows so duplicates can be avoided
 
-            # Change focus to the existing window
-            self.open_windows[window_title].focus_force()
+        def __create_window(self, text_file, window_title):
+            """Create a new window with the the contents of a text file.
+            """
+            # Check for a duplicate window
+            if self.open_windows.get(window_title, None):
 
-            # Exit the function, instead of creating a new window
-            return False
-        
-        # Create the window
-        my_window = tk.Toplevel(
-            master = self.parent_window,
-        )
+                # Bring the existing window to the front
+                self.open_windows[window_title].state("normal")
 
-        # Set the window's title
-        my_window.title(window_title)
-        
-        # Create the text box
-        my_textbox = tk.Text(
-            master = my_window,
-            font = "TkDefaultFont",
-            wrap = tk.WORD,
-            padx = 5,
-            pady = 5,
-        )
+                # Change focus to the existing window
+                self.open_windows[window_title].focus_force()
 
-        # Remove window from the dictionary when it is closed
-        # (when the window closes, it trigers the "Destroy" event of the text box)
-        my_textbox.bind("<Destroy>", lambda event: self.open_windows.update({window_title: None}))
-        
-        # Regular expression to match the titles
-        # (digits followed by closing paranthesis and text)
-        text_regex = re.compile(r"(?m)^\d+\).*$")
-        
-        # Open the text file and get its lines
-        with open(text_file, "r") as obj_file:
-            
-            # Create the formating tags for titles and normal text
-            my_textbox.tag_configure(
-                "title",
-                font = ("Georgia", "16", "bold"),
-            )
-            my_textbox.tag_configure(
-                "normal",
-                font = ("Georgia", "12"),
+                # Exit the function, instead of creating a new window
+                return False
+
+            # Create the window
+            my_window = tk.Toplevel(
+                master = self.parent_window,
             )
 
-            # Iterate through all lines in the file
-            for line in obj_file:
-                
-                # Determine if the line is a title or not
-                is_title = text_regex.match(line)
-                
-                # Add line to the text box
-                if is_title:
-                    # Title (bold and bigger)
-                    my_textbox.insert(tk.END, line, ("title",))
-                else:
-                    # Normal text
-                    my_textbox.insert(tk.END, line, ("normal",))
-            
-            # Disable the text box so the user cannot change the contents (but can still copy)
-            my_textbox["state"] = tk.DISABLED
-
-            # Create the scrollbar for the text box
-            my_scrollbar = tk.Scrollbar(
+            # Set the window's title
+            my_window.title(window_title)
+
+            # Create the text box
+            my_textbox = tk.Text(
                 master = my_window,
-                orient = tk.VERTICAL,       # Vertical scrolling
-                command = my_textbox.yview  # Get the vertical position from the text box
+                font = "TkDefaultFont",
+                wrap = tk.WORD,
+                padx = 5,
+                pady = 5,
             )
 
-            # Associate the textbox to the scrollbar
-            my_textbox["yscrollcommand"] = my_scrollbar.set
+            # Remove window from the dictionary when it is closed
+            # (when the window closes, it trigers the "Destroy" event of the text box)
+            my_textbox.bind("<Destroy>", lambda event: self.open_windows.update({window_title: None}))
+
+            # Regular expression to match the titles
+            # (digits followed by closing paranthesis and text)
+            text_regex = re.compile(r"(?m)^\d+\).*$")
+
+            # Open the text file and get its lines
+            with open(text_file, "r") as obj_file:
+
+                # Create the formating tags for titles and normal text
+                my_textbox.tag_configure(
+                    "title",
+                    font = ("Georgia", "16", "bold"),
+                )
+                my_textbox.tag_configure(
+                    "normal",
+                    font = ("Georgia", "12"),
+                )
+
+                # Iterate through all lines in the file
+                for line in obj_file:
+
+                    # Determine if the line is a title or not
+                    is_title = text_regex.match(line)
+
+                    # Add line to the text box
+                    if is_title:
+                        # Title (bold and bigger)
+                        my_textbox.insert(tk.END, line, ("title",))
+                    else:
+                        # Normal text
+                        my_textbox.insert(tk.END, line, ("normal",))
+
+                # Disable the text box so the user cannot change the contents (but can still copy)
+                my_textbox["state"] = tk.DISABLED
+
+                # Create the scrollbar for the text box
+                my_scrollbar = tk.Scrollbar(
+                    master = my_window,
+                    orient = tk.VERTICAL,       # Vertical scrolling
+                    command = my_textbox.yview  # Get the vertical position from the text box
+                )
+
+                # Associate the textbox to the scrollbar
+                my_textbox["yscrollcommand"] = my_scrollbar.set
+
+                # Pack the scrollbar to the window
+                my_scrollbar.pack(
+                    side = tk.RIGHT,    # Add to the right of the window
+                    fill = tk.Y,        # Fill the whole height of the window
+                )
+
+                # Pack the textbox to the window
+                my_textbox.pack(
+                    side = tk.RIGHT,    # Add next to the the scrollbar
+                    expand = True,      # Text box can be resized
+                    fill = tk.BOTH,     # Text box expands to fill all the available space
+                )
+
+                # Store the opened window on the dictionary
+                self.open_windows.update({window_title: my_window})
+
+                # Bring the opened window to the front
+                my_window.focus_force()
+
+        def help(self, *event):
+            """Create a Help window from the contents of the "Help.txt" file.
+            """
+            self.__create_window(Path("lib", "Help.txt"), "Help")
+
+        def about(self, *event):
+            """Create a About window from the contents of the "About.txt" file.
+            """
+            self.__create_window(Path("lib", "About.txt"), "About")
+
+        def license(self, *event):
+            """Create a license information window.
+            """
+            self.__create_window(Path("lib", "License.txt"), "License")
+
+        def cite(self, *event):
+            """Create a "How to cite" window
+            """
+            self.__create_window(Path("lib", "Citation.txt"), "Citation")
+
+    # Instantiate the class
+    info_window = new_window(main_window)
+
+    # Make the Help window to be opened with the F1 shortcut
+    main_window.bind("<F1>", info_window.help)
+
+    #-----------------------------------------------------------------------------
+    # Menu bar
+    #-----------------------------------------------------------------------------
+
+    # Disable detachable menus
+    main_window.option_add("*tearOff", tk.FALSE)
+
+    # Create the menu bar on the main window
+    menubar = tk.Menu(main_window)
+    main_window["menu"] = menubar
+
+    # Create top level menus
+    menu_file = tk.Menu(menubar)
+    menu_edit = tk.Menu(menubar)
+    menu_help = tk.Menu(menubar)
+    menubar.add_cascade(menu=menu_file, label="File", underline=0)
+    menubar.add_cascade(menu=menu_edit, label="Edit", underline=0)
+    menubar.add_cascade(menu=menu_help, label="Help", underline=0)
+
+    # Add File commands
+    menu_file.add_command(
+        label = "Import spectra...",
+        command = import_spectra,
+        accelerator = "Ctrl+O",
+        underline = 0,  # Underline I during keyboard traversal
+    )
+    menu_file.add_command(
+        label = "Import series...",
+        command = import_series,
+        underline = 7,  # Underline S during keyboard traversal
+    )
+    menu_file.add_command(
+        label = "New diagram",
+        accelerator = "Ctrl+N",
+        underline = 0,  # Underline N during keyboard traversal
+        command = new_diagram,
+    )
+
+    menu_file.add_separator()
 
-            # Pack the scrollbar to the window
-            my_scrollbar.pack(
-                side = tk.RIGHT,    # Add to the right of the window
-                fill = tk.Y,        # Fill the whole height of the window
-            )
+    menu_file.add_command(
+        label = "Save chromaticity diagram...",
+        accelerator = "Ctrl+S",
+        underline = 5,  # Underline D during keyboard traversal
+        command = save_diagram,
+    )
 
-            # Pack the textbox to the window
-            my_textbox.pack(
-                side = tk.RIGHT,    # Add next to the the scrollbar
-                expand = True,      # Text box can be resized
-                fill = tk.BOTH,     # Text box expands to fill all the available space
-            )
-            
-            # Store the opened window on the dictionary
-            self.open_windows.update({window_title: my_window})
-
-            # Bring the opened window to the front
-            my_window.focus_force()
-    
-    def help(self, *event):
-        """Create a Help window from the contents of the "Help.txt" file.
-        """
-        self.__create_window(Path("lib", "Help.txt"), "Help")
+    menu_file.add_command(
+        label = "Save spectral distribution...",
+        underline = 5,          # Underline S during keyboard traversal
+        accelerator = "Ctrl+D",
+        command = save_sd,
+        state = tk.DISABLED,    # Will be enabled when a spectrum is imported
+    )
 
-    def about(self, *event):
-        """Create a About window from the contents of the "About.txt" file.
-        """
-        self.__create_window(Path("lib", "About.txt"), "About")
-    
-    def license(self, *event):
-        """Create a license information window.
-        """
-        self.__create_window(Path("lib", "License.txt"), "License")
-    
-    def cite(self, *event):
-        """Create a "How to cite" window
-        """
-        self.__create_window(Path("lib", "Citation.txt"), "Citation")
-
-# Instantiate the class
-info_window = new_window(main_window)
-
-# Make the Help window to be opened with the F1 shortcut
-main_window.bind("<F1>", info_window.help)
-
-#-----------------------------------------------------------------------------
-# Menu bar
-#-----------------------------------------------------------------------------
-
-# Disable detachable menus
-main_window.option_add("*tearOff", tk.FALSE)
-
-# Create the menu bar on the main window
-menubar = tk.Menu(main_window)
-main_window["menu"] = menubar
-
-# Create top level menus
-menu_file = tk.Menu(menubar)
-menu_edit = tk.Menu(menubar)
-menu_help = tk.Menu(menubar)
-menubar.add_cascade(menu=menu_file, label="File", underline=0)
-menubar.add_cascade(menu=menu_edit, label="Edit", underline=0)
-menubar.add_cascade(menu=menu_help, label="Help", underline=0)
-
-# Add File commands
-menu_file.add_command(
-    label = "Import spectra...",
-    command = spectrum_box.import_files,
-    accelerator = "Ctrl+O",
-    underline = 0,  # Underline I during keyboard traversal
-)
-menu_file.add_command(
-    label = "New diagram",
-    accelerator = "Ctrl+N",
-    underline = 0,  # Underline N during keyboard traversal
-    command = new_diagram,
-)
-
-menu_file.add_separator()
-
-menu_file.add_command(
-    label = "Save chromaticity diagram...",
-    accelerator = "Ctrl+S",
-    underline = 5,  # Underline D during keyboard traversal
-    command = save_diagram,
-)
-
-menu_file.add_command(
-    label = "Save spectral distribution...",
-    underline = 5,          # Underline S during keyboard traversal
-    accelerator = "Ctrl+D",
-    command = save_sd,
-    state = tk.DISABLED,    # Will be enabled when a spectrum is imported
-)
-
-menu_file.add_command(
-    label = "Export all color coordinates...",
-    accelerator = "Ctrl+E",
-    underline = 0,          # Underline E during keyboard traversal
-    command = export_coordinates,
-    state = tk.DISABLED,    # Will be enabled when a spectrum is imported
-)
-
-menu_file.add_separator()
-
-menu_file.add_command(
-    label = "Close",
-    accelerator = "Alt+F4",
-    underline = 0,          # Underline C during keyboard traversal
-    command = clean_exit,
-)
-
-# Add Edit commands
-menu_edit.add_checkbutton(
-    label = "Show grid lines",
-    variable = show_gridlines,
-    onvalue = True,
-    offvalue = False,
-    accelerator = "F2",
-    underline = 5,          # Underline G during keyboard traversal
-    command = toggle_gridlines,
-)
-
-menu_edit.add_checkbutton(
-    label = "Show axis",
-    variable = show_axis,
-    onvalue = True,
-    offvalue = False,
-    accelerator = "F3",
-    underline = 5,          # Underline A during keyboard traversal
-    command = toggle_axis,
-)
-
-menu_edit.add_checkbutton(
-    label = "Show labels",
-    variable = show_labels,
-    onvalue = True,
-    offvalue = False,
-    accelerator = "F4",
-    underline = 5,          # Underline L during keyboard traversal
-    command = toggle_labels,
-)
-
-menu_edit.add_separator()
-
-menu_edit.add_command(
-    label = "Select all spectra",
-    accelerator = "Ctrl+A",
-    command = select_all,
-    state = tk.DISABLED,    # Will be enabled when a spectrum is imported
-)
-menu_edit.add_command(
-    label = "Remove selected spectra",
-    accelerator = "Del",
-    command = delete_selected,
-    state = tk.DISABLED,    # Will be enabled when a spectrum is imported
-)
-menu_edit.add_command(
-    label = "Remove all spectra",
-    command = delete_all,
-    state = tk.DISABLED,    # Will be enabled when a spectrum is imported
-)
-
-# Add Help commands
-menu_help.add_command(
-    label = "Help",
-    accelerator = "F1",
-    underline = 0,
-    command = info_window.help,
-)
-
-menu_help.add_command(
-    label = "How to cite",
-    underline = 7,
-    command = info_window.cite,
-)
-
-menu_help.add_separator()
-
-menu_help.add_command(
-    label = "License",
-    underline = 0,
-    command = info_window.license,
-)
-
-menu_help.add_command(
-    label = "About",
-    underline = 0,
-    command = info_window.about,
-)
-
-#-----------------------------------------------------------------------------
-# Color information frame
-#-----------------------------------------------------------------------------
-
-frame_color_info = tk.LabelFrame(
-    master = main_window,
-    text = "Color coordinate"
-)
-
-# Spectrum name
-
-cell_spectrum_title = tk.Label(
-    master = frame_color_info,
-    text = "Please import spectra (Ctrl+O or File menu)",
-    anchor = "w",
-)
-
-# Coordinates names
-
-cell_x_name = tk.Label(
-    master = frame_color_info,
-    text = "CIE x =",
-)
-cell_y_name = tk.Label(
-    master = frame_color_info,
-    text = "CIE y =",
-)
-cell_z_name = tk.Label(
-    master = frame_color_info,
-    text = "CIE z =",
-)
-
-# Coordinates values (can be copied by the user)
-
-cell_value_arguments = dict(
-    master = frame_color_info,
-    state = "readonly",
-    readonlybackground = "#f8f8f8",
-    foreground = "black",
-)
-
-cell_x_value_text = tk.StringVar()
-cell_y_value_text = tk.StringVar()
-cell_z_value_text = tk.StringVar()
-
-cell_x_value = tk.Entry(textvariable=cell_x_value_text, **cell_value_arguments)
-cell_y_value = tk.Entry(textvariable=cell_y_value_text, **cell_value_arguments)
-cell_z_value = tk.Entry(textvariable=cell_z_value_text, **cell_value_arguments)
-
-# Label to display the color itself
-
-cell_color_display = tk.Label(
-    master = frame_color_info,
-    borderwidth = 1,
-    relief = tk.SUNKEN,
-)
-
-# Spectral distribution
-
-frame_sd = tk.Frame(
-    master = frame_color_info,
-    borderwidth = 2,
-    relief = tk.SUNKEN,
-    width = 280,
-    height = 210,
-)
-
-# Create the canvas for the Spectral Distribution
-canvas_sd = canvas_sd = FigureCanvasTkAgg(plot.fig_sd, master = frame_sd)
-
-canvas_sd.get_tk_widget().pack(
+    menu_file.add_command(
+        label = "Export all color coordinates...",
+        accelerator = "Ctrl+E",
+        underline = 0,          # Underline E during keyboard traversal
+        command = export_coordinates,
+        state = tk.DISABLED,    # Will be enabled when a spectrum is imported
+    )
+
+    menu_file.add_command(
+        label = "Open session...",
+        underline = 1,          # Underline P during keyboard traversal
+        command = open_session,
+    )
+
+    menu_file.add_command(
+        label = "Save session...",
+        underline = 3,          # Underline E during keyboard traversal
+        command = save_session,
+    )
+
+    menu_file.add_separator()
+
+    menu_file.add_command(
+        label = "Close",
+        accelerator = "Alt+F4",
+        underline = 0,          # Underline C during keyboard traversal
+        command = clean_exit,
+    )
+
+    # Add Edit commands
+    menu_edit.add_checkbutton(
+        label = "Show grid lines",
+        variable = show_gridlines,
+        onvalue = True,
+        offvalue = False,
+        accelerator = "F2",
+        underline = 5,          # Underline G during keyboard traversal
+        command = toggle_gridlines,
+    )
+
+    menu_edit.add_checkbutton(
+        label = "Show axis",
+        variable = show_axis,
+        onvalue = True,
+        offvalue = False,
+        accelerator = "F3",
+        underline = 5,          # Underline A during keyboard traversal
+        command = toggle_axis,
+    )
+
+    menu_edit.add_checkbutton(
+        label = "Show labels",
+        variable = show_labels,
+        onvalue = True,
+        offvalue = False,
+        accelerator = "F4",
+        underline = 5,          # Underline L during keyboard traversal
+        command = toggle_labels,
+    )
+
+    menu_edit.add_separator()
+
+    menu_edit.add_command(
+        label = "Select all spectra",
+        accelerator = "Ctrl+A",
+        command = select_all,
+        state = tk.DISABLED,    # Will be enabled when a spectrum is imported
+    )
+    menu_edit.add_command(
+        label = "Remove selected spectra",
+        accelerator = "Del",
+        command = delete_selected,
+        state = tk.DISABLED,    # Will be enabled when a spectrum is imported
+    )
+    menu_edit.add_command(
+        label = "Remove all spectra",
+        command = delete_all,
+        state = tk.DISABLED,    # Will be enabled when a spectrum is imported
+    )
+    menu_edit.add_command(
+        label = "Process selected spectra...",
+        command = process_selected,
+        state = tk.DISABLED,    # Will be enabled when a spectrum is imported
+    )
+
+    menu_edit.add_separator()
+
+    menu_edit.add_checkbutton(
+        label = "Show uncertainty",
+        variable = show_uncertainty,
+        onvalue = True,
+        offvalue = False,
+        underline = 5,          # Underline U during keyboard traversal
+        command = update_uncertainty,
+    )
+
+    # Submenu for choosing the noise model used to calculate the uncertainty
+    menu_noise = tk.Menu(menu_edit)
+    menu_edit.add_cascade(menu=menu_noise, label="Noise model", underline=0)
+
+    for value, description in (("poisson", "Poisson (photon counts)"), ("baseline", "Estimated from the baseline")):
+        menu_noise.add_radiobutton(
+            label = description,
+            variable = noise_model,
+            value = value,
+            command = lambda: update_uncertainty(recalculate=True),
+        )
+
+    menu_edit.add_separator()
+
+    # Submenus for choosing the observer and the illuminant
+    menu_observer = tk.Menu(menu_edit)
+    menu_illuminant = tk.Menu(menu_edit)
+    menu_edit.add_cascade(menu=menu_observer, label="Observer", underline=0)
+    menu_edit.add_cascade(menu=menu_illuminant, label="Illuminant", underline=0)
+
+    for name, description in colorimetry_tables.observers.items():
+        menu_observer.add_radiobutton(
+            label = description,
+            variable = selected_observer,
+            value = name,
+            command = change_colorimetry,
+        )
+
+    for name, description in colorimetry_tables.illuminants.items():
+        menu_illuminant.add_radiobutton(
+            label = description,
+            variable = selected_illuminant,
+            value = name,
+            command = change_colorimetry,
+        )
+
+    # Add Help commands
+    menu_help.add_command(
+        label = "Help",
+        accelerator = "F1",
+        underline = 0,
+        command = info_window.help,
+    )
+
+    menu_help.add_command(
+        label = "How to cite",
+        underline = 7,
+        command = info_window.cite,
+    )
+
+    menu_help.add_separator()
+
+    menu_help.add_command(
+        label = "License",
+        underline = 0,
+        command = info_window.license,
+    )
+
+    menu_help.add_command(
+        label = "About",
+        underline = 0,
+        command = info_window.about,
+    )
+
+    #-----------------------------------------------------------------------------
+    # Color information frame
+    #-----------------------------------------------------------------------------
+
+    frame_color_info = tk.LabelFrame(
+        master = main_window,
+        text = "Color coordinate"
+    )
+
+    # Spectrum name
+
+    cell_spectrum_title = tk.Label(
+        master = frame_color_info,
+        text = "Please import spectra (Ctrl+O or File menu)",
+        anchor = "w",
+    )
+
+    # Coordinates names
+
+    cell_x_name = tk.Label(
+        master = frame_color_info,
+        text = "CIE x =",
+    )
+    cell_y_name = tk.Label(
+        master = frame_color_info,
+        text = "CIE y =",
+    )
+    cell_z_name = tk.Label(
+        master = frame_color_info,
+        text = "CIE z =",
+    )
+
+    # Coordinates values (can be copied by the user)
+
+    cell_value_arguments = dict(
+        master = frame_color_info,
+        state = "readonly",
+        readonlybackground = "#f8f8f8",
+        foreground = "black",
+    )
+
+    cell_x_value_text = tk.StringVar()
+    cell_y_value_text = tk.StringVar()
+    cell_z_value_text = tk.StringVar()
+
+    cell_x_value = tk.Entry(textvariable=cell_x_value_text, **cell_value_arguments)
+    cell_y_value = tk.Entry(textvariable=cell_y_value_text, **cell_value_arguments)
+    cell_z_value = tk.Entry(textvariable=cell_z_value_text, **cell_value_arguments)
+
+    # Label to display the color itself
+
+    cell_color_display = tk.Label(
+        master = frame_color_info,
+        borderwidth = 1,
+        relief = tk.SUNKEN,
+    )
+
+    # Spectral distribution
+
+    frame_sd = tk.Frame(
+        master = frame_color_info,
+        borderwidth = 2,
+        relief = tk.SUNKEN,
+        width = 280,
+        height = 210,
+    )
+
+    # Create the canvas for the Spectral Distribution
+    canvas_sd = canvas_sd = FigureCanvasTkAgg(plot.fig_sd, master = frame_sd)
+
+    canvas_sd.get_tk_widget().pack(
+            expand = True,
+            fill = tk.BOTH,
+        )
+
+    # Add the frame to the window
+
+    frame_sd.grid(
+        column = 0,
+        row = 4,
+        columnspan = 3,
+        sticky = "nsew",    # Expands to fill the whole cell
+        padx = 3,
+        pady = 3,
+    )
+
+    # Adding the cells to the frame
+
+    cell_padding = 5
+
+    cell_spectrum_title.grid(
+        column = 0,
+        row = 0,
+        columnspan = 3,
+        sticky = "we",      # Expands to fill the cell horizontaly
+        padx = cell_padding,
+    )
+
+    cell_x_name.grid(
+        column = 0,
+        row = 1,
+        padx = cell_padding,
+    )
+    cell_y_name.grid(
+        column = 0,
+        row = 2,
+        padx = cell_padding,
+    )
+    cell_z_name.grid(
+        column = 0,
+        row = 3,
+        padx = cell_padding,
+    )
+    cell_x_value.grid(
+        column = 1,
+        row = 1,
+    )
+    cell_y_value.grid(
+        column = 1,
+        row = 2,
+    )
+    cell_z_value.grid(
+        column = 1,
+        row = 3,
+    )
+    cell_color_display.grid(
+        column = 2,
+        row = 1,
+        rowspan = 3,
+        sticky = "nsew",    # Expands to fill the whole cell
+        padx = cell_padding,
+        ipady = cell_padding,
+    )
+
+    frame_color_info.columnconfigure(
+        2,
+        weight = 1,     # The color column expands if the window is resized
+    )
+    frame_color_info.rowconfigure(
+        4,
+        weight = 1,     # The color row expands if the window is resized
+    )
+
+    # Add the frame to the main window
+    frame_color_info.grid(
+        column = 0,
+        row = 0,
+        rowspan = 2,
+        sticky = "nsew",    # Expands to fill the whole cell
+        padx = 3,
+        pady = 3,
+    )
+
+
+    #-----------------------------------------------------------------------------
+    # Treeview to show the spectrum color data
+    #-----------------------------------------------------------------------------
+
+    style = ttk.Style()
+    style.theme_use("alt")  # Styles: "clam", "alt", "default", "classic"
+
+    # Fix for not being able to apply tags to a Treeview - https://stackoverflow.com/a/67141755
+    if main_window.getvar('tk_patchLevel')=='8.6.9': #and OS_Name=='nt':
+        def fixed_map(option):
+            # Fix for setting text colour for Tkinter 8.6.9
+            # From: https://core.tcl.tk/tk/info/509cafafae
+            #
+            # Returns the style map for 'option' with any styles starting with
+            # ('!disabled', '!selected', ...) filtered out.
+            #
+            # style.map() returns an empty list for missing options, so this
+            # should be future-safe.
+            return [elm for elm in style.map('Treeview', query_opt=option) if elm[:2] != ('!disabled', '!selected')]
+        style.map('Treeview', foreground=fixed_map('foreground'), background=fixed_map('background'))
+
+    # Frame to hold the treeview and its scrollbar
+    frame_tree_spectrum = ttk.Frame(
+        master = main_window
+    )
+
+    # Create a treeview
+    tree_spectrum = ttk.Treeview(
+        master = frame_tree_spectrum,
+        columns = ("CIE x", "CIE y", "CIE z", "CCT", "Duv", "Dominant", "Complementary", "Purity"),
+        #height = 30
+    )
+
+    # Scrollbar for the treeview
+    scroll_tree_spectrum = ttk.Scrollbar(
+        master = frame_tree_spectrum,
+        orient = tk.VERTICAL,
+        command = tree_spectrum.yview
+    )
+    tree_spectrum["yscrollcommand"] = scroll_tree_spectrum.set
+
+    # The titles of each column
+    tree_spectrum.heading("#0", text="Spectrum")
+    tree_spectrum.heading("#1", text="CIE x")
+    tree_spectrum.heading("#2", text="CIE y")
+    tree_spectrum.heading("#3", text="CIE z")
+    tree_spectrum.heading("#4", text="CCT (K)")
+    tree_spectrum.heading("#5", text="Duv")
+    tree_spectrum.heading("#6", text="λd (nm)")
+    tree_spectrum.heading("#7", text="λc (nm)")
+    tree_spectrum.heading("#8", text="Purity")
+
+    # The aligment of the text in the cells
+    # Leftmost column has the text aligned to the left, while all others columns have centered text
+    tree_spectrum.column("#0", anchor=tk.W, minwidth=100, width=100, stretch=True)
+    tree_spectrum.column("#1", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+    tree_spectrum.column("#2", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+    tree_spectrum.column("#3", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+    tree_spectrum.column("#4", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+    tree_spectrum.column("#5", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+    tree_spectrum.column("#6", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+    tree_spectrum.column("#7", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+    tree_spectrum.column("#8", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
+
+    # The background colors for odd and even rows (to make rows alternate colors)
+    tree_spectrum.tag_configure(
+        "odd",
+        background = "gray92",
+        foreground = "black",
+    )
+    tree_spectrum.tag_configure(
+        "even",
+        background = "white",
+        foreground = "black"
+    )
+
+    # Pack the scrollbar to the right side of the frame and make the bar fill the entire height
+    scroll_tree_spectrum.pack(
+        side = tk.RIGHT,
+        fill = tk.Y
+    )
+    # Pack the treeview to the frame and make the treeview to fill the remaining space on the frame
+    tree_spectrum.pack(side = tk.RIGHT,
         expand = True,
         fill = tk.BOTH,
     )
 
-# Add the frame to the window
-
-frame_sd.grid(
-    column = 0,
-    row = 4,
-    columnspan = 3,
-    sticky = "nsew",    # Expands to fill the whole cell
-    padx = 3,
-    pady = 3,
-)
-
-# Adding the cells to the frame
-
-cell_padding = 5
-
-cell_spectrum_title.grid(
-    column = 0,
-    row = 0,
-    columnspan = 3,
-    sticky = "we",      # Expands to fill the cell horizontaly
-    padx = cell_padding,
-)
-
-cell_x_name.grid(
-    column = 0,
-    row = 1,
-    padx = cell_padding,
-)
-cell_y_name.grid(
-    column = 0,
-    row = 2,
-    padx = cell_padding,
-)
-cell_z_name.grid(
-    column = 0,
-    row = 3,
-    padx = cell_padding,
-)
-cell_x_value.grid(
-    column = 1,
-    row = 1,
-)
-cell_y_value.grid(
-    column = 1,
-    row = 2,
-)
-cell_z_value.grid(
-    column = 1,
-    row = 3,
-)
-cell_color_display.grid(
-    column = 2,
-    row = 1,
-    rowspan = 3,
-    sticky = "nsew",    # Expands to fill the whole cell
-    padx = cell_padding,
-    ipady = cell_padding,
-)
-
-frame_color_info.columnconfigure(
-    2,
-    weight = 1,     # The color column expands if the window is resized
-)
-frame_color_info.rowconfigure(
-    4,
-    weight = 1,     # The color row expands if the window is resized
-)
-
-# Add the frame to the main window
-frame_color_info.grid(
-    column = 0,
-    row = 0,
-    rowspan = 2,
-    sticky = "nsew",    # Expands to fill the whole cell
-    padx = 3,
-    pady = 3,
-)
-
-
-#-----------------------------------------------------------------------------
-# Treeview to show the spectrum color data
-#-----------------------------------------------------------------------------
-
-style = ttk.Style()
-style.theme_use("alt")  # Styles: "clam", "alt", "default", "classic"
-
-# Fix for not being able to apply tags to a Treeview - https://stackoverflow.com/a/67141755
-if main_window.getvar('tk_patchLevel')=='8.6.9': #and OS_Name=='nt':
-    def fixed_map(option):
-        # Fix for setting text colour for Tkinter 8.6.9
-        # From: https://core.tcl.tk/tk/info/509cafafae
-        #
-        # Returns the style map for 'option' with any styles starting with
-        # ('!disabled', '!selected', ...) filtered out.
-        #
-        # style.map() returns an empty list for missing options, so this
-        # should be future-safe.
-        return [elm for elm in style.map('Treeview', query_opt=option) if elm[:2] != ('!disabled', '!selected')]
-    style.map('Treeview', foreground=fixed_map('foreground'), background=fixed_map('background'))
-
-# Frame to hold the treeview and its scrollbar
-frame_tree_spectrum = ttk.Frame(
-    master = main_window
-)
-
-# Create a treeview
-tree_spectrum = ttk.Treeview(
-    master = frame_tree_spectrum,
-    columns = ("CIE x", "CIE y", "CIE z"),
-    #height = 30
-)
-
-# Scrollbar for the treeview
-scroll_tree_spectrum = ttk.Scrollbar(
-    master = frame_tree_spectrum,
-    orient = tk.VERTICAL,
-    command = tree_spectrum.yview
-)
-tree_spectrum["yscrollcommand"] = scroll_tree_spectrum.set
-
-# The titles of each column
-tree_spectrum.heading("#0", text="Spectrum")
-tree_spectrum.heading("#1", text="CIE x")
-tree_spectrum.heading("#2", text="CIE y")
-tree_spectrum.heading("#3", text="CIE z")
-
-# The aligment of the text in the cells
-# Leftmost column has the text aligned to the left, while all others columns have centered text
-tree_spectrum.column("#0", anchor=tk.W, minwidth=100, width=100, stretch=True)
-tree_spectrum.column("#1", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
-tree_spectrum.column("#2", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
-tree_spectrum.column("#3", anchor=tk.CENTER, minwidth=50, width=50, stretch=True)
-
-# The background colors for odd and even rows (to make rows alternate colors)
-tree_spectrum.tag_configure(
-    "odd",
-    background = "gray92",
-    foreground = "black",
-)
-tree_spectrum.tag_configure(
-    "even",
-    background = "white",
-    foreground = "black"
-)
-
-# Pack the scrollbar to the right side of the frame and make the bar fill the entire height
-scroll_tree_spectrum.pack(
-    side = tk.RIGHT,
-    fill = tk.Y
-)
-# Pack the treeview to the frame and make the treeview to fill the remaining space on the frame
-tree_spectrum.pack(side = tk.RIGHT,
-    expand = True,
-    fill = tk.BOTH,
-)
-
-# Add the treeview frame to the main window grid, and make it fill the available space
-frame_tree_spectrum.grid(
-    column = 0,
-    row = 2,
-    sticky = "nsew",
-    padx = 3,
-    pady = 3,
-)
-
-
-#-----------------------------------------------------------------------------
-# Create the Chromaticity Diagram
-#-----------------------------------------------------------------------------
-
-# Create the frame to hold the diagram's canvas
-frame_cie = tk.Frame(
-    master = main_window,
-    borderwidth = 2,
-    relief = tk.SUNKEN,
-)
-
-# Create the canvas for the Chromaticity Duagram
-canvas_CIE = FigureCanvasTkAgg(plot.fig_CIE, master = frame_cie)
-
-# Add the canvas to the frame
-canvas_CIE.get_tk_widget().pack(
-    expand = True,
-    fill = tk.BOTH,
-)
-
-# Add the frame to the window
-frame_cie.grid(
-    column = 1,
-    row = 1,
-    rowspan = 2,
-    sticky = "nsew",
-    padx = 3,
-    pady = 3,
-)
-
-# Draw the Chromaticity Diagram on the canvas
-canvas_CIE.draw()
-
-
-#-----------------------------------------------------------------------------
-# Toolbar for the Chromaticity Diagram
-#-----------------------------------------------------------------------------
-
-# Modify the .save_figure() method of the NavigationToolbar2Tk class
-"""NOTE
-The only change I am making is to add en event generated when the figure is successfully saved.
-That event is used to toggle off the exit confirmation after the figure is saved.
-"""
-class NavigationToolbar2Tk_modified(NavigationToolbar2Tk):
-    def save_figure(self, *args):
-        filetypes = self.canvas.get_supported_filetypes().copy()
-        default_filetype = self.canvas.get_default_filetype()
-
-        # Tk doesn't provide a way to choose a default filetype,
-        # so we just have to put it first
-        default_filetype_name = filetypes.pop(default_filetype)
-        sorted_filetypes = ([(default_filetype, default_filetype_name)]
-                            + sorted(filetypes.items()))
-        tk_filetypes = [(name, '*.%s' % ext) for ext, name in sorted_filetypes]
-
-        # adding a default extension seems to break the
-        # asksaveasfilename dialog when you choose various save types
-        # from the dropdown.  Passing in the empty string seems to
-        # work - JDH!
-        #defaultextension = self.canvas.get_default_filetype()
-        defaultextension = ''
-        initialdir = os.path.expanduser(mpl.rcParams['savefig.directory'])
-        initialfile = self.canvas.get_default_filename()
-        fname = tk.filedialog.asksaveasfilename(
-            master=self.canvas.get_tk_widget().master,
-            title='Save the figure',
-            filetypes=tk_filetypes,
-            defaultextension=defaultextension,
-            initialdir=initialdir,
-            initialfile=initialfile,
-            )
+    # Add the treeview frame to the main window grid, and make it fill the available space
+    frame_tree_spectrum.grid(
+        column = 0,
+        row = 2,
+        sticky = "nsew",
+        padx = 3,
+        pady = 3,
+    )
 
-        if fname in ["", ()]:
-            return
-        # Save dir for next time, unless empty str (i.e., use cwd).
-        if initialdir != "":
-            mpl.rcParams['savefig.directory'] = (
-                os.path.dirname(str(fname)))
-        try:
-            # This method will handle the delegation to the correct type
-            self.canvas.figure.savefig(fname)
-            """ Change begin """
-            self.window.event_generate("<<FigureSaved>>", when="tail")
-            self.window.update()
-            """ Change end """
-        except Exception as e:
-            tk.messagebox.showerror("Error saving file", str(e))
-
-# Create the toolbar
-toolbar = NavigationToolbar2Tk_modified(canvas_CIE, main_window, pack_toolbar=False)
-toolbar.update()
-
-# Add the toolbar to the window
-toolbar.grid(
-    column = 1,
-    row = 0,
-    sticky = "w",   # Attach the toolbar to the left corner of the cell
-)
-
-# toolbar.message.get()
-
-
-#-----------------------------------------------------------------------------
-# Opening the main window
-#-----------------------------------------------------------------------------
-
-# Silent authorship check
-from hashlib import sha1
-file = open(Path("lib", "About.txt"), "r")
-file.readline()
-check1 = sha1(bytes(file.readline(), "utf-8"))
-check2 = sha1(bytes(file.readline(), "utf-8"))
-file.close()
-
-if (check1.hexdigest() != "914f5161abc23604ef92b6dd90eff35315eb355d") \
-or (check2.hexdigest() != "a46e6a598532c8942c892991ef60578514426564"):
-    
-    from base64 import b64decode
-    file = open(Path("lib", "About.txt"), "r+")
-    lines = file.readlines()
-    lines[1] = b64decode(b"QXV0aG9yOiBUaWFnbyBCZWNlcnJhIFBhb2xpbmkK").decode()
-    lines[2] = b64decode(b"RS1tYWlsOiB0cGFvbGluaUBnbWFpbC5jb20K").decode()
-    file.seek(0)
-    file.writelines(lines)
+
+    #-----------------------------------------------------------------------------
+    # Create the Chromaticity Diagram
+    #-----------------------------------------------------------------------------
+
+    # Create the frame to hold the diagram's canvas
+    frame_cie = tk.Frame(
+        master = main_window,
+        borderwidth = 2,
+        relief = tk.SUNKEN,
+    )
+
+    # Create the canvas for the Chromaticity Duagram
+    canvas_CIE = FigureCanvasTkAgg(plot.fig_CIE, master = frame_cie)
+
+    # Add the canvas to the frame
+    canvas_CIE.get_tk_widget().pack(
+        expand = True,
+        fill = tk.BOTH,
+    )
+
+    # Add the frame to the window
+    frame_cie.grid(
+        column = 1,
+        row = 1,
+        rowspan = 2,
+        sticky = "nsew",
+        padx = 3,
+        pady = 3,
+    )
+
+    # Draw the Chromaticity Diagram on the canvas
+    """NOTE
+    Only the background of the diagram is rendered by a full draw of the canvas. When the spectra change,
+    plot.redraw_cie() draws the points, labels, ellipses and series over a copy of that background.
+    """
+    plot.enable_blitting(canvas_CIE)
+    canvas_CIE.draw()
+
+
+    #-----------------------------------------------------------------------------
+    # Toolbar for the Chromaticity Diagram
+    #-----------------------------------------------------------------------------
+
+    # Modify the .save_figure() method of the NavigationToolbar2Tk class
+    """NOTE
+    The changes I am making are to add en event generated when the figure is successfully saved,
+    and to save the figure through plot.save_cie(), so the blitted data is included on the file.
+    That event is used to toggle off the exit confirmation after the figure is saved.
+    """
+    class NavigationToolbar2Tk_modified(NavigationToolbar2Tk):
+        def save_figure(self, *args):
+            filetypes = self.canvas.get_supported_filetypes().copy()
+            default_filetype = self.canvas.get_default_filetype()
+
+            # Tk doesn't provide a way to choose a default filetype,
+            # so we just have to put it first
+            default_filetype_name = filetypes.pop(default_filetype)
+            sorted_filetypes = ([(default_filetype, default_filetype_name)]
+                                + sorted(filetypes.items()))
+            tk_filetypes = [(name, '*.%s' % ext) for ext, name in sorted_filetypes]
+
+            # adding a default extension seems to break the
+            # asksaveasfilename dialog when you choose various save types
+            # from the dropdown.  Passing in the empty string seems to
+            # work - JDH!
+            #defaultextension = self.canvas.get_default_filetype()
+            defaultextension = ''
+            initialdir = os.path.expanduser(mpl.rcParams['savefig.directory'])
+            initialfile = self.canvas.get_default_filename()
+            fname = tk.filedialog.asksaveasfilename(
+                master=self.canvas.get_tk_widget().master,
+                title='Save the figure',
+                filetypes=tk_filetypes,
+                defaultextension=defaultextension,
+                initialdir=initialdir,
+                initialfile=initialfile,
+                )
+
+            if fname in ["", ()]:
+                return
+            # Save dir for next time, unless empty str (i.e., use cwd).
+            if initialdir != "":
+                mpl.rcParams['savefig.directory'] = (
+                    os.path.dirname(str(fname)))
+            try:
+                # This method will handle the delegation to the correct type
+                """ Change begin """
+                plot.save_cie(fname)    # The data is skipped by .savefig() while it is being blitted
+                self.window.event_generate("<<FigureSaved>>", when="tail")
+                self.window.update()
+                """ Change end """
+            except Exception as e:
+                tk.messagebox.showerror("Error saving file", str(e))
+
+    # Create the toolbar
+    toolbar = NavigationToolbar2Tk_modified(canvas_CIE, main_window, pack_toolbar=False)
+    toolbar.update()
+
+    # Add the toolbar to the window
+    toolbar.grid(
+        column = 1,
+        row = 0,
+        sticky = "w",   # Attach the toolbar to the left corner of the cell
+    )
+
+    # toolbar.message.get()
+
+
+    #-----------------------------------------------------------------------------
+    # Selecting the spectra on the Chromaticity Diagram
+    #-----------------------------------------------------------------------------
+
+    def select_on_treeview(spectra, add=False):
+        """Select on the Treeview the rows of a list of spectra (adding them to the current selection if 'add' is True).
+        """
+        spectrum_items = {spectrum: item for item, spectrum in spectrum_CIE_dict.items()}
+        items = [spectrum_items[spectrum] for spectrum in spectra if spectrum in spectrum_items]
+        if len(items) == 0:
+            return False
+
+        if add:
+            tree_spectrum.selection_add(items)
+        else:
+            tree_spectrum.selection_set(items)
+        tree_spectrum.focus(items[0])
+        tree_spectrum.see(items[0])
+
+    # Click on a point to select its spectrum (Ctrl+click adds it to the selection)
+    def pick_spectrum(event):
+        if toolbar.mode:
+            return  # Do not change the selection while zooming or panning the diagram
+        select_on_treeview([event.spectrum], add=(event.mouseevent.key == "control"))
+
+    plot.enable_picking(spectrum_box)
+    canvas_CIE.mpl_connect("pick_event", pick_spectrum)
+
+    # Drag with the right mouse button to select the spectra inside a rectangle
+    def box_select(press_event, release_event):
+        spectra = spectrum_box.within_rectangle(press_event.xdata, press_event.ydata, release_event.xdata, release_event.ydata)
+        select_on_treeview(spectra, add=(release_event.key == "control"))
+
+    box_selector = RectangleSelector(
+        plot.ax_CIE,
+        box_select,
+        button = [3],                                   # Right mouse button
+        minspanx = 0.002,                               # Ignore single clicks
+        minspany = 0.002,
+        spancoords = "data",
+        props = dict(edgecolor="white", fill=False, linestyle="--"),
+    )
+
+
+    #-----------------------------------------------------------------------------
+    # Opening the main window
+    #-----------------------------------------------------------------------------
+
+    # Silent authorship check
+    from hashlib import sha1
+    file = open(Path("lib", "About.txt"), "r")
+    file.readline()
+    check1 = sha1(bytes(file.readline(), "utf-8"))
+    check2 = sha1(bytes(file.readline(), "utf-8"))
     file.close()
 
-# Redirect the shell output to a text file
-try:
-    # Create the "log" folder if it doesn't exist
-    if not os.path.exists("log"):
-        os.makedirs("log")
-    
-    # Create or open the error log file
-    error_log = open(Path("log", "Error log.txt"), "a", encoding="utf-8")
-
-    # Change the shell output to the error log
-    sys.stderr = sys.stdout = error_log
-except:
-    pass
-
-# Open the main window and begin the program's main loop
-main_window.mainloop()
\ No newline at end of file
+    if (check1.hexdigest() != "914f5161abc23604ef92b6dd90eff35315eb355d") \
+    or (check2.hexdigest() != "a46e6a598532c8942c892991ef60578514426564"):
+        
+        from base64 import b64decode
+        file = open(Path("lib", "About.txt"), "r+")
+        lines = file.readlines()
+        lines[1] = b64decode(b"QXV0aG9yOiBUaWFnbyBCZWNlcnJhIFBhb2xpbmkK").decode()
+        lines[2] = b64decode(b"RS1tYWlsOiB0cGFvbGluaUBnbWFpbC5jb20K").decode()
+        file.seek(0)
+        file.writelines(lines)
+        file.close()
+
+    # Redirect the shell output to a text file
+    try:
+        # Create the "log" folder if it doesn't exist
+        if not os.path.exists("log"):
+            os.makedirs("log")
+        
+        # Create or open the error log file
+        error_log = open(Path("log", "Error log.txt"), "a", encoding="utf-8")
+
+        # Change the shell output to the error log
+        sys.stderr = sys.stdout = error_log
+    except:
+        pass
+
+    # Open the main window and begin the program's main loop
+    main_window.mainloop()
+
+
+if __name__ == "__main__":
+    """NOTE
+    The processes of the parallel import (see spectrum_container.read_files) are started with the
+    "spawn" method on Windows and macOS, which imports this script again in each process (as the
+    module "__mp_main__"). So the window and everything else is only created inside main(), otherwise
+    each process would build the whole interface (and its figures) before it could import any file.
+    """
+
+    # Allow the processes of the parallel import to start when the program is frozen into an executable
+    multiprocessing.freeze_support()
+
+    main()